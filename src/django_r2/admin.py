@@ -1,14 +1,23 @@
+import json
+import uuid
+
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
 from django_r2 import settings
+from django_r2.objects import services as objects_services
 from django_r2.models import (
     Bucket,
     BucketCredentials,
     Object,
 )
 
+DJANGO_R2_PRESIGN_BATCH_SIZE = getattr(settings, "DJANGO_R2_PRESIGN_BATCH_SIZE", 500)
+
 
 @admin.register(Bucket)
 class BucketAdmin(admin.ModelAdmin):
@@ -41,8 +50,9 @@ admin.site.register(BucketCredentials)
 
 @admin.register(Object)
 class ObjectAdmin(admin.ModelAdmin):
-    list_display = ("filename", "bucket", "uploaded", "uploaded_at")
+    list_display = ("filename", "bucket", "uploaded", "uploaded_at", "download_link")
     list_filter = ("uploaded",)
+    list_select_related = ("bucket",)
     readonly_fields = (
         "uploaded_size",
         "uploaded_type",
@@ -54,6 +64,8 @@ class ObjectAdmin(admin.ModelAdmin):
         "uploaded",
         "errors",
         "errors_at",
+        "uploaded_etag",
+        "verified_at",
         "added_by",
         "created_at",
         "updated_at",
@@ -89,6 +101,8 @@ class ObjectAdmin(admin.ModelAdmin):
                     "uploaded_width",
                     "uploaded_height",
                     "uploaded_metadata",
+                    "uploaded_etag",
+                    "verified_at",
                 )
             },
         ),
@@ -112,10 +126,75 @@ class ObjectAdmin(admin.ModelAdmin):
         ),
     )
 
+    class Media:
+        # Swaps the placeholder links below for presigned URLs,
+        # signed in batches by `sign_downloads_view`.
+        js = ("django_r2/admin/object_downloads.js",)
+
+    def get_urls(self):
+        urls = [
+            path(
+                "sign-downloads/",
+                self.admin_site.admin_view(self.sign_downloads_view),
+                name="django_r2_object_sign_downloads",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def download_placeholder(self, obj, label, force_download=False):
+        """
+        A link to the proxy download view (which signs on click)
+        until the admin JS replaces it with a presigned URL.
+        """
+        return format_html(
+            '<a href="{}" target="_blank" data-django-r2-object="{}" '
+            'data-django-r2-sign-url="{}" data-django-r2-force-download="{}">{}</a>',
+            obj.get_proxy_download_url(),
+            obj.id,
+            reverse("admin:django_r2_object_sign_downloads"),
+            "1" if force_download else "0",
+            label,
+        )
+
+    @admin.display(description="Download")
+    def download_link(self, obj):
+        if not obj.keyname:
+            return "-"
+        return self.download_placeholder(obj, "Download", force_download=True)
+
     @admin.display(description="Download")
     def download_buttons(self, obj):
-        url = obj.get_s3_download_url()
-        s3_button = f'<a href="{url}" target="_blank">Download from S3</a>'
-        s3_button2 = f'<a href="{url}" target="_blank">Download</a>'
-        html_ = "<br/>".join([s3_button, s3_button2])
-        return mark_safe(html_)
+        if not obj or not obj.keyname:
+            return "-"
+        s3_button = self.download_placeholder(obj, "Download from S3")
+        s3_button2 = self.download_placeholder(obj, "Download", force_download=True)
+        return mark_safe("<br/>".join([s3_button, s3_button2]))
+
+    def sign_downloads_view(self, request):
+        """
+        `{"ids": [...], "force_download": bool}` -> `{"urls": {id: url}}`
+        """
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            request_data = json.loads(request.body)
+            ids = [str(uuid.UUID(str(i))) for i in request_data.get("ids", [])]
+            force_download = bool(request_data.get("force_download", False))
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({"error": "Invalid request"}, status=400)
+        if len(ids) > DJANGO_R2_PRESIGN_BATCH_SIZE:
+            msg = f"At most {DJANGO_R2_PRESIGN_BATCH_SIZE} objects per request"
+            return JsonResponse({"error": msg}, status=400)
+        instances = (
+            self.get_queryset(request)
+            .filter(id__in=ids)
+            .only(
+                "id", "bucket_id", "keyname", "filename", "file_extension", "created_at"
+            )
+        )
+        urls = objects_services.get_download_urls_for_objects(
+            instances, force_download=force_download
+        )
+        return JsonResponse({"urls": urls})
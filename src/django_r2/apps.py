@@ -1,7 +1,18 @@
+import django
 from django.apps import AppConfig
+from django.core.exceptions import ImproperlyConfigured
 
 
 class DjangoR2Config(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "django_r2"
     verbose_name = "Django R2"
+
+    def ready(self):
+        from django_r2 import settings, signals
+
+        # The async views use async login_required (5.1) and request.auser() (5.0)
+        if settings.DJANGO_R2_ASYNC_VIEWS and django.VERSION < (5, 1):
+            raise ImproperlyConfigured("DJANGO_R2_ASYNC_VIEWS requires Django 5.1+")
+        if settings.DJANGO_R2_MANAGE_R2_BUCKETS:
+            signals.connect_bucket_lifecycle_receivers()
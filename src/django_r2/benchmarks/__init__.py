@@ -0,0 +1,25 @@
+"""
+Benchmark suites run by `manage.py r2_benchmark <suite>`.
+
+Each suite module exposes `run(**options) -> list[dict]`; every
+result has a `name` plus either timings (see `timing.measure`)
+or a `value` with a `unit`, and optionally a `limit` the value must
+not exceed.
+
+`manage.py r2_benchmark --save baseline.json` records the results
+and `--compare baseline.json` shows each one's change against them.
+
+The presign, key derivation and upload view micro-benchmarks are
+pytest-benchmark cases in `tests/test_benchmarks.py`.
+"""
+
+from importlib import import_module
+
+SUITES = {
+    "cache": "django_r2.benchmarks.cache",
+    "importtime": "django_r2.benchmarks.importtime",
+}
+
+
+def run_suite(name: str, **options) -> list[dict]:
+    return import_module(SUITES[name]).run(**options)
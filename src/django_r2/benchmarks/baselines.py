@@ -0,0 +1,70 @@
+"""
+JSON baselines for `r2_benchmark --save` / `--compare`.
+
+A baseline maps each suite to its results by name, plus the
+environment it was recorded in. Comparisons use the median for
+timings and `value` otherwise; lower is better for both.
+"""
+
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+import django
+
+BASELINE_VERSION = 1
+
+
+def get_environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "django": django.get_version(),
+        "platform": platform.platform(),
+        "executable": sys.executable,
+    }
+
+
+def dump_baseline(results: dict[str, list[dict]], path: str):
+    data = {
+        "version": BASELINE_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": get_environment(),
+        "suites": {
+            suite: {result["name"]: result for result in suite_results}
+            for suite, suite_results in results.items()
+        },
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path: str) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version in {path}")
+    return data
+
+
+def get_metric(result: dict) -> float:
+    return result["value"] if "value" in result else result["median"]
+
+
+def get_change(result: dict, baseline: Optional[dict]) -> Optional[float]:
+    """
+    Relative change from the baseline (0.25 is 25% slower/larger),
+    or None without a comparable baseline result.
+    """
+    if baseline is None:
+        return None
+    try:
+        before, after = get_metric(baseline), get_metric(result)
+    except KeyError:
+        return None
+    if not before:
+        return None if not after else float("inf")
+    return (after - before) / before
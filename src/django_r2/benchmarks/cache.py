@@ -0,0 +1,106 @@
+"""
+Object listing cache: pickled `Page` of model instances (the old
+format) against the compact rows from `objects.rows`.
+
+The old format cached a queryset-backed `Page`; pickling a
+list-backed `Page` here skips the pickled queryset, so its numbers
+are a lower bound for the old payload size and load time.
+"""
+
+import pickle
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils import timezone
+
+from django_r2.benchmarks.timing import measure
+from django_r2.models import Object
+from django_r2.objects.rows import ObjectRow, dump_rows, load_rows
+
+
+def make_objects(count: int):
+    bucket_id = uuid.uuid4()
+    now = timezone.now()
+    objs = []
+    for i in range(count):
+        obj = Object(
+            id=uuid.uuid1(),
+            bucket_id=bucket_id,
+            filename=f"holiday-photo-{i:05d}.jpg",
+            uploaded=True,
+            uploaded_size=1_234_567 + i,
+            uploaded_type="image/jpeg",
+            uploaded_width=4032,
+            uploaded_height=3024,
+            uploaded_metadata={
+                "name": f"holiday-photo-{i:05d}.jpg",
+                "size": 1_234_567 + i,
+                "type": "image/jpeg",
+                "width": 4032,
+                "height": 3024,
+                "duration": None,
+                "lastModified": 1_700_000_000_000 + i,
+            },
+            errors={},
+        )
+        obj.populate_derived_fields()
+        obj.created_at = obj.updated_at = now - timedelta(seconds=i)
+        objs.append(obj)
+    return objs
+
+
+def to_row(obj) -> ObjectRow:
+    return ObjectRow(*(getattr(obj, name) for name in ObjectRow._fields))
+
+
+def run(rows: int = 50, number: int = 200, repeat: int = 5, **options):
+    objs = make_objects(rows)
+    page = Paginator(objs, rows).get_page(1)
+    object_rows = [to_row(obj) for obj in objs]
+    cursors = ("bi1lbmQtY3Vyc29y", None)
+
+    pickled = pickle.dumps(page, pickle.HIGHEST_PROTOCOL)
+    compact = dump_rows(object_rows, *cursors)
+
+    pickle_key = f"django_r2:benchmark:{uuid.uuid4()}:pickle"
+    compact_key = f"django_r2:benchmark:{uuid.uuid4()}:compact"
+    cache.set(pickle_key, page, 300)
+    cache.set(compact_key, compact, 300)
+    try:
+        results = [
+            {"name": "payload size (pickled Page)", "value": len(pickled), "unit": "B"},
+            {"name": "payload size (compact rows)", "value": len(compact), "unit": "B"},
+            {
+                "name": "encode (pickled Page)",
+                **measure(
+                    lambda: pickle.dumps(page, pickle.HIGHEST_PROTOCOL),
+                    number,
+                    repeat,
+                ),
+            },
+            {
+                "name": "encode (compact rows)",
+                **measure(lambda: dump_rows(object_rows, *cursors), number, repeat),
+            },
+            {
+                "name": "decode (pickled Page)",
+                **measure(lambda: pickle.loads(pickled), number, repeat),
+            },
+            {
+                "name": "decode (compact rows)",
+                **measure(lambda: load_rows(compact), number, repeat),
+            },
+            {
+                "name": "cache hit (pickled Page)",
+                **measure(lambda: cache.get(pickle_key), number, repeat),
+            },
+            {
+                "name": "cache hit (compact rows)",
+                **measure(lambda: load_rows(cache.get(compact_key)), number, repeat),
+            },
+        ]
+    finally:
+        cache.delete_many([pickle_key, compact_key])
+    return results
@@ -0,0 +1,325 @@
+"""
+Bucket listing queries at scale (`manage.py r2_benchmark_db`).
+
+Synthetic `Object` rows are bulk-loaded into a dedicated benchmark
+bucket (with `COPY` on PostgreSQL/psycopg 3, `bulk_create` in
+batches elsewhere), spread newest-first over `days` days. Then each
+query path is timed and its plan captured on the default database:
+
+- `get_paginated_objects_for_bucket` (the `ObjectListView` query,
+  bypassing the page cache) for the first, middle and last pages,
+  next to an OFFSET page at the same depth for comparison;
+- `ObjectAdmin` search on `filename`, as the admin changelist runs
+  it (page of rows plus the paginator's `COUNT`);
+- `get_object_by_id` (cache bypassed).
+
+Rows are written straight to the table, so no signals run and no
+R2 bucket is created.
+"""
+
+import contextlib
+import uuid
+from datetime import timedelta
+from typing import Callable, Iterator, Optional
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from django_r2.benchmarks.timing import measure
+from django_r2.models import Bucket, Object
+from django_r2.objects import services as objects_services
+from django_r2.objects.pagination import encode_cursor, get_cursor_queryset
+
+BENCHMARK_BUCKET_NAME = "django-r2-benchmark-db"
+BENCHMARK_USERNAME = "django-r2-benchmark"
+
+WORDS = ["invoice", "holiday", "sunset", "contract", "scan", "render", "backup"]
+# (extension, content type, is image, is video, is audio)
+FILE_TYPES = [
+    (".jpg", "image/jpeg", True, False, False),
+    (".pdf", "application/pdf", False, False, False),
+    (".mp4", "video/mp4", False, True, False),
+    (".mp3", "audio/mpeg", False, False, True),
+    (".zip", "application/zip", False, False, False),
+]
+
+COPY_FIELDS = [
+    "id",
+    "bucket_id",
+    "added_by_id",
+    "source",
+    "keyname",
+    "downloadable_filename",
+    "filename",
+    "file_extension",
+    "uploaded_size",
+    "display_size",
+    "uploaded_type",
+    "is_image_file",
+    "is_video_file",
+    "is_audio_file",
+    "uploaded",
+    "uploaded_at",
+    "errors",
+    "created_at",
+    "updated_at",
+]
+
+
+def get_benchmark_bucket() -> Bucket:
+    User = get_user_model()
+    user = User.objects.filter(username=BENCHMARK_USERNAME).first()
+    if user is None:
+        user = User(username=BENCHMARK_USERNAME)
+        user.set_unusable_password()
+        user.save()
+    bucket = Bucket.objects.filter(name=BENCHMARK_BUCKET_NAME).first()
+    if bucket is None:
+        # active_in_cloudflare skips the post_save bucket creation in R2
+        bucket = Bucket.objects.create(
+            owner=user, name=BENCHMARK_BUCKET_NAME, active_in_cloudflare=True
+        )
+    return bucket
+
+
+def synthetic_rows(
+    bucket: Bucket, start: int, stop: int, total: int, days: int
+) -> Iterator[dict]:
+    """
+    Rows `start` to `stop` of `total`; row 0 is the newest and the
+    oldest is `days` days old.
+    """
+    now = timezone.now()
+    step = timedelta(days=days) / max(total, 1)
+    for i in range(start, stop):
+        word = WORDS[i % len(WORDS)]
+        extension, content_type, is_image, is_video, is_audio = FILE_TYPES[
+            i % len(FILE_TYPES)
+        ]
+        size = 1024 + (i * 7919) % (512 * 1024 * 1024)
+        created_at = now - step * i
+        object_id = uuid.uuid4()
+        stem = f"{word}-{i:09d}"
+        yield {
+            "id": object_id,
+            "bucket_id": bucket.id,
+            "added_by_id": bucket.owner_id,
+            "source": Object.SourceChoices.USER,
+            "keyname": f"{stem}-{object_id.hex[:5]}{extension}",
+            "downloadable_filename": f"{stem}-{object_id.hex[:10]}{extension}",
+            "filename": f"{word.title()} {i:09d}{extension}",
+            "file_extension": extension,
+            "uploaded_size": size,
+            "display_size": f"{size / 1024 / 1024:.1f} MB",
+            "uploaded_type": content_type,
+            "is_image_file": is_image,
+            "is_video_file": is_video,
+            "is_audio_file": is_audio,
+            "uploaded": True,
+            "uploaded_at": created_at,
+            "errors": {},
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+@contextlib.contextmanager
+def explicit_timestamps():
+    """
+    Let `bulk_create` keep the synthetic `created_at`/`updated_at`
+    instead of stamping them with the current time.
+    """
+    fields = [Object._meta.get_field(name) for name in ("created_at", "updated_at")]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def can_copy() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        # psycopg 3; psycopg2 cursors have no `copy()`
+        return callable(getattr(cursor.cursor, "copy", None))
+
+
+def copy_rows(rows):
+    table = connection.ops.quote_name(Object._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(name) for name in COPY_FIELDS)
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+            for row in rows:
+                row["errors"] = "{}"
+                copy.write_row([row[name] for name in COPY_FIELDS])
+
+
+def generate_objects(
+    bucket: Bucket,
+    count: int,
+    days: int = 365,
+    batch_size: int = 10_000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Top the benchmark bucket up to `count` rows. Returns how many
+    rows were added.
+    """
+    existing = Object.objects.filter(bucket=bucket).count()
+    use_copy = can_copy()
+    added = 0
+    for start in range(existing, count, batch_size):
+        stop = min(start + batch_size, count)
+        rows = synthetic_rows(bucket, start, stop, count, days)
+        with transaction.atomic():
+            if use_copy:
+                copy_rows(rows)
+            else:
+                with explicit_timestamps():
+                    Object.objects.bulk_create(
+                        [Object(**row) for row in rows], batch_size=batch_size
+                    )
+        added += stop - start
+        if progress is not None:
+            progress(stop)
+    if added and connection.vendor in ("postgresql", "sqlite"):
+        with connection.cursor() as cursor:
+            # Fresh statistics so the planner sees the new row count
+            cursor.execute(
+                f"ANALYZE {connection.ops.quote_name(Object._meta.db_table)}"
+            )
+    if added:
+        objects_services.clear_cache_for_bucket_objects(bucket.id)
+    return added
+
+
+def delete_objects(bucket: Bucket) -> int:
+    """
+    Delete the benchmark rows with one statement (no per-row
+    signals), then the bucket.
+    """
+    # Without a name, deleting the bucket doesn't queue an R2 bucket purge
+    Bucket.objects.filter(id=bucket.id).update(name=None)
+    table = connection.ops.quote_name(Object._meta.db_table)
+    bucket_id = Object._meta.get_field("bucket").get_db_prep_value(
+        bucket.id, connection
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE bucket_id = %s", [bucket_id])
+        deleted = cursor.rowcount
+    Bucket.objects.filter(id=bucket.id).delete()
+    return deleted
+
+
+def get_row_at(bucket: Bucket, offset: int):
+    return (
+        Object.objects.filter(bucket=bucket)
+        .order_by("-created_at", "-id")
+        .values_list("created_at", "id")[offset : offset + 1]
+        .first()
+    )
+
+
+def explain(queryset) -> str:
+    try:
+        return queryset.explain()
+    except Exception as e:
+        return f"(no plan: {e})"
+
+
+def run(
+    bucket: Bucket,
+    page_size: int = 50,
+    repeat: int = 5,
+    search_terms: Optional[list[str]] = None,
+    **options,
+) -> list[dict]:
+    total = Object.objects.filter(bucket=bucket).count()
+    results = [{"name": "rows in bucket", "value": total, "unit": "rows"}]
+    if not total:
+        return results
+    rows_queryset = objects_services.get_object_rows_queryset(bucket.id)
+
+    depths = [("first", 0), ("middle", total // 2), ("deep", max(total - page_size, 0))]
+    detail_ids = []
+    for label, offset in depths:
+        cursor = None
+        row = get_row_at(bucket, offset)
+        detail_ids.append((label, row[1]))
+        if offset:
+            # The page after the row just above `offset`
+            created_at, object_id = get_row_at(bucket, offset - 1)
+            cursor = encode_cursor(created_at, object_id)
+        queryset, _, _ = get_cursor_queryset(rows_queryset, cursor, page_size)
+        results.append(
+            {
+                "name": f"object list, {label} page",
+                **measure(
+                    lambda cursor=cursor: objects_services.get_paginated_objects_for_bucket(
+                        bucket.id,
+                        cursor=cursor,
+                        page_size=page_size,
+                        force_cache_refresh=True,
+                    ),
+                    1,
+                    repeat,
+                ),
+                "plan": explain(queryset),
+            }
+        )
+        offset_queryset = rows_queryset.order_by("-created_at", "-id")[
+            offset : offset + page_size
+        ]
+        results.append(
+            {
+                "name": f"OFFSET page, {label} page",
+                **measure(lambda qs=offset_queryset: list(qs.all()), 1, repeat),
+                "plan": explain(offset_queryset),
+            }
+        )
+
+    model_admin = admin.site._registry.get(Object)
+    if model_admin is not None:
+        factory = RequestFactory()
+        for term in search_terms or ["sunset", f"{total // 2:09d}"]:
+            request = factory.get("/", {"q": term})
+            queryset, _ = model_admin.get_search_results(
+                request, Object.objects.all(), term
+            )
+            page = queryset.select_related("bucket").order_by(
+                *model_admin.get_ordering(request), "-pk"
+            )[:100]
+            results += [
+                {
+                    "name": f"admin search {term!r}, page",
+                    **measure(lambda qs=page: list(qs.all()), 1, repeat),
+                    "plan": explain(page),
+                },
+                {
+                    "name": f"admin search {term!r}, count",
+                    **measure(lambda qs=queryset: qs.count(), 1, repeat),
+                },
+            ]
+
+    for label, object_id in detail_ids:
+        results.append(
+            {
+                "name": f"get_object_by_id, {label} row",
+                **measure(
+                    lambda object_id=object_id: objects_services.get_object_by_id(
+                        object_id, force_cache_refresh=True
+                    ),
+                    1,
+                    repeat,
+                ),
+                "plan": explain(Object.objects.filter(id=object_id)),
+            }
+        )
+    return results
@@ -0,0 +1,92 @@
+"""
+Startup cost of `django_r2`: runs `django.setup()` in a fresh
+interpreter under `python -X importtime` and adds up the self time
+of every `django_r2` module. The S3/Cloudflare SDKs are imported on
+first use, so none of `HEAVY_MODULES` should load during setup; each
+one that does is reported with its cumulative import time.
+
+Results carry a `limit` (`DJANGO_R2_IMPORT_BUDGET_MS`, and 0 for the
+SDKs) that `r2_benchmark` treats as a failure when exceeded.
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django_r2 import settings
+
+DJANGO_R2_IMPORT_BUDGET_MS = getattr(settings, "DJANGO_R2_IMPORT_BUDGET_MS", 150)
+
+HEAVY_MODULES = ["boto3", "botocore", "cloudflare", "aiobotocore", "requests"]
+
+SETUP_CODE = "import django; django.setup()"
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(output: str) -> dict[str, tuple[int, int]]:
+    """
+    `{module: (self_us, cumulative_us)}` from `-X importtime` output.
+    """
+    modules = {}
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_setup() -> dict[str, tuple[int, int]]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, sys.path)))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SETUP_CODE],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def run(repeat: int = 5, **options):
+    runs = [measure_setup() for _ in range(repeat)]
+
+    def median_ms(values) -> float:
+        return round(statistics.median(values) / 1000, 1)
+
+    results = [
+        {
+            "name": "django_r2 import (self time)",
+            "value": median_ms(
+                sum(
+                    self_us
+                    for name, (self_us, _) in modules.items()
+                    if name == "django_r2" or name.startswith("django_r2.")
+                )
+                for modules in runs
+            ),
+            "unit": "ms",
+            "limit": DJANGO_R2_IMPORT_BUDGET_MS,
+        },
+        {
+            "name": "django.setup() (total)",
+            "value": median_ms(
+                sum(self_us for self_us, _ in modules.values()) for modules in runs
+            ),
+            "unit": "ms",
+        },
+    ]
+    for name in HEAVY_MODULES:
+        if name in runs[0]:
+            results.append(
+                {
+                    "name": f"{name} imported at setup",
+                    "value": median_ms(modules[name][1] for modules in runs),
+                    "unit": "ms",
+                    "limit": 0,
+                }
+            )
+    return results
@@ -0,0 +1,392 @@
+"""
+Synthetic upload load (`manage.py r2_loadtest`).
+
+Each simulated upload goes through the same steps as the browser:
+
+1. presign: `upload_view` (or `upload_multipart_create_view` for files
+   at or above the multipart threshold, as `FileUpload.jsx` does);
+2. put: PUT the bytes to the presigned URL (every part, in order, for
+   multipart uploads);
+3. complete: `upload_complete_view` (or `upload_multipart_complete_view`),
+   which also queues the upload's verification.
+
+Views are called directly with `RequestFactory` requests (no
+middleware) from `concurrency` worker threads; the PUTs go over HTTP
+to the S3 endpoint, so point `AWS_S3_ENDPOINT_URL` at a stand-in
+(`manage.py r2_standin`, or `standin=True` to run one in-process).
+File sizes are drawn from a weighted mix such as `4KB:70,4MB:25,256MB:5`.
+"""
+
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from datetime import timedelta
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import RequestFactory
+from django.utils import timezone
+
+from django_r2.benchmarks.timing import percentile
+from django_r2.buckets import services as buckets_services
+from django_r2.models import Bucket, BucketCredentials
+from django_r2.uploads import views as uploads_views
+
+LOADTEST_USERNAME = "django-r2-loadtest"
+LOADTEST_BUCKET_NAME = "django-r2-loadtest"
+# `FileUpload.jsx` switches to multipart uploads at this size
+MULTIPART_THRESHOLD = 64 * 1024 * 1024
+PHASES = ("presign", "put", "complete")
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*$", re.IGNORECASE)
+BLOCK_SIZE = 1024 * 1024
+
+
+def parse_size(value: str) -> int:
+    match = SIZE_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f"Invalid size {value!r}")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit.upper()])
+
+
+def parse_size_mix(value: str) -> list[tuple[int, float]]:
+    """
+    `"4KB:70,4MB:25,256MB:5"` -> `[(size, weight), ...]`; a size
+    without a weight counts as 1.
+    """
+    mix = []
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        size, _, weight = part.partition(":")
+        try:
+            weight = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight in {part!r}")
+        if weight < 0:
+            raise ValueError(f"Invalid weight in {part!r}")
+        mix.append((parse_size(size), weight))
+    if not mix or not sum(weight for _, weight in mix):
+        raise ValueError("The size mix is empty")
+    return mix
+
+
+def sample_sizes(mix: list[tuple[int, float]], count: int, seed: int = 0) -> list[int]:
+    sizes, weights = zip(*mix)
+    return random.Random(seed).choices(sizes, weights=weights, k=count)
+
+
+def iter_payload(size: int, block: bytes) -> Iterator[bytes]:
+    view = memoryview(block)
+    while size > 0:
+        chunk = view[: min(size, len(view))]
+        size -= len(chunk)
+        yield chunk
+
+
+def get_loadtest_bucket(standin=None) -> Bucket:
+    """
+    The load-test user's bucket. Without a stand-in it is created in
+    R2 through the Cloudflare client; with one, a separate bucket
+    (`LOADTEST_BUCKET_NAME`) and its temporary credentials come
+    straight from the stand-in, so Cloudflare is never called and
+    the R2 bucket's credentials are left alone.
+    """
+    User = get_user_model()
+    user = User.objects.filter(username=LOADTEST_USERNAME).first()
+    if user is None:
+        user = User(username=LOADTEST_USERNAME)
+        user.set_unusable_password()
+        user.save()
+    if standin is not None:
+        bucket, _ = Bucket.objects.get_or_create(
+            owner=user,
+            name=LOADTEST_BUCKET_NAME,
+            defaults={"active_in_cloudflare": True},
+        )
+        standin.create_bucket(bucket.name)
+        issue_standin_credentials(bucket, standin)
+        return bucket
+    bucket = (
+        Bucket.objects.filter(owner=user)
+        .exclude(name=LOADTEST_BUCKET_NAME)
+        .order_by("created_at")
+        .first()
+    )
+    if bucket is None:
+        bucket = Bucket.objects.create(owner=user)
+    buckets_services.provision_r2_bucket(bucket)
+    return bucket
+
+
+def issue_standin_credentials(bucket: Bucket, standin, ttl_seconds: int = 60 * 60 * 24):
+    """
+    Replace the bucket's credentials with ones minted by `standin`;
+    only for the load-test stand-in bucket.
+    """
+    if bucket.name != LOADTEST_BUCKET_NAME:
+        raise ValueError(f"Bucket {bucket.id} is not the stand-in load-test bucket")
+    from django_r2.testing.credentials import issue_temporary_credentials
+
+    credentials = issue_temporary_credentials(
+        bucket.name, ttl_seconds=ttl_seconds, root_secret=standin.secret_access_key
+    )
+    BucketCredentials.objects.update_or_create(
+        bucket=bucket,
+        defaults={
+            "access_key_id": credentials.access_key_id,
+            "secret_access_key": credentials.secret_access_key,
+            "session_token": credentials.session_token,
+            "ttl_seconds": ttl_seconds,
+            "expires_at": timezone.now() + timedelta(seconds=ttl_seconds),
+        },
+    )
+    buckets_services.clear_cached_bucket_credentials(bucket.id)
+
+
+@dataclass
+class UploadResult:
+    size: int
+    multipart: bool = False
+    timings: dict = field(default_factory=dict)
+    # `(phase, message)` of the step that failed
+    error: Optional[tuple[str, str]] = None
+
+
+class UploadError(Exception):
+    pass
+
+
+class LoadTest:
+    def __init__(
+        self,
+        bucket: Bucket,
+        concurrency: int = 8,
+        multipart_threshold: int = MULTIPART_THRESHOLD,
+        timeout: float = 300.0,
+    ):
+        import urllib3
+
+        self.bucket = bucket
+        self.user = bucket.owner
+        self.concurrency = concurrency
+        self.multipart_threshold = multipart_threshold
+        self.factory = RequestFactory()
+        self.http = urllib3.PoolManager(
+            maxsize=concurrency,
+            block=True,
+            retries=False,
+            timeout=urllib3.Timeout(total=timeout),
+        )
+        self.block = os.urandom(BLOCK_SIZE)
+
+    def call_view(self, view, path: str, data, json_body: bool = False) -> dict:
+        if json_body:
+            request = self.factory.post(
+                path, json.dumps(data), content_type="application/json"
+            )
+        else:
+            request = self.factory.post(path, data)
+        request.user = self.user
+        response = view(request, bucket_id=self.bucket.id)
+        try:
+            content = json.loads(response.content)
+        except ValueError:
+            content = {}
+        if response.status_code != 200 or "error" in content:
+            message = content.get("error") or response.content[:200].decode(
+                errors="replace"
+            )
+            raise UploadError(f"{response.status_code}: {message}")
+        return content
+
+    def put(self, url: str, size: int) -> str:
+        response = self.http.request(
+            "PUT",
+            url,
+            body=iter_payload(size, self.block),
+            headers={
+                "Content-Length": str(size),
+                "Content-Type": "application/octet-stream",
+            },
+        )
+        if response.status >= 300:
+            raise UploadError(f"{response.status}: {response.data[:200]!r}")
+        return response.headers.get("ETag", "")
+
+    def upload(self, index: int, size: int) -> UploadResult:
+        multipart = bool(self.multipart_threshold) and size >= self.multipart_threshold
+        result = UploadResult(size=size, multipart=multipart)
+        filename = f"loadtest-{index:06d}.bin"
+        file_data = {
+            "name": filename,
+            "size": size,
+            "type": "application/octet-stream",
+        }
+        base_path = f"/{self.bucket.id}/upload"
+        phase = "presign"
+        try:
+            start = time.perf_counter()
+            if multipart:
+                presign = self.call_view(
+                    uploads_views.upload_multipart_create_view,
+                    f"{base_path}/multipart/",
+                    {"filename": filename, "size": size, "type": file_data["type"]},
+                )
+            else:
+                presign = self.call_view(
+                    uploads_views.upload_view, f"{base_path}/", {"filename": filename}
+                )
+            result.timings[phase] = time.perf_counter() - start
+
+            phase = "put"
+            start = time.perf_counter()
+            if multipart:
+                parts = []
+                part_size = presign["part_size"]
+                for part in presign["parts"]:
+                    offset = (part["part_number"] - 1) * part_size
+                    etag = self.put(part["url"], min(part_size, size - offset))
+                    parts.append({"part_number": part["part_number"], "etag": etag})
+            else:
+                self.put(presign["url"], size)
+            result.timings[phase] = time.perf_counter() - start
+
+            phase = "complete"
+            start = time.perf_counter()
+            if multipart:
+                self.call_view(
+                    uploads_views.upload_multipart_complete_view,
+                    f"{base_path}/multipart/complete/",
+                    {
+                        "object_data": presign["object_data"],
+                        "parts": parts,
+                        "file_data": file_data,
+                    },
+                    json_body=True,
+                )
+            else:
+                self.call_view(
+                    uploads_views.upload_complete_view,
+                    f"{base_path}/complete/",
+                    {
+                        "object_data": presign["object_data"],
+                        "completed": True,
+                        "file_data": file_data,
+                    },
+                    json_body=True,
+                )
+            result.timings[phase] = time.perf_counter() - start
+        except Exception as e:
+            result.error = (phase, f"{type(e).__name__}: {e}")
+        return result
+
+    def run(
+        self, sizes: list[int], progress: Optional[Callable[[int], None]] = None
+    ) -> tuple[list[UploadResult], float]:
+        """
+        Upload one file per entry of `sizes` from `concurrency`
+        threads. Returns the results (in `sizes` order) and the
+        wall time in seconds.
+        """
+        work = queue.SimpleQueue()
+        for item in enumerate(sizes):
+            work.put(item)
+        results = [None] * len(sizes)
+        done = 0
+        lock = threading.Lock()
+
+        def worker():
+            nonlocal done
+            try:
+                while True:
+                    try:
+                        index, size = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    results[index] = self.upload(index, size)
+                    with lock:
+                        done += 1
+                        if progress is not None:
+                            progress(done)
+            finally:
+                # Each thread has its own database connections
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker, name=f"r2-loadtest-{i}")
+            for i in range(min(self.concurrency, len(sizes)))
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, time.perf_counter() - start
+
+
+def summarize(results: list[UploadResult], elapsed: float) -> list[dict]:
+    """
+    Per-phase latency percentiles and error counts, then overall
+    throughput. Latencies only count the files that got through the
+    phase.
+    """
+    summary = []
+    total = len(results)
+    for phase in PHASES + ("total",):
+        if phase == "total":
+            samples = [sum(r.timings.values()) for r in results if r.error is None]
+            errors = sum(1 for r in results if r.error is not None)
+            attempts = total
+        else:
+            samples = [r.timings[phase] for r in results if phase in r.timings]
+            errors = sum(1 for r in results if r.error and r.error[0] == phase)
+            attempts = len(samples) + errors
+        samples.sort()
+        summary.append(
+            {
+                "name": f"{phase} latency",
+                "median": percentile(samples, 50),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "max": samples[-1] if samples else 0.0,
+                "count": len(samples),
+                "errors": errors,
+                "error_rate": errors / attempts if attempts else 0.0,
+            }
+        )
+    completed = [r for r in results if r.error is None]
+    uploaded_bytes = sum(r.size for r in completed)
+    elapsed = max(elapsed, 1e-9)
+    summary += [
+        {"name": "files uploaded", "value": len(completed), "unit": "files"},
+        {"name": "throughput", "value": len(completed) / elapsed, "unit": "files/s"},
+        {
+            "name": "bandwidth",
+            "value": uploaded_bytes / elapsed / 1024 / 1024,
+            "unit": "MB/s",
+        },
+        {"name": "wall time", "value": elapsed, "unit": "s"},
+    ]
+    return summary
+
+
+def get_error_samples(results: list[UploadResult], limit: int = 5) -> list[str]:
+    """
+    The most common error messages, with their counts.
+    """
+    counts = {}
+    for result in results:
+        if result.error is not None:
+            message = f"{result.error[0]}: {result.error[1]}"
+            counts[message] = counts.get(message, 0) + 1
+    ordered = sorted(counts.items(), key=lambda item: -item[1])[:limit]
+    return [f"{count} x {message}" for message, count in ordered]
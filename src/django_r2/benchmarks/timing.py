@@ -0,0 +1,44 @@
+import statistics
+import time
+from typing import Callable
+
+
+def measure(func: Callable, number: int = 100, repeat: int = 5) -> dict:
+    """
+    Run `func` `number` times per round for `repeat` rounds and
+    return per-call timings in seconds.
+    """
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+    return {
+        "min": min(rounds),
+        "median": statistics.median(rounds),
+        "mean": statistics.fmean(rounds),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def percentile(ordered: list[float], percent: float) -> float:
+    """
+    `percent` (0-100) percentile of already sorted samples,
+    interpolating between the closest ranks.
+    """
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
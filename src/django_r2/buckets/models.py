@@ -77,8 +77,6 @@ class BucketCredentials(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        if not self.project and self.bucket:
-            self.project = self.bucket.project or None
         if self.created_at and not self.expires_at:
             self.expires_at = self.created_at + timedelta(seconds=self.ttl_seconds)
         super().save(*args, **kwargs)
@@ -102,6 +100,21 @@ class BucketCredentials(models.Model):
             access_key_id=self.access_key_id,
             secret_access_key=self.secret_access_key,
             session_token=self.session_token,
+            expires_at=self.expires_at,
+        )
+
+    def get_async_s3_client(self):
+        """
+        `AsyncMyS3Client` for these credentials (needs aiobotocore).
+        """
+        from django_r2.helpers.myboto.aio import AsyncMyS3Client
+
+        return AsyncMyS3Client(
+            bucket=self.bucket.name,
+            access_key_id=self.access_key_id,
+            secret_access_key=self.secret_access_key,
+            session_token=self.session_token,
+            expires_at=self.expires_at,
         )
 
     def get_s3_client(self):
@@ -112,8 +125,17 @@ class BucketCredentials(models.Model):
         url = my_s3_client.get_presigned_upload_url(key=key, expires_in=expires_in)
         return url
 
+    def presign_upload_urls(self, keys, expires_in=60 * 60 * 24 * 7):
+        my_s3_client = self.get_my_s3_client()
+        return my_s3_client.get_presigned_upload_urls(keys, expires_in=expires_in)
+
     def presign_download_url(
-        self, key, filename=None, force_download=False, expires_in=60 * 60 * 24 * 7
+        self,
+        key,
+        filename=None,
+        force_download=False,
+        expires_in=60 * 60 * 24 * 7,
+        signing_time=None,
     ):
         my_s3_client = self.get_my_s3_client()
         url = my_s3_client.get_presigned_download_url(
@@ -121,9 +143,48 @@ class BucketCredentials(models.Model):
             filename=filename,
             expires_in=expires_in,
             force_download=force_download,
+            signing_time=signing_time,
         )
         return url
 
+    def presign_download_urls(
+        self,
+        items,
+        force_download=False,
+        expires_in=60 * 60 * 24 * 7,
+        signing_time=None,
+    ):
+        """
+        `items` is an iterable of `(key, filename)` pairs.
+        """
+        my_s3_client = self.get_my_s3_client()
+        return my_s3_client.get_presigned_download_urls(
+            items,
+            expires_in=expires_in,
+            force_download=force_download,
+            signing_time=signing_time,
+        )
+
+    def create_multipart_upload(self, key, content_type=None):
+        my_s3_client = self.get_my_s3_client()
+        return my_s3_client.create_multipart_upload(key, content_type=content_type)
+
+    def presign_upload_part_urls(
+        self, key, upload_id, part_count, expires_in=60 * 60 * 24 * 7
+    ):
+        my_s3_client = self.get_my_s3_client()
+        return my_s3_client.get_presigned_upload_part_urls(
+            key, upload_id, part_count, expires_in=expires_in
+        )
+
+    def complete_multipart_upload(self, key, upload_id, parts):
+        my_s3_client = self.get_my_s3_client()
+        return my_s3_client.complete_multipart_upload(key, upload_id, parts)
+
+    def abort_multipart_upload(self, key, upload_id):
+        my_s3_client = self.get_my_s3_client()
+        return my_s3_client.abort_multipart_upload(key, upload_id)
+
     def delete_object(self, key):
         s3_client = self.get_s3_client()
         return s3_client.delete_object(Bucket=self.bucket.name, Key=key)
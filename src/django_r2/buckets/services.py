@@ -1,33 +1,361 @@
+import hashlib
+import logging
+import time
 import uuid
+from datetime import timedelta
+from typing import Optional
 
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import close_old_connections
 from django.utils import timezone
 
-from django_r2.helpers.mycloudflare.client import get_cloudflare_client
+from django_r2 import metrics, settings
+from django_r2.helpers import myboto
+from django_r2.helpers.caching import ExpiringLRUCache
+from django_r2.helpers.myboto import empty
+from django_r2.helpers.mycloudflare.buckets import (
+    create_r2_bucket,
+    delete_r2_bucket,
+    update_r2_bucket_cors,
+)
+from django_r2.helpers.mycloudflare.client import (
+    get_async_cloudflare_client,
+    get_cloudflare_client,
+)
 from django_r2.models import Bucket, BucketCredentials
+from django_r2.objects import services as objects_services
 
+CLOUDFLARE_ACCOUNT_ID = getattr(settings, "CLOUDFLARE_ACCOUNT_ID", None)
+CLOUDFLARE_BUCKET_MANAGER_ACCESS_KEY = getattr(
+    settings, "CLOUDFLARE_BUCKET_MANAGER_ACCESS_KEY", None
+)
 
-def get_today_bucket_credentials_by_bucket_id(bucket_id: uuid.UUID | str):
-    bucket = Bucket.objects.get(id=bucket_id)
-    qs = BucketCredentials.objects.filter(bucket=bucket, expires_at__gte=timezone.now())
-    if qs.exists():
-        cred_obj = qs.first()
+DJANGO_R2_CREDENTIALS_CACHE_FORMAT = "django_r2:bucket_credentials:{bucket_id}"
+DJANGO_R2_CREDENTIALS_CACHE_MARGIN = getattr(
+    settings, "DJANGO_R2_CREDENTIALS_CACHE_MARGIN", 60 * 5
+)
+DJANGO_R2_CREDENTIALS_LOCAL_CACHE_SIZE = getattr(
+    settings, "DJANGO_R2_CREDENTIALS_LOCAL_CACHE_SIZE", 256
+)
+DJANGO_R2_CREDENTIALS_LOCAL_CACHE_TTL = getattr(
+    settings, "DJANGO_R2_CREDENTIALS_LOCAL_CACHE_TTL", 60
+)
+
+logger = logging.getLogger(__name__)
+
+_local_credentials_cache = ExpiringLRUCache(
+    maxsize=DJANGO_R2_CREDENTIALS_LOCAL_CACHE_SIZE
+)
+
+
+def get_credentials_cache_timeout(cred_obj: BucketCredentials) -> int:
+    """
+    Seconds the credentials may still be handed out for,
+    leaving a safety margin before `expires_at`.
+    """
+    if cred_obj is None or cred_obj.expires_at is None:
+        return 0
+    remaining = (cred_obj.expires_at - timezone.now()).total_seconds()
+    return int(remaining - DJANGO_R2_CREDENTIALS_CACHE_MARGIN)
+
+
+def get_cached_bucket_credentials(bucket_id: uuid.UUID | str):
+    local_key = str(bucket_id)
+    cred_obj = _local_credentials_cache.get(local_key)
+    metrics.record_cache("credentials_local", cred_obj is not None)
+    if cred_obj is not None:
         return cred_obj
-    cred_obj = BucketCredentials.objects.create(
-        bucket=bucket,
-        created_at=timezone.now(),
-        updated_at=timezone.now(),
-    )
+    cache_key = DJANGO_R2_CREDENTIALS_CACHE_FORMAT.format(bucket_id=bucket_id)
+    cred_obj = cache.get(cache_key)
+    timeout = get_credentials_cache_timeout(cred_obj)
+    metrics.record_cache("credentials", timeout > 0)
+    if timeout <= 0:
+        return None
+    local_timeout = min(timeout, DJANGO_R2_CREDENTIALS_LOCAL_CACHE_TTL)
+    _local_credentials_cache.set(local_key, cred_obj, time.time() + local_timeout)
+    return cred_obj
+
+
+async def aget_cached_bucket_credentials(bucket_id: uuid.UUID | str):
+    local_key = str(bucket_id)
+    cred_obj = _local_credentials_cache.get(local_key)
+    metrics.record_cache("credentials_local", cred_obj is not None)
+    if cred_obj is not None:
+        return cred_obj
+    cache_key = DJANGO_R2_CREDENTIALS_CACHE_FORMAT.format(bucket_id=bucket_id)
+    cred_obj = await cache.aget(cache_key)
+    timeout = get_credentials_cache_timeout(cred_obj)
+    metrics.record_cache("credentials", timeout > 0)
+    if timeout <= 0:
+        return None
+    local_timeout = min(timeout, DJANGO_R2_CREDENTIALS_LOCAL_CACHE_TTL)
+    _local_credentials_cache.set(local_key, cred_obj, time.time() + local_timeout)
+    return cred_obj
+
+
+def set_cached_bucket_credentials(cred_obj: BucketCredentials):
+    timeout = get_credentials_cache_timeout(cred_obj)
+    if timeout <= 0:
+        return
+    bucket_id = cred_obj.bucket_id
+    cache_key = DJANGO_R2_CREDENTIALS_CACHE_FORMAT.format(bucket_id=bucket_id)
+    cache.set(cache_key, cred_obj, timeout)
+    local_timeout = min(timeout, DJANGO_R2_CREDENTIALS_LOCAL_CACHE_TTL)
+    _local_credentials_cache.set(str(bucket_id), cred_obj, time.time() + local_timeout)
+
+
+async def aset_cached_bucket_credentials(cred_obj: BucketCredentials):
+    timeout = get_credentials_cache_timeout(cred_obj)
+    if timeout <= 0:
+        return
+    bucket_id = cred_obj.bucket_id
+    cache_key = DJANGO_R2_CREDENTIALS_CACHE_FORMAT.format(bucket_id=bucket_id)
+    await cache.aset(cache_key, cred_obj, timeout)
+    local_timeout = min(timeout, DJANGO_R2_CREDENTIALS_LOCAL_CACHE_TTL)
+    _local_credentials_cache.set(str(bucket_id), cred_obj, time.time() + local_timeout)
+
+
+def clear_cached_bucket_credentials(bucket_id: uuid.UUID | str):
+    """
+    Invalidation hook: drop cached credentials for a bucket
+    from this process and from the shared Django cache.
+    """
+    _local_credentials_cache.delete(str(bucket_id))
+    cache.delete(DJANGO_R2_CREDENTIALS_CACHE_FORMAT.format(bucket_id=bucket_id))
+
+
+def request_temporary_credentials(
+    bucket_name: str,
+    account_id: Optional[str] = CLOUDFLARE_ACCOUNT_ID,
+    parent_access_key_id: Optional[str] = CLOUDFLARE_BUCKET_MANAGER_ACCESS_KEY,
+    ttl_seconds: int = 60 * 60,
+    permission: str = BucketCredentials.Permission.READ_WRITE,
+):
     cloudflare_client = get_cloudflare_client()
-    request_data = {
-        "bucket": bucket.name,
-        "account_id": cred_obj.account_id,
-        "parent_access_key_id": cred_obj.parent_access_key_id,
-        "ttl_seconds": cred_obj.ttl_seconds,
-        "permission": cred_obj.permission,
-    }
-    cred_response = cloudflare_client.r2.temporary_credentials.create(**request_data)
+    with metrics.timed(
+        "cloudflare_request",
+        operation="r2.temporary_credentials.create",
+        **metrics.bucket_label(bucket_name),
+    ):
+        return cloudflare_client.r2.temporary_credentials.create(
+            bucket=bucket_name,
+            account_id=account_id,
+            parent_access_key_id=parent_access_key_id,
+            ttl_seconds=ttl_seconds,
+            permission=permission,
+        )
+
+
+async def arequest_temporary_credentials(
+    bucket_name: str,
+    account_id: Optional[str] = CLOUDFLARE_ACCOUNT_ID,
+    parent_access_key_id: Optional[str] = CLOUDFLARE_BUCKET_MANAGER_ACCESS_KEY,
+    ttl_seconds: int = 60 * 60,
+    permission: str = BucketCredentials.Permission.READ_WRITE,
+):
+    async with get_async_cloudflare_client() as cloudflare_client:
+        with metrics.timed(
+            "cloudflare_request",
+            operation="r2.temporary_credentials.create",
+            **metrics.bucket_label(bucket_name),
+        ):
+            return await cloudflare_client.r2.temporary_credentials.create(
+                bucket=bucket_name,
+                account_id=account_id,
+                parent_access_key_id=parent_access_key_id,
+                ttl_seconds=ttl_seconds,
+                permission=permission,
+            )
+
+
+def apply_temporary_credentials(cred_obj: BucketCredentials, cred_response):
     cred_obj.access_key_id = cred_response.access_key_id
     cred_obj.secret_access_key = cred_response.secret_access_key
     cred_obj.session_token = cred_response.session_token
+    cred_obj.created_at = timezone.now()
+    cred_obj.expires_at = cred_obj.created_at + timedelta(seconds=cred_obj.ttl_seconds)
+
+
+def create_bucket_credentials(bucket: Bucket) -> BucketCredentials:
+    # One credentials row per bucket; refresh it in place once expired.
+    cred_obj, _ = BucketCredentials.objects.get_or_create(bucket=bucket)
+    cred_response = request_temporary_credentials(
+        bucket.name,
+        account_id=cred_obj.account_id,
+        parent_access_key_id=cred_obj.parent_access_key_id,
+        ttl_seconds=cred_obj.ttl_seconds,
+        permission=cred_obj.permission,
+    )
+    apply_temporary_credentials(cred_obj, cred_response)
     cred_obj.save()
     return cred_obj
+
+
+async def acreate_bucket_credentials(bucket: Bucket) -> BucketCredentials:
+    cred_obj, _ = await BucketCredentials.objects.aget_or_create(bucket=bucket)
+    # Presigning reads `cred_obj.bucket.name`; no lazy query in async code
+    cred_obj.bucket = bucket
+    cred_response = await arequest_temporary_credentials(
+        bucket.name,
+        account_id=cred_obj.account_id,
+        parent_access_key_id=cred_obj.parent_access_key_id,
+        ttl_seconds=cred_obj.ttl_seconds,
+        permission=cred_obj.permission,
+    )
+    apply_temporary_credentials(cred_obj, cred_response)
+    await cred_obj.asave()
+    return cred_obj
+
+
+def get_credentials_bucket_label(cred_obj: BucketCredentials) -> dict:
+    # The R2 bucket name, as in `s3_request`; never a query just for a label
+    if not BucketCredentials.bucket.is_cached(cred_obj):
+        return {}
+    return metrics.bucket_label(cred_obj.bucket.name)
+
+
+def get_today_bucket_credentials_by_bucket_id(bucket_id: uuid.UUID | str):
+    # `source`: where the credentials came from (cache, db or cloudflare)
+    with metrics.timed("credentials_lookup") as labels:
+        labels["source"] = "cache"
+        cred_obj = get_cached_bucket_credentials(bucket_id)
+        if cred_obj is not None:
+            labels.update(get_credentials_bucket_label(cred_obj))
+            return cred_obj
+        labels["source"] = "db"
+        usable_after = timezone.now() + timedelta(
+            seconds=DJANGO_R2_CREDENTIALS_CACHE_MARGIN
+        )
+        cred_obj = (
+            BucketCredentials.objects.select_related("bucket")
+            .filter(bucket_id=bucket_id, expires_at__gte=usable_after)
+            .first()
+        )
+        if cred_obj is None:
+            labels["source"] = "cloudflare"
+            bucket = Bucket.objects.get(id=bucket_id)
+            cred_obj = create_bucket_credentials(bucket)
+        set_cached_bucket_credentials(cred_obj)
+        labels.update(get_credentials_bucket_label(cred_obj))
+        return cred_obj
+
+
+async def aget_today_bucket_credentials_by_bucket_id(bucket_id: uuid.UUID | str):
+    with metrics.timed("credentials_lookup") as labels:
+        labels["source"] = "cache"
+        cred_obj = await aget_cached_bucket_credentials(bucket_id)
+        if cred_obj is not None:
+            labels.update(get_credentials_bucket_label(cred_obj))
+            return cred_obj
+        labels["source"] = "db"
+        usable_after = timezone.now() + timedelta(
+            seconds=DJANGO_R2_CREDENTIALS_CACHE_MARGIN
+        )
+        cred_obj = (
+            await BucketCredentials.objects.select_related("bucket")
+            .filter(bucket_id=bucket_id, expires_at__gte=usable_after)
+            .afirst()
+        )
+        if cred_obj is None:
+            labels["source"] = "cloudflare"
+            bucket = await Bucket.objects.aget(id=bucket_id)
+            cred_obj = await acreate_bucket_credentials(bucket)
+        await aset_cached_bucket_credentials(cred_obj)
+        labels.update(get_credentials_bucket_label(cred_obj))
+        return cred_obj
+
+
+def get_bucket_name_s3_client(bucket_name: str, ttl_seconds: int = 60 * 60):
+    """
+    S3 client with short-lived credentials for a bucket that may no
+    longer have a `Bucket` row (e.g. while it is being deleted).
+    """
+    cred_response = request_temporary_credentials(bucket_name, ttl_seconds=ttl_seconds)
+    my_s3_client = myboto.client.MyS3Client(
+        bucket=bucket_name,
+        access_key_id=cred_response.access_key_id,
+        secret_access_key=cred_response.secret_access_key,
+        session_token=cred_response.session_token,
+        expires_at=timezone.now() + timedelta(seconds=ttl_seconds),
+    )
+    return my_s3_client.client
+
+
+def purge_bucket_objects(
+    bucket: Bucket,
+    prefix: str = "",
+    versions: bool = False,
+    dry_run: bool = False,
+    progress=empty.log_progress,
+) -> empty.PurgeStats:
+    """
+    Delete the bucket's keys under `prefix` from R2 and, batch by
+    batch, the matching `Object` rows.
+    """
+    cred_obj = get_today_bucket_credentials_by_bucket_id(bucket.id)
+    client = cred_obj.get_s3_client()
+
+    def on_batch(keys):
+        try:
+            objects_services.delete_objects_for_keys(bucket.id, keys)
+        finally:
+            # Runs on purge worker threads
+            close_old_connections()
+
+    return empty.purge_bucket(
+        bucket.name,
+        client,
+        prefix=prefix,
+        versions=versions,
+        dry_run=dry_run,
+        on_batch=on_batch,
+        progress=progress,
+    )
+
+
+def purge_and_delete_r2_bucket(bucket_name: str) -> bool:
+    """
+    Empty an R2 bucket, then delete it (R2 only deletes empty buckets).
+    """
+    if not bucket_name:
+        return False
+    client = get_bucket_name_s3_client(bucket_name)
+    stats = empty.purge_bucket(bucket_name, client)
+    if stats.failed:
+        logger.error("Not deleting %s: %s keys left", bucket_name, stats.failed)
+        return False
+    return delete_r2_bucket(bucket_name)
+
+
+def get_r2_bucket_name(bucket: Bucket) -> str:
+    # A hash of the bucket's UUID (which never changes): the first 16
+    # characters of the hex digest (64 bits)
+    hash_prefix = hashlib.sha256(str(bucket.id).encode("utf-8")).hexdigest()[:16]
+    bucket_prefix = "django_r2" if not django_settings.DEBUG else "django_r2_dev"
+    return f"{bucket_prefix}-{hash_prefix}"
+
+
+def provision_r2_bucket(bucket: Bucket) -> bool:
+    """
+    Create the bucket (and its CORS rules) in R2 and mark it active.
+    `bucket` is updated in place.
+    """
+    if bucket.active_in_cloudflare:
+        return True
+    bucket_name = get_r2_bucket_name(bucket)
+    cf_bucket_response = create_r2_bucket(bucket_name)
+    cors_response = update_r2_bucket_cors(bucket_name)
+    if cf_bucket_response is None or not cors_response:
+        return False
+    bucket.name = cf_bucket_response.name
+    bucket.active_in_cloudflare = True
+    bucket.active_in_cloudflare_at = timezone.now()
+    # update() rather than save() so post_save receivers don't run again
+    Bucket.objects.filter(id=bucket.id).update(
+        name=bucket.name,
+        active_in_cloudflare=bucket.active_in_cloudflare,
+        active_in_cloudflare_at=bucket.active_in_cloudflare_at,
+    )
+    clear_cached_bucket_credentials(bucket.id)
+    return True
@@ -62,3 +62,16 @@ def proxy_task(task_function=None, **decorator_kwargs):
     if task_function is None:
         return decorator
     return decorator(task_function)
+
+
+def enqueue_task(task, *args, **kwargs):
+    """
+    Run a `proxy_task` in the background through Celery or
+    django-qstash when the task was wrapped by either. Otherwise it
+    runs synchronously, like a `proxy_task` call: a background thread
+    would be killed with the process and leave the work half done.
+    """
+    delay = getattr(task, "delay", None)
+    if callable(delay):
+        return delay(*args, **kwargs)
+    return task(*args, **kwargs)
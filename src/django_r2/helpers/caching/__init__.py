@@ -0,0 +1,3 @@
+from .lru import ExpiringLRUCache
+
+__all__ = ["ExpiringLRUCache"]
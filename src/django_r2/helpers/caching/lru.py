@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class ExpiringLRUCache:
+    """
+    A small thread-safe, in-process LRU cache where every entry
+    carries its own expiry (a `time.time()` timestamp).
+
+    Expired entries are dropped on read and when the cache is full.
+    `on_evict(key, value)` is called for every entry that leaves
+    the cache, whether it expired, was pushed out, or was deleted.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        evicted = None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                evicted = (key, value)
+            else:
+                self._data.move_to_end(key)
+        if evicted is not None:
+            self._evicted(*evicted)
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        evicted = []
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None and previous[0] is not value:
+                evicted.append((key, previous[0]))
+            self._data[key] = (value, expires_at)
+            if len(self._data) > self.maxsize:
+                evicted.extend(self._prune())
+        for item in evicted:
+            self._evicted(*item)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is not None:
+            self._evicted(key, entry[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            items = [(key, entry[0]) for key, entry in self._data.items()]
+            self._data.clear()
+        for item in items:
+            self._evicted(*item)
+
+    def _prune(self) -> list:
+        # Called with the lock held: drop expired entries first,
+        # then the least recently used ones.
+        now = time.time()
+        evicted = []
+        for key, (value, expires_at) in list(self._data.items()):
+            if expires_at <= now:
+                del self._data[key]
+                evicted.append((key, value))
+        while len(self._data) > self.maxsize:
+            key, (value, _) = self._data.popitem(last=False)
+            evicted.append((key, value))
+        return evicted
+
+    def _evicted(self, key, value):
+        if self.on_evict is not None:
+            self.on_evict(key, value)
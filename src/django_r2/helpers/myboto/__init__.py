@@ -0,0 +1,3 @@
+from . import client, multipart, streaming
+
+__all__ = ["client", "multipart", "streaming"]
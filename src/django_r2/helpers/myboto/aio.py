@@ -0,0 +1,434 @@
+"""
+Async S3 client (needs the optional `aiobotocore` dependency,
+`pip install django-r2[async]`).
+
+`AsyncMyS3Client` mirrors `MyS3Client` for asyncio code so async
+views and jobs don't route every call through `sync_to_async`.
+aiobotocore clients (and their aiohttp connection pools) belong to
+one event loop, so they are pooled per loop and credential set, with
+the same credentials, endpoint and client settings as the sync
+registry. Every S3 request takes a slot of the pooled client's
+semaphore (`DJANGO_R2_ASYNC_S3_CONCURRENCY`) and a lease on it: a
+client whose credentials expire is dropped from the pool but only
+closed once its last lease is returned.
+
+Presigning does no I/O and reuses `MyS3Client`'s signer.
+"""
+
+import asyncio
+import inspect
+import time
+import weakref
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from typing import AsyncIterator, Iterable, Optional
+
+from botocore.exceptions import ClientError
+from django.core.exceptions import ImproperlyConfigured
+
+from django_r2 import metrics
+from django_r2 import settings as django_r2_settings
+from django_r2.helpers.myboto.client import MyS3Client, apply_settings_defaults
+from django_r2.helpers.myboto.empty import DELETE_BATCH_SIZE
+from django_r2.helpers.myboto.registry import (
+    get_client_config_kwargs,
+    get_client_expiry,
+    get_client_kwargs,
+)
+from django_r2.helpers.myboto.streaming import (
+    DJANGO_R2_STREAM_BUFFER_SIZE,
+    DJANGO_R2_STREAM_PART_SIZE,
+)
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+except ImportError:
+    AioConfig = get_session = None
+
+DJANGO_R2_ASYNC_S3_CONCURRENCY = getattr(
+    django_r2_settings, "DJANGO_R2_ASYNC_S3_CONCURRENCY", 64
+)
+
+
+@dataclass(eq=False)
+class PooledAsyncClient:
+    client: object
+    exit_stack: AsyncExitStack
+    semaphore: asyncio.Semaphore
+    expires: float
+    # Leases out (requests in flight, unclosed response bodies)
+    users: int = 0
+    retired: bool = False
+
+
+class LeasedBody:
+    """
+    A `get_object` response body that returns its client lease once
+    closed (or its `async with` block ends).
+    """
+
+    def __init__(self, body, release):
+        self._body = body
+        self._release = release
+
+    def __getattr__(self, name):
+        return getattr(self._body, name)
+
+    async def __aenter__(self):
+        await self._body.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        try:
+            return await self._body.__aexit__(*exc_info)
+        finally:
+            self._release_once()
+
+    def close(self):
+        try:
+            self._body.close()
+        finally:
+            self._release_once()
+
+    def _release_once(self):
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+class AsyncS3ClientRegistry:
+    """
+    One aiobotocore S3 client per (event loop, endpoint, access key,
+    session token), replaced once its credentials expire.
+    """
+
+    def __init__(self, concurrency: int = DJANGO_R2_ASYNC_S3_CONCURRENCY):
+        self.concurrency = concurrency
+        # loop -> (lock, {key: PooledAsyncClient}, {retired clients still
+        # leased out}); dropped with the loop
+        self._loops = weakref.WeakKeyDictionary()
+        # Closes scheduled by `release()`, referenced until they finish
+        self._closing = set()
+
+    def _get_loop_state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = (asyncio.Lock(), {}, set())
+        return state
+
+    def release(self, pooled: PooledAsyncClient):
+        """
+        Return a lease; the last one on a retired client closes it.
+        """
+        pooled.users -= 1
+        if pooled.retired and not pooled.users:
+            _, _, retired = self._get_loop_state()
+            retired.discard(pooled)
+            task = asyncio.ensure_future(pooled.exit_stack.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def get_client(
+        self,
+        access_key_id: Optional[str],
+        secret_access_key: Optional[str],
+        session_token: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = "auto",
+        expires_at: Optional[datetime] = None,
+    ) -> PooledAsyncClient:
+        if get_session is None:
+            raise ImproperlyConfigured(
+                "AsyncMyS3Client requires aiobotocore: pip install django-r2[async]"
+            )
+        lock, clients, retired = self._get_loop_state()
+        key = (endpoint_url, region_name, access_key_id, session_token)
+        pooled = clients.get(key)
+        if pooled is not None and pooled.expires > time.time():
+            return pooled
+        async with lock:
+            now = time.time()
+            pooled = clients.get(key)
+            if pooled is not None and pooled.expires > now:
+                return pooled
+            # Drop clients whose credentials have expired; ones still
+            # leased out are closed by their last `release()`
+            for expired_key, expired in list(clients.items()):
+                if expired.expires <= now:
+                    del clients[expired_key]
+                    expired.retired = True
+                    if expired.users:
+                        retired.add(expired)
+                    else:
+                        await expired.exit_stack.aclose()
+            exit_stack = AsyncExitStack()
+            client = await exit_stack.enter_async_context(
+                get_session().create_client(
+                    "s3",
+                    config=AioConfig(**get_client_config_kwargs()),
+                    **get_client_kwargs(
+                        access_key_id,
+                        secret_access_key,
+                        session_token=session_token,
+                        endpoint_url=endpoint_url,
+                        region_name=region_name,
+                    ),
+                )
+            )
+            if metrics.DJANGO_R2_METRICS:
+                from django_r2.metrics.boto import instrument_s3_client
+
+                instrument_s3_client(client)
+            pooled = PooledAsyncClient(
+                client=client,
+                exit_stack=exit_stack,
+                semaphore=asyncio.Semaphore(self.concurrency),
+                expires=get_client_expiry(expires_at),
+            )
+            clients[key] = pooled
+        return pooled
+
+    async def aclose(self):
+        """
+        Close the running loop's clients (e.g. on ASGI shutdown),
+        leased or not.
+        """
+        lock, clients, retired = self._get_loop_state()
+        async with lock:
+            for pooled in [*clients.values(), *retired]:
+                await pooled.exit_stack.aclose()
+            clients.clear()
+            retired.clear()
+
+
+registry = AsyncS3ClientRegistry()
+
+
+@dataclass
+class AsyncMyS3Client:
+    bucket: str = None
+    access_key_id: str = None
+    secret_access_key: str = None
+    session_token: str = None
+    region_name: str = "auto"
+    endpoint_url: str = None
+    expires_at: Optional[datetime] = None
+
+    def __post_init__(self):
+        apply_settings_defaults(self)
+
+    async def get_client(self) -> PooledAsyncClient:
+        """
+        The pooled client, without a lease: it may be closed once its
+        credentials expire, so requests go through `lease()`.
+        """
+        return await registry.get_client(
+            self.access_key_id,
+            self.secret_access_key,
+            session_token=self.session_token,
+            endpoint_url=self.endpoint_url,
+            region_name=self.region_name,
+            expires_at=self.expires_at,
+        )
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[PooledAsyncClient]:
+        """
+        The pooled client, kept open until the block ends.
+        """
+        pooled = await self.get_client()
+        pooled.users += 1
+        try:
+            yield pooled
+        finally:
+            registry.release(pooled)
+
+    async def _call(self, operation: str, **params):
+        async with self.lease() as pooled, pooled.semaphore:
+            method = getattr(pooled.client, operation)
+            return await method(Bucket=self.bucket, **params)
+
+    @cached_property
+    def sync_client(self) -> MyS3Client:
+        return MyS3Client(
+            bucket=self.bucket,
+            access_key_id=self.access_key_id,
+            secret_access_key=self.secret_access_key,
+            session_token=self.session_token,
+            region_name=self.region_name,
+            endpoint_url=self.endpoint_url,
+            expires_at=self.expires_at,
+        )
+
+    def get_presigned_upload_url(self, key, expires_in=3600):
+        return self.sync_client.get_presigned_upload_url(key, expires_in=expires_in)
+
+    def get_presigned_upload_urls(self, keys: Iterable[str], expires_in=3600):
+        return self.sync_client.get_presigned_upload_urls(keys, expires_in=expires_in)
+
+    def get_presigned_download_url(self, key: str, filename=None, **options):
+        return self.sync_client.get_presigned_download_url(key, filename, **options)
+
+    def get_presigned_download_urls(self, items, **options):
+        return self.sync_client.get_presigned_download_urls(items, **options)
+
+    async def head_object(self, key: str) -> Optional[dict]:
+        """
+        The `head_object` response, or None if `key` doesn't exist.
+        """
+        try:
+            return await self._call("head_object", Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    async def get_object(self, key: str, range: Optional[str] = None, **params):
+        """
+        The raw `get_object` response; read (and close) its `Body`,
+        which keeps the client open until then.
+        """
+        if range:
+            params["Range"] = range
+        pooled = await self.get_client()
+        pooled.users += 1
+        try:
+            async with pooled.semaphore:
+                response = await pooled.client.get_object(
+                    Bucket=self.bucket, Key=key, **params
+                )
+        except BaseException:
+            registry.release(pooled)
+            raise
+        response["Body"] = LeasedBody(
+            response["Body"], lambda: registry.release(pooled)
+        )
+        return response
+
+    async def get_object_range(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> bytes:
+        """
+        Bytes `start` to `end` (inclusive; to the end of the object
+        when omitted).
+        """
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        async with self.lease() as pooled, pooled.semaphore:
+            response = await pooled.client.get_object(
+                Bucket=self.bucket, Key=key, Range=byte_range
+            )
+            async with response["Body"] as body:
+                return await body.read()
+
+    async def list_objects(self, prefix: str = "") -> AsyncIterator[dict]:
+        """
+        Yield every `Contents` entry under `prefix`.
+        """
+        params = {"Prefix": prefix}
+        while True:
+            page = await self._call("list_objects_v2", **params)
+            for entry in page.get("Contents", []):
+                yield entry
+            if not page.get("IsTruncated"):
+                return
+            params["ContinuationToken"] = page["NextContinuationToken"]
+
+    async def delete_object(self, key: str):
+        return await self._call("delete_object", Key=key)
+
+    async def delete_objects(self, keys: Iterable[str]) -> list[dict]:
+        """
+        Delete `keys` in concurrent batches of `DELETE_BATCH_SIZE`.
+        Returns the per-key errors S3 reported.
+        """
+        keys = [str(key) for key in keys]
+        batches = [
+            keys[start : start + DELETE_BATCH_SIZE]
+            for start in range(0, len(keys), DELETE_BATCH_SIZE)
+        ]
+        responses = await asyncio.gather(
+            *(
+                self._call(
+                    "delete_objects",
+                    Delete={
+                        "Objects": [{"Key": key} for key in batch],
+                        "Quiet": True,
+                    },
+                )
+                for batch in batches
+            )
+        )
+        return [error for response in responses for error in response.get("Errors", [])]
+
+    async def upload_fileobj(
+        self,
+        data,
+        key: str,
+        content_type: Optional[str] = None,
+        part_size: int = DJANGO_R2_STREAM_PART_SIZE,
+        buffer_size: int = DJANGO_R2_STREAM_BUFFER_SIZE,
+    ) -> Optional[str]:
+        """
+        Upload a file-like object (sync or async `read`), with
+        `put_object` when it fits in one part and a concurrent
+        multipart upload otherwise. Returns the ETag.
+        """
+        if inspect.iscoroutinefunction(data.read):
+            read = data.read
+        else:
+
+            async def read(size):
+                return await asyncio.to_thread(data.read, size)
+
+        extra = {"ContentType": content_type} if content_type else {}
+        first = await read(part_size)
+        second = await read(part_size)
+        if not second:
+            response = await self._call("put_object", Key=key, Body=first, **extra)
+            return response.get("ETag")
+
+        upload = await self._call("create_multipart_upload", Key=key, **extra)
+        upload_id = upload["UploadId"]
+        # Parts held in memory at once, like `stream_to_s3`
+        in_flight = asyncio.Semaphore(max(1, buffer_size // part_size - 1))
+
+        async def upload_part(part_number: int, body: bytes) -> dict:
+            try:
+                response = await self._call(
+                    "upload_part",
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+                return {"PartNumber": part_number, "ETag": response["ETag"]}
+            finally:
+                in_flight.release()
+
+        tasks = []
+        try:
+            part_number, body = 1, first
+            while body:
+                await in_flight.acquire()
+                tasks.append(asyncio.ensure_future(upload_part(part_number, body)))
+                part_number += 1
+                body, second = second, None
+                if body is None:
+                    body = await read(part_size)
+            parts = await asyncio.gather(*tasks)
+            response = await self._call(
+                "complete_multipart_upload",
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await self._call("abort_multipart_upload", Key=key, UploadId=upload_id)
+            raise
+        return response.get("ETag")
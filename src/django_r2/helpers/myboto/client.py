@@ -1,47 +1,101 @@
 import logging
 from dataclasses import dataclass
-from functools import lru_cache
+from datetime import datetime
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 from urllib.parse import quote
 
-import boto3
-import helpers
-from botocore.config import Config
 from django.conf import settings
 
-from django_r2.helpers.formatting import create_s3_filename
+from django_r2 import settings as django_r2_settings
+from django_r2.helpers.formatting.filenames import create_s3_filename
+from django_r2.helpers.myboto.presign import SigV4Presigner
+from django_r2.helpers.myboto.registry import get_pooled_s3_client
+from django_r2.helpers.myboto.streaming import StreamUploadResult, stream_to_s3
+
+DJANGO_R2_FAST_PRESIGN = getattr(django_r2_settings, "DJANGO_R2_FAST_PRESIGN", True)
 
 logger = logging.getLogger(__name__)
 
 
+def get_content_disposition(
+    filename: Optional[str] = None, force_download: bool = False
+) -> Optional[str]:
+    if filename:
+        # create a URL-safe file name from the input string (if any)
+        filename = create_s3_filename(filename, object_id=None)
+        encoded_filename = quote(filename)
+        disposition = "attachment" if force_download else "inline"
+        return f"{disposition}; filename*=UTF-8''{encoded_filename}"
+    if force_download:
+        return "attachment"
+    return None
+
+
+# Field -> Django setting used when the field isn't passed. Read on
+# instantiation rather than at import so settings may change (e.g.
+# in tests) and importing this module stays cheap.
+SETTINGS_DEFAULTS = {
+    "bucket": "AWS_STORAGE_BUCKET_NAME",
+    "access_key_id": "AWS_ACCESS_KEY_ID",
+    "secret_access_key": "AWS_SECRET_ACCESS_KEY",
+    "endpoint_url": "AWS_S3_ENDPOINT_URL",
+}
+
+
+def apply_settings_defaults(instance):
+    for field_name, setting_name in SETTINGS_DEFAULTS.items():
+        if getattr(instance, field_name) is None:
+            setattr(instance, field_name, getattr(settings, setting_name, None))
+
+
 @dataclass
 class MyS3Client:
-    bucket: str = getattr(settings, "AWS_STORAGE_BUCKET_NAME", None)
-    access_key_id: str = getattr(settings, "AWS_ACCESS_KEY_ID", None)
-    secret_access_key: str = getattr(settings, "AWS_SECRET_ACCESS_KEY", None)
+    bucket: str = None
+    access_key_id: str = None
+    secret_access_key: str = None
     session_token: str = None
     region_name: str = "auto"
-    endpoint_url: str = getattr(settings, "AWS_S3_ENDPOINT_URL", None)
+    endpoint_url: str = None
+    expires_at: Optional[datetime] = None
 
     def __post_init__(self):
+        apply_settings_defaults(self)
         if not all([self.access_key_id, self.secret_access_key, self.region_name]):
-            USE_AWS_S3 = helpers.config("USE_AWS_S3", default=False)
+            USE_AWS_S3 = getattr(settings, "USE_AWS_S3", False)
             if USE_AWS_S3:
                 logger.warning("AWS credentials are not set")
-                return boto3.resource("s3")
-        config = Config(signature_version="s3v4", retries={"max_attempts": 3})
-        kwargs = {
-            "aws_access_key_id": self.access_key_id,
-            "aws_secret_access_key": self.secret_access_key,
-            "region_name": self.region_name,
-            "config": config,
-        }
-        if self.endpoint_url:
-            kwargs["endpoint_url"] = self.endpoint_url
-        if self.session_token:
-            kwargs["aws_session_token"] = self.session_token
-        self.client = boto3.client("s3", **kwargs)
+                return
+        # Clients are shared across MyS3Client instances (and threads)
+        # so the HTTP connection pool survives between calls.
+        self.client = get_pooled_s3_client(
+            self.access_key_id,
+            self.secret_access_key,
+            session_token=self.session_token,
+            endpoint_url=self.endpoint_url,
+            region_name=self.region_name,
+            expires_at=self.expires_at,
+        )
+
+    @cached_property
+    def presigner(self) -> Optional[SigV4Presigner]:
+        """
+        Fast path for presigned URLs. Only used for custom
+        (path-style) endpoints such as R2; AWS endpoints fall
+        back to botocore's own presigning.
+        """
+        if not DJANGO_R2_FAST_PRESIGN or not self.endpoint_url:
+            return None
+        if not all([self.access_key_id, self.secret_access_key]):
+            return None
+        return SigV4Presigner(
+            self.endpoint_url,
+            self.access_key_id,
+            self.secret_access_key,
+            session_token=self.session_token,
+            region_name=self.region_name,
+        )
 
     def upload_fileobj(self, data, key):
         boto_s3_client = self.client
@@ -51,11 +105,106 @@ class MyS3Client:
             key,
         )
 
+    def upload_stream(
+        self,
+        chunks,
+        key,
+        content_type: Optional[str] = None,
+        content_length: Optional[int] = None,
+        **options,
+    ) -> StreamUploadResult:
+        """
+        Upload an iterable of byte chunks without buffering
+        the whole body (see `myboto.streaming.stream_to_s3`
+        for `options`).
+        """
+        return stream_to_s3(
+            self.client,
+            self.bucket,
+            key,
+            chunks,
+            content_type=content_type,
+            content_length=content_length,
+            **options,
+        )
+
     def get_presigned_upload_url(self, key, expires_in=3600):
-        return self.client.generate_presigned_url(
-            "put_object",
-            Params={"Bucket": self.bucket, "Key": key},
-            ExpiresIn=expires_in,
+        return self.get_presigned_upload_urls([key], expires_in=expires_in)[0]
+
+    def get_presigned_upload_urls(
+        self, keys: Iterable[str], expires_in=3600
+    ) -> list[str]:
+        keys = [str(key) for key in keys]
+        if self.presigner is not None:
+            return self.presigner.presign_many(
+                "PUT", self.bucket, keys, expires_in=expires_in
+            )
+        return [
+            self.client.generate_presigned_url(
+                "put_object",
+                Params={"Bucket": self.bucket, "Key": key},
+                ExpiresIn=expires_in,
+            )
+            for key in keys
+        ]
+
+    def create_multipart_upload(self, key, content_type: Optional[str] = None):
+        params = {"Bucket": self.bucket, "Key": key}
+        if content_type:
+            params["ContentType"] = content_type
+        response = self.client.create_multipart_upload(**params)
+        return response["UploadId"]
+
+    def get_presigned_upload_part_urls(
+        self, key, upload_id: str, part_count: int, expires_in=3600
+    ) -> list[dict]:
+        if self.presigner is not None:
+            urls = self.presigner.presign_each(
+                "PUT",
+                self.bucket,
+                (
+                    (key, [("uploadId", upload_id), ("partNumber", part_number)])
+                    for part_number in range(1, part_count + 1)
+                ),
+                expires_in=expires_in,
+            )
+            return [
+                {"part_number": part_number, "url": url}
+                for part_number, url in enumerate(urls, start=1)
+            ]
+        parts = []
+        for part_number in range(1, part_count + 1):
+            url = self.client.generate_presigned_url(
+                "upload_part",
+                Params={
+                    "Bucket": self.bucket,
+                    "Key": key,
+                    "UploadId": upload_id,
+                    "PartNumber": part_number,
+                },
+                ExpiresIn=expires_in,
+            )
+            parts.append({"part_number": part_number, "url": url})
+        return parts
+
+    def complete_multipart_upload(self, key, upload_id: str, parts: list[dict]):
+        """
+        `parts` is a list of {"PartNumber": int, "ETag": str}
+        as reported by each successful part upload.
+        """
+        parts = sorted(parts, key=lambda part: part["PartNumber"])
+        return self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    def abort_multipart_upload(self, key, upload_id: str):
+        return self.client.abort_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
         )
 
     def get_presigned_download_url(
@@ -64,59 +213,91 @@ class MyS3Client:
         filename: Optional[str] = None,
         expires_in=3600,
         force_download: bool = False,
+        signing_time: Optional[datetime] = None,
     ):
-        client = self.client
-        if isinstance(key, Path):
-            key = str(key)
-
-        params = {
-            "Bucket": self.bucket,
-            "Key": key,
-        }
-
-        if filename:
-            # create a URL-safe file name from the input string (if any)
-            filename = create_s3_filename(filename, object_id=None)
-            encoded_filename = quote(filename)
-            disposition = "attachment" if force_download else "inline"
-            params["ResponseContentDisposition"] = (
-                f"{disposition}; filename*=UTF-8''{encoded_filename}"
+        return self.get_presigned_download_urls(
+            [(key, filename)],
+            expires_in=expires_in,
+            force_download=force_download,
+            signing_time=signing_time,
+        )[0]
+
+    def get_presigned_download_urls(
+        self,
+        items: Iterable[tuple[str, Optional[str]]],
+        expires_in=3600,
+        force_download: bool = False,
+        signing_time: Optional[datetime] = None,
+    ) -> list[str]:
+        """
+        Presign downloads for many `(key, filename)` pairs at once.
+
+        `signing_time` (fast presigner only; botocore always signs
+        with the current time) makes the URLs reproducible.
+        """
+        requests = []
+        for key, filename in items:
+            if isinstance(key, Path):
+                key = str(key)
+            requests.append((key, get_content_disposition(filename, force_download)))
+
+        if self.presigner is not None:
+            return self.presigner.presign_each(
+                "GET",
+                self.bucket,
+                (
+                    (
+                        (key, [("response-content-disposition", disposition)])
+                        if disposition
+                        else (key, None)
+                    )
+                    for key, disposition in requests
+                ),
+                expires_in=expires_in,
+                signing_time=signing_time,
             )
-        elif force_download:
-            params["ResponseContentDisposition"] = "attachment"
-        presigned_url = client.generate_presigned_url(
-            "get_object",
-            Params=params,
-            ExpiresIn=expires_in,
-        )
-        return presigned_url
+
+        urls = []
+        for key, disposition in requests:
+            params = {
+                "Bucket": self.bucket,
+                "Key": key,
+            }
+            if disposition:
+                params["ResponseContentDisposition"] = disposition
+            urls.append(
+                self.client.generate_presigned_url(
+                    "get_object",
+                    Params=params,
+                    ExpiresIn=expires_in,
+                )
+            )
+        return urls
 
 
 def get_s3_temp_client(access_key_id=None, secret_access_key=None, session_token=None):
     AWS_S3_ENDPOINT_URL = getattr(settings, "AWS_S3_ENDPOINT_URL", None)
-    config = Config(signature_version="s3v4", retries={"max_attempts": 3})
-    kwargs = {
-        "aws_access_key_id": access_key_id,
-        "aws_secret_access_key": secret_access_key,
-        "region_name": "auto",
-        "config": config,
-    }
-    if AWS_S3_ENDPOINT_URL:
-        kwargs["endpoint_url"] = AWS_S3_ENDPOINT_URL
-    if session_token:
-        kwargs["aws_session_token"] = session_token
-    return boto3.client("s3", **kwargs)
+    return get_pooled_s3_client(
+        access_key_id,
+        secret_access_key,
+        session_token=session_token,
+        endpoint_url=AWS_S3_ENDPOINT_URL,
+        region_name="auto",
+    )
 
 
 @lru_cache
 def get_s3_client():
+    import boto3
+    from botocore.config import Config
+
     AWS_ACCESS_KEY_ID = getattr(settings, "AWS_ACCESS_KEY_ID", None)
     AWS_SECRET_ACCESS_KEY = getattr(settings, "AWS_SECRET_ACCESS_KEY", None)
     AWS_S3_REGION_NAME = getattr(settings, "AWS_S3_REGION_NAME", None)
     AWS_S3_ENDPOINT_URL = getattr(settings, "AWS_S3_ENDPOINT_URL", None)
 
     if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_S3_REGION_NAME]):
-        USE_AWS_S3 = helpers.config("USE_AWS_S3", default=False)
+        USE_AWS_S3 = getattr(settings, "USE_AWS_S3", False)
         if USE_AWS_S3:
             logger.warning("AWS credentials are not set")
             return boto3.resource("s3")
@@ -137,12 +318,14 @@ def get_s3_client():
 
 @lru_cache
 def get_s3_resource():
+    import boto3
+
     AWS_ACCESS_KEY_ID = getattr(settings, "AWS_ACCESS_KEY_ID", None)
     AWS_SECRET_ACCESS_KEY = getattr(settings, "AWS_SECRET_ACCESS_KEY", None)
     AWS_S3_REGION_NAME = getattr(settings, "AWS_S3_REGION_NAME", None)
     AWS_S3_ENDPOINT_URL = getattr(settings, "AWS_S3_ENDPOINT_URL", None)
     if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_S3_REGION_NAME]):
-        USE_AWS_S3 = helpers.config("USE_AWS_S3", default=False)
+        USE_AWS_S3 = getattr(settings, "USE_AWS_S3", False)
         if USE_AWS_S3:
             logger.warning("AWS credentials are not set")
             return boto3.resource("s3")
@@ -156,5 +339,11 @@ def get_s3_resource():
     return boto3.resource("s3", **kwargs)
 
 
-s3_client = get_s3_client()
-s3_resource = get_s3_resource()
+def __getattr__(name):
+    # `s3_client` / `s3_resource` used to be built at import time;
+    # they are now created on first access.
+    if name == "s3_client":
+        return get_s3_client()
+    if name == "s3_resource":
+        return get_s3_resource()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,153 @@
+"""
+Bulk deletion of a bucket's contents.
+
+`purge_bucket` pages through the bucket with `list_objects_v2` (or
+`list_object_versions`) and deletes each page of up to 1,000 keys
+with a single `delete_objects` call, spread across a worker pool.
+Listing stays at most a few pages ahead of the deletes.
+"""
+
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
 
 from django.conf import settings
 
+from django_r2 import settings as django_r2_settings
+
 from . import client as myboto_client
 
+DJANGO_R2_PURGE_WORKERS = getattr(django_r2_settings, "DJANGO_R2_PURGE_WORKERS", 8)
+
+# S3 (and R2) accept at most 1,000 keys per DeleteObjects request
+DELETE_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PurgeStats:
+    listed: int = 0
+    deleted: int = 0
+    failed: int = 0
+    batches: int = 0
+    dry_run: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, deleted: int = 0, failed: int = 0):
+        with self._lock:
+            self.deleted += deleted
+            self.failed += failed
+            self.batches += 1
+
+    def as_dict(self) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "listed": self.listed,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "batches": self.batches,
+            "dry_run": self.dry_run,
+            "seconds": round(elapsed, 3),
+            "keys_per_second": int(self.deleted / elapsed) if elapsed else 0,
+        }
+
+
+def iter_delete_batches(client, bucket: str, prefix: str = "", versions=False):
+    """
+    Yield lists of `{"Key": ...}` (plus `"VersionId"` for versions)
+    of at most `DELETE_BATCH_SIZE` entries.
+    """
+    if versions:
+        paginator = client.get_paginator("list_object_versions")
+        for page in paginator.paginate(
+            Bucket=bucket,
+            Prefix=prefix,
+            PaginationConfig={"PageSize": DELETE_BATCH_SIZE},
+        ):
+            entries = [
+                {"Key": entry["Key"], "VersionId": entry["VersionId"]}
+                for entry in page.get("Versions", []) + page.get("DeleteMarkers", [])
+            ]
+            for start in range(0, len(entries), DELETE_BATCH_SIZE):
+                yield entries[start : start + DELETE_BATCH_SIZE]
+        return
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(
+        Bucket=bucket,
+        Prefix=prefix,
+        PaginationConfig={"PageSize": DELETE_BATCH_SIZE},
+    ):
+        entries = [{"Key": entry["Key"]} for entry in page.get("Contents", [])]
+        if entries:
+            yield entries
+
+
+def log_progress(stats: PurgeStats):
+    logger.info("Bucket purge progress: %s", stats.as_dict())
+
+
+def purge_bucket(
+    bucket: str,
+    client,
+    prefix: str = "",
+    versions: bool = False,
+    dry_run: bool = False,
+    max_workers: int = DJANGO_R2_PURGE_WORKERS,
+    on_batch: Optional[Callable[[list[str]], None]] = None,
+    progress: Optional[Callable[[PurgeStats], None]] = log_progress,
+) -> PurgeStats:
+    """
+    Delete every key under `prefix` in `bucket` with a boto3 S3 `client`.
+
+    `on_batch(keys)` is called with the keys of each successfully
+    deleted batch (e.g. to drop matching database rows) and
+    `progress(stats)` after each batch. With `dry_run`, keys are
+    listed and counted but nothing is deleted.
+    """
+    stats = PurgeStats(dry_run=dry_run)
+    # Keep listing at most a couple of pages ahead of the deletes
+    slots = threading.BoundedSemaphore(max_workers * 2)
+
+    def delete_batch(entries: list[dict]):
+        try:
+            response = client.delete_objects(
+                Bucket=bucket, Delete={"Objects": entries, "Quiet": True}
+            )
+            errors = response.get("Errors", [])
+            for error in errors[:5]:
+                logger.warning(
+                    "Could not delete %s: %s", error.get("Key"), error.get("Message")
+                )
+            failed_keys = {error.get("Key") for error in errors}
+            deleted = [e["Key"] for e in entries if e["Key"] not in failed_keys]
+            stats.add(deleted=len(deleted), failed=len(errors))
+            if on_batch is not None and deleted:
+                on_batch(deleted)
+        except Exception as e:
+            logger.error("Error deleting a batch of %s keys: %s", len(entries), e)
+            stats.add(failed=len(entries))
+        finally:
+            slots.release()
+            if progress is not None:
+                progress(stats)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for entries in iter_delete_batches(client, bucket, prefix, versions):
+            stats.listed += len(entries)
+            if dry_run:
+                stats.batches += 1
+                continue
+            slots.acquire()
+            executor.submit(delete_batch, entries)
+    if dry_run and progress is not None:
+        progress(stats)
+    return stats
+
 
 def empty_bucket(bucket=None, s3_client=None, verbose=False, versions=False):
     logging.warning("This is dangerous, you have 10 seconds to reconsider.")
@@ -13,36 +156,13 @@ def empty_bucket(bucket=None, s3_client=None, verbose=False, versions=False):
     time.sleep(10)
     if s3_client is None:
         s3_client = myboto_client.s3_client
+    # Accept a boto3 resource as well as a client
+    s3_client = getattr(getattr(s3_client, "meta", None), "client", s3_client)
     if bucket is None:
         bucket = settings.AWS_STORAGE_BUCKET_NAME
-    bucket = s3_client.Bucket(bucket)
-    # Get the list of all objects in the bucket and delete each one
-
+    progress = log_progress if verbose else None
     if versions:
-        try:
-            versioned_bucket = s3_client.BucketVersioning(bucket)
-            if versioned_bucket.status == "Enabled":
-                versions = s3_client.Bucket(bucket).object_versions.all()
-                for version in versions:
-                    if verbose:
-                        logging.info(
-                            f"Deleting {version.object_key} "
-                            f"version {version.version_id}"
-                        )
-                    version.delete()
-                    if verbose:
-                        logging.info(
-                            f"{version.object_key} "
-                            f"version {version.version_id} deleted"
-                        )
-        except Exception as e:
-            logging.error(f"Error in deleting object versions: {e}")
-
-    for obj in bucket.objects.all():
-        if verbose:
-            logging.info(f"Deleting {obj.key}")
-        obj.delete()
-        if verbose:
-            logging.info(f"{obj.key} deleted")
-
+        purge_bucket(bucket, s3_client, versions=True, progress=progress)
+    stats = purge_bucket(bucket, s3_client, progress=progress)
     logging.info("All objects in the bucket have been deleted.")
+    return stats
@@ -0,0 +1,23 @@
+import math
+
+# S3 (and R2) multipart limits
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PART_COUNT = 10_000
+
+
+def plan_multipart_upload(file_size: int, part_size: int) -> tuple[int, int]:
+    """
+    Return `(part_size, part_count)` for a file of `file_size` bytes.
+
+    R2 requires every part except the last to be the same size, so
+    the preferred `part_size` is grown (in whole MiB) until the file
+    fits in at most 10,000 parts.
+    """
+    if file_size < 0:
+        raise ValueError("file_size must be positive")
+    part_size = max(part_size, MIN_PART_SIZE)
+    if math.ceil(file_size / part_size) > MAX_PART_COUNT:
+        mib = 1024 * 1024
+        part_size = math.ceil(file_size / MAX_PART_COUNT / mib) * mib
+    part_count = max(1, math.ceil(file_size / part_size))
+    return part_size, part_count
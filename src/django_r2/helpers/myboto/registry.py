@@ -0,0 +1,150 @@
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from django_r2 import metrics, settings
+from django_r2.helpers.caching import ExpiringLRUCache
+
+DJANGO_R2_S3_CLIENT_REGISTRY_SIZE = getattr(
+    settings, "DJANGO_R2_S3_CLIENT_REGISTRY_SIZE", 64
+)
+DJANGO_R2_S3_CLIENT_MAX_AGE = getattr(settings, "DJANGO_R2_S3_CLIENT_MAX_AGE", 60 * 60)
+DJANGO_R2_S3_MAX_POOL_CONNECTIONS = getattr(
+    settings, "DJANGO_R2_S3_MAX_POOL_CONNECTIONS", 50
+)
+DJANGO_R2_S3_CONNECT_TIMEOUT = getattr(settings, "DJANGO_R2_S3_CONNECT_TIMEOUT", 5)
+DJANGO_R2_S3_READ_TIMEOUT = getattr(settings, "DJANGO_R2_S3_READ_TIMEOUT", 60)
+DJANGO_R2_S3_TCP_KEEPALIVE = getattr(settings, "DJANGO_R2_S3_TCP_KEEPALIVE", True)
+
+
+def get_client_config_kwargs() -> dict:
+    return {
+        "signature_version": "s3v4",
+        "retries": {"max_attempts": 3},
+        "max_pool_connections": DJANGO_R2_S3_MAX_POOL_CONNECTIONS,
+        "connect_timeout": DJANGO_R2_S3_CONNECT_TIMEOUT,
+        "read_timeout": DJANGO_R2_S3_READ_TIMEOUT,
+        "tcp_keepalive": DJANGO_R2_S3_TCP_KEEPALIVE,
+    }
+
+
+def get_client_config():
+    from botocore.config import Config
+
+    return Config(**get_client_config_kwargs())
+
+
+def get_client_kwargs(
+    access_key_id: Optional[str],
+    secret_access_key: Optional[str],
+    session_token: Optional[str] = None,
+    endpoint_url: Optional[str] = None,
+    region_name: Optional[str] = "auto",
+) -> dict:
+    """
+    `create_client("s3", ...)` credentials and endpoint, shared by
+    the sync and async registries.
+    """
+    kwargs = {
+        "aws_access_key_id": access_key_id,
+        "aws_secret_access_key": secret_access_key,
+        "region_name": region_name,
+    }
+    if endpoint_url:
+        kwargs["endpoint_url"] = endpoint_url
+    if session_token:
+        kwargs["aws_session_token"] = session_token
+    return kwargs
+
+
+def get_client_expiry(expires_at: Optional[datetime] = None) -> float:
+    expires = time.time() + DJANGO_R2_S3_CLIENT_MAX_AGE
+    if expires_at is not None:
+        expires = min(expires, expires_at.timestamp())
+    return expires
+
+
+class S3ClientRegistry:
+    """
+    Reuses boto3 S3 clients (and their HTTP connection pools)
+    keyed by (endpoint, access key, session token).
+
+    boto3 clients are thread-safe once built, but building them
+    through a shared session is not, so creation is serialized
+    on a lock; lookups only take the LRU's short internal lock.
+    A client is dropped once its credentials expire, or after
+    `DJANGO_R2_S3_CLIENT_MAX_AGE` for long-lived credentials.
+    """
+
+    def __init__(self, maxsize: int = DJANGO_R2_S3_CLIENT_REGISTRY_SIZE):
+        self._clients = ExpiringLRUCache(maxsize=maxsize)
+        self._create_lock = threading.Lock()
+        self._session = None
+
+    def _get_session(self):
+        # Called with `_create_lock` held
+        if self._session is None:
+            # boto3 is imported on first use, not when django_r2 loads
+            import boto3
+
+            self._session = boto3.session.Session()
+        return self._session
+
+    def get_client(
+        self,
+        access_key_id: Optional[str],
+        secret_access_key: Optional[str],
+        session_token: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = "auto",
+        expires_at: Optional[datetime] = None,
+    ):
+        key = (endpoint_url, region_name, access_key_id, session_token)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._create_lock:
+            # Another thread may have built it while we waited
+            client = self._clients.get(key)
+            if client is not None:
+                return client
+            kwargs = get_client_kwargs(
+                access_key_id,
+                secret_access_key,
+                session_token=session_token,
+                endpoint_url=endpoint_url,
+                region_name=region_name,
+            )
+            kwargs["config"] = get_client_config()
+            client = self._get_session().client("s3", **kwargs)
+            if metrics.DJANGO_R2_METRICS:
+                from django_r2.metrics.boto import instrument_s3_client
+
+                instrument_s3_client(client)
+            self._clients.set(key, client, get_client_expiry(expires_at))
+        return client
+
+    def clear(self):
+        self._clients.clear()
+
+
+registry = S3ClientRegistry()
+
+
+def get_pooled_s3_client(
+    access_key_id: Optional[str],
+    secret_access_key: Optional[str],
+    session_token: Optional[str] = None,
+    endpoint_url: Optional[str] = None,
+    region_name: Optional[str] = "auto",
+    expires_at: Optional[datetime] = None,
+):
+    return registry.get_client(
+        access_key_id,
+        secret_access_key,
+        session_token=session_token,
+        endpoint_url=endpoint_url,
+        region_name=region_name,
+        expires_at=expires_at,
+    )
@@ -0,0 +1,179 @@
+"""
+Stream an iterable of byte chunks (e.g. an HTTP response body)
+into S3 without touching disk.
+
+Chunks are cut into parts as they arrive; each full part is handed
+to a small pool of `upload_part` workers while the caller keeps
+reading, so download and upload overlap. At most
+`buffer_size // part_size` parts are held in memory at once: when
+the workers fall behind, reading blocks. Size and SHA-256 are
+computed on the same pass.
+
+A stream that ends inside its first part is sent with a single
+`put_object` instead of a multipart upload.
+
+R2 needs every part but the last to be the same size, so the part
+size is fixed before the first byte is sent, and an upload holds at
+most `part_size * 10,000` bytes. Without a content length that is
+`DJANGO_R2_STREAM_MAX_SIZE` (by default 10,000 parts of
+`DJANGO_R2_STREAM_PART_SIZE`); a stream that turns out longer fails
+with a ValueError before its 10,001st part, and the upload is aborted.
+"""
+
+import hashlib
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import chain
+from typing import Iterable, Optional
+
+from django_r2 import settings
+from django_r2.helpers.myboto.multipart import MAX_PART_COUNT, plan_multipart_upload
+
+DJANGO_R2_STREAM_PART_SIZE = getattr(
+    settings, "DJANGO_R2_STREAM_PART_SIZE", 8 * 1024 * 1024
+)
+DJANGO_R2_STREAM_BUFFER_SIZE = getattr(
+    settings, "DJANGO_R2_STREAM_BUFFER_SIZE", 64 * 1024 * 1024
+)
+DJANGO_R2_STREAM_UPLOAD_WORKERS = getattr(
+    settings, "DJANGO_R2_STREAM_UPLOAD_WORKERS", 4
+)
+DJANGO_R2_STREAM_MAX_SIZE = getattr(settings, "DJANGO_R2_STREAM_MAX_SIZE", None)
+
+
+@dataclass
+class StreamUploadResult:
+    size: int
+    sha256: str
+    etag: Optional[str]
+    part_count: int
+
+
+def iter_parts(chunks: Iterable[bytes], part_size: int, hasher):
+    """
+    Re-cut `chunks` into `part_size` pieces (the last may be shorter),
+    feeding every byte to `hasher`. Yields `(part, size_so_far)`.
+    """
+    buffer = bytearray()
+    size = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        hasher.update(chunk)
+        size += len(chunk)
+        buffer += chunk
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size]), size
+            del buffer[:part_size]
+    if buffer or size == 0:
+        yield bytes(buffer), size
+
+
+def stream_to_s3(
+    client,
+    bucket: str,
+    key: str,
+    chunks: Iterable[bytes],
+    content_type: Optional[str] = None,
+    content_length: Optional[int] = None,
+    part_size: int = DJANGO_R2_STREAM_PART_SIZE,
+    buffer_size: int = DJANGO_R2_STREAM_BUFFER_SIZE,
+    max_workers: int = DJANGO_R2_STREAM_UPLOAD_WORKERS,
+    executor: Optional[Executor] = None,
+    max_size: Optional[int] = DJANGO_R2_STREAM_MAX_SIZE,
+) -> StreamUploadResult:
+    """
+    Upload `chunks` to `bucket`/`key` with a boto3 S3 `client`.
+
+    `content_length`, when known up front (e.g. from the HTTP
+    response), lets the part size grow so the upload fits in
+    S3's 10,000-part limit; without it the part size is planned
+    for `max_size` bytes. Parts are uploaded on `executor` when
+    given (e.g. one pool shared by many streams), otherwise on a
+    pool of `max_workers` threads for this upload.
+    """
+    if content_length is None:
+        content_length = max_size or 0
+    part_size, _ = plan_multipart_upload(content_length, part_size)
+    extra = {"ContentType": content_type} if content_type else {}
+
+    hasher = hashlib.sha256()
+    parts = iter_parts(chunks, part_size, hasher)
+    first_part, size = next(parts)
+    second = next(parts, None)
+    if second is None:
+        response = client.put_object(Bucket=bucket, Key=key, Body=first_part, **extra)
+        return StreamUploadResult(
+            size=size,
+            sha256=hasher.hexdigest(),
+            etag=response.get("ETag"),
+            part_count=1,
+        )
+
+    upload_id = client.create_multipart_upload(Bucket=bucket, Key=key, **extra)[
+        "UploadId"
+    ]
+    # Parts held in memory: one being filled plus the ones in flight
+    in_flight = max(1, buffer_size // part_size - 1)
+    slots = threading.BoundedSemaphore(in_flight)
+    errors = []
+
+    def upload_part(part_number: int, body: bytes) -> dict:
+        try:
+            response = client.upload_part(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        except Exception as e:
+            errors.append(e)
+            raise
+        finally:
+            slots.release()
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, in_flight))
+    futures = []
+    try:
+        try:
+            all_parts = chain([(first_part, size), second], parts)
+            for part_number, (body, size) in enumerate(all_parts, start=1):
+                if part_number > MAX_PART_COUNT:
+                    raise ValueError(
+                        f"Stream is longer than {part_size * MAX_PART_COUNT} "
+                        f"bytes, the most {MAX_PART_COUNT} parts of {part_size} "
+                        "bytes can hold; set DJANGO_R2_STREAM_MAX_SIZE higher"
+                    )
+                # Blocks (and so stops reading) while the workers catch up
+                slots.acquire()
+                if errors:
+                    break
+                futures.append(executor.submit(upload_part, part_number, body))
+        finally:
+            # Parts in flight finish before the upload is completed or aborted
+            wait(futures)
+            if own_executor:
+                executor.shutdown()
+        if errors:
+            raise errors[0]
+        completed = [future.result() for future in futures]
+        response = client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": completed},
+        )
+    except BaseException:
+        client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
+    return StreamUploadResult(
+        size=size,
+        sha256=hasher.hexdigest(),
+        etag=response.get("ETag"),
+        part_count=len(completed),
+    )
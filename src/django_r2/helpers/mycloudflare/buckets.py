@@ -1,6 +1,6 @@
 import logging
+from typing import TYPE_CHECKING, Optional
 
-from cloudflare.types.r2.bucket import Bucket as CloudflareBucket
 from django.conf import settings
 
 from .client import get_cloudflare_client
@@ -10,8 +10,13 @@ CLOUDFLARE_ACCOUNT_ID = getattr(settings, "CLOUDFLARE_ACCOUNT_ID", None)
 
 log = logging.getLogger(__name__)
 
+if TYPE_CHECKING:
+    from cloudflare.types.r2.bucket import Bucket as CloudflareBucket
 
-def create_r2_bucket(bucket_name: str, location_hint: str = "auto") -> CloudflareBucket:
+
+def create_r2_bucket(
+    bucket_name: str, location_hint: str = "auto"
+) -> Optional["CloudflareBucket"]:
     client = get_cloudflare_client()
     try:
         r = client.r2.buckets.create(
@@ -1,16 +1,46 @@
-from cloudflare import Cloudflare
+from typing import TYPE_CHECKING
+
 from django.conf import settings
+from django.utils.module_loading import import_string
+
+if TYPE_CHECKING:
+    from cloudflare import AsyncCloudflare, Cloudflare
 
 CLOUDFLARE_API_KEY = getattr(settings, "CLOUDFLARE_API_KEY", None)
 CLOUDFLARE_API_EMAIL = getattr(settings, "CLOUDFLARE_API_EMAIL", None)
 CLOUDFLARE_BUCKET_MANAGER_TOKEN = getattr(
     settings, "CLOUDFLARE_BUCKET_MANAGER_TOKEN", None
 )
+# Dotted paths to stand-in client classes (e.g. the fakes in
+# django_r2.testing.cloudflare); None uses the Cloudflare SDK
+DJANGO_R2_CLOUDFLARE_CLIENT = getattr(settings, "DJANGO_R2_CLOUDFLARE_CLIENT", None)
+DJANGO_R2_ASYNC_CLOUDFLARE_CLIENT = getattr(
+    settings, "DJANGO_R2_ASYNC_CLOUDFLARE_CLIENT", None
+)
 
 
-def get_cloudflare_client() -> Cloudflare:
+def get_cloudflare_client() -> "Cloudflare":
+    if DJANGO_R2_CLOUDFLARE_CLIENT:
+        Cloudflare = import_string(DJANGO_R2_CLOUDFLARE_CLIENT)
+    else:
+        # The SDK takes a few hundred ms to import; only load it when used
+        from cloudflare import Cloudflare
+
     return Cloudflare(
         api_email=CLOUDFLARE_API_EMAIL,
         api_key=CLOUDFLARE_API_KEY,
         api_token=CLOUDFLARE_BUCKET_MANAGER_TOKEN,
     )
+
+
+def get_async_cloudflare_client() -> "AsyncCloudflare":
+    if DJANGO_R2_ASYNC_CLOUDFLARE_CLIENT:
+        AsyncCloudflare = import_string(DJANGO_R2_ASYNC_CLOUDFLARE_CLIENT)
+    else:
+        from cloudflare import AsyncCloudflare
+
+    return AsyncCloudflare(
+        api_email=CLOUDFLARE_API_EMAIL,
+        api_key=CLOUDFLARE_API_KEY,
+        api_token=CLOUDFLARE_BUCKET_MANAGER_TOKEN,
+    )
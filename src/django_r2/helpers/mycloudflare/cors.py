@@ -1,13 +1,16 @@
 from django.conf import settings
 
+PARENT_HOST = getattr(settings, "PARENT_HOST", "localhost")
+PARENT_SUBDOMAIN = getattr(settings, "PARENT_SUBDOMAIN", "www")
+
 default_cors = [
     {
         "allowed": {
             "origins": [
-                f"https://{settings.PARENT_SUBDOMAIN}.{settings.PARENT_HOST}",
-                f"https://{settings.PARENT_HOST}",
-                f"http://{settings.PARENT_SUBDOMAIN}.{settings.PARENT_HOST}",
-                f"http://{settings.PARENT_HOST}",
+                f"https://{PARENT_SUBDOMAIN}.{PARENT_HOST}",
+                f"https://{PARENT_HOST}",
+                f"http://{PARENT_SUBDOMAIN}.{PARENT_HOST}",
+                f"http://{PARENT_HOST}",
             ],
             "methods": ["GET", "PUT", "POST", "DELETE", "HEAD"],
             "headers": [
@@ -0,0 +1,100 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_r2.benchmarks import SUITES, run_suite
+from django_r2.benchmarks.baselines import dump_baseline, get_change, load_baseline
+from django_r2.benchmarks.timing import format_seconds
+
+
+class Command(BaseCommand):
+    help = "Run django-r2 benchmark suites"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "suites",
+            nargs="*",
+            help=f"Suites to run (default: all). Available: {', '.join(SUITES)}",
+        )
+        parser.add_argument(
+            "--rows", type=int, default=50, help="Rows per listing page"
+        )
+        parser.add_argument(
+            "--number", type=int, default=200, help="Calls per timing round"
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Timing rounds")
+        parser.add_argument(
+            "--save", metavar="PATH", help="Write the results to a JSON baseline"
+        )
+        parser.add_argument(
+            "--compare", metavar="PATH", help="Compare with a JSON baseline"
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=None,
+            metavar="RATIO",
+            help=(
+                "With --compare, fail when a result is more than RATIO slower "
+                "or larger than its baseline (e.g. 0.2 for 20%%)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        suites = options.pop("suites") or list(SUITES)
+        unknown = [name for name in suites if name not in SUITES]
+        if unknown:
+            raise CommandError(f"Unknown suite(s): {', '.join(unknown)}")
+        save_path = options.pop("save")
+        compare_path = options.pop("compare")
+        max_regression = options.pop("max_regression")
+        baseline = {}
+        if compare_path:
+            try:
+                baseline = load_baseline(compare_path)["suites"]
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read baseline: {e}")
+
+        all_results = {}
+        over_limit = []
+        regressions = []
+        for name in suites:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name}:"))
+            results = all_results[name] = run_suite(name, **options)
+            for result in results:
+                change = None
+                if compare_path:
+                    change = get_change(
+                        result, baseline.get(name, {}).get(result["name"])
+                    )
+                self.stdout.write(self.format_result(result, change))
+                if "limit" in result and result["value"] > result["limit"]:
+                    over_limit.append(f"{name}: {result['name']}")
+                if (
+                    max_regression is not None
+                    and change is not None
+                    and change > max_regression
+                ):
+                    regressions.append(f"{name}: {result['name']} ({change:+.0%})")
+
+        if save_path:
+            dump_baseline(all_results, save_path)
+            self.stdout.write(f"Saved baseline to {save_path}")
+        errors = []
+        if over_limit:
+            errors.append(f"Over limit: {'; '.join(over_limit)}")
+        if regressions:
+            errors.append(f"Regressed: {'; '.join(regressions)}")
+        if errors:
+            raise CommandError("\n".join(errors))
+
+    def format_result(self, result: dict, change=None) -> str:
+        if "value" in result:
+            line = f"  {result['name']:<40} {result['value']:>12} {result['unit']}"
+            if "limit" in result:
+                line += f" (limit {result['limit']} {result['unit']})"
+        else:
+            median = format_seconds(result["median"])
+            fastest = format_seconds(result["min"])
+            line = f"  {result['name']:<40} {median:>12} (min {fastest})"
+        if change is not None:
+            line += f" [{change:+.1%} vs baseline]"
+        return line
@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from django_r2.benchmarks import database
+from django_r2.benchmarks.baselines import dump_baseline
+from django_r2.benchmarks.timing import format_seconds
+
+
+class Command(BaseCommand):
+    help = (
+        "Load synthetic Object rows into a benchmark bucket and time the "
+        "listing, admin search and detail queries against them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--objects",
+            type=int,
+            default=100_000,
+            help="Rows the benchmark bucket is topped up to before timing",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=10_000, help="Rows per insert batch"
+        )
+        parser.add_argument(
+            "--days", type=int, default=365, help="Days the rows are spread over"
+        )
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=5, help="Timing rounds")
+        parser.add_argument(
+            "--search",
+            action="append",
+            dest="search_terms",
+            help="Admin search term (repeatable; default: a common and a rare one)",
+        )
+        parser.add_argument(
+            "--explain", action="store_true", help="Print each query's plan"
+        )
+        parser.add_argument(
+            "--save", metavar="PATH", help="Write the results to a JSON baseline"
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the benchmark bucket and its rows, then exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["objects"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--objects and --batch-size must be at least 1")
+        bucket = database.get_benchmark_bucket()
+        if options["delete"]:
+            deleted = database.delete_objects(bucket)
+            self.stdout.write(f"Deleted the benchmark bucket and {deleted} rows")
+            return
+
+        self.stdout.write(f"Database: {connection.vendor} ({connection.alias})")
+        total = options["objects"]
+
+        def progress(done):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {done}/{total} rows")
+
+        added = database.generate_objects(
+            bucket,
+            total,
+            days=options["days"],
+            batch_size=options["batch_size"],
+            progress=progress,
+        )
+        if added:
+            self.stdout.write(f"Added {added} rows")
+
+        results = database.run(
+            bucket,
+            page_size=options["page_size"],
+            repeat=options["repeat"],
+            search_terms=options["search_terms"],
+        )
+        for result in results:
+            if "value" in result:
+                self.stdout.write(
+                    f"  {result['name']:<48} {result['value']:>12} {result['unit']}"
+                )
+            else:
+                median = format_seconds(result["median"])
+                fastest = format_seconds(result["min"])
+                self.stdout.write(
+                    f"  {result['name']:<48} {median:>12} (min {fastest})"
+                )
+            if options["explain"] and result.get("plan"):
+                for line in result["plan"].splitlines():
+                    self.stdout.write(f"      {line}")
+        if options["save"]:
+            dump_baseline({f"database:{connection.vendor}": results}, options["save"])
+            self.stdout.write(f"Saved baseline to {options['save']}")
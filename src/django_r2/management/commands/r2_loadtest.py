@@ -0,0 +1,171 @@
+import contextlib
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from django_r2.benchmarks import loadtest
+from django_r2.benchmarks.baselines import dump_baseline
+from django_r2.benchmarks.timing import format_seconds
+from django_r2.models import Bucket
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the upload flow (presign, PUT, complete) at a set concurrency "
+        "and report per-phase latency percentiles, throughput and error rates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--files", type=int, default=200, help="Files to upload in all"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Uploads in flight at once"
+        )
+        parser.add_argument(
+            "--sizes",
+            default="16KB:70,1MB:24,16MB:5,96MB:1",
+            help=(
+                "File size mix as SIZE:WEIGHT pairs, e.g. 4KB:90,1GB:1 "
+                "(default: %(default)s)"
+            ),
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed for drawing file sizes"
+        )
+        parser.add_argument(
+            "--multipart-threshold",
+            default="64MB",
+            help="Files this size or larger use multipart uploads (0: never)",
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=300.0, help="Seconds per PUT request"
+        )
+        parser.add_argument(
+            "--bucket",
+            metavar="BUCKET_ID",
+            help=(
+                "Upload to this bucket (default: the load-test user's bucket); "
+                "can't be combined with --standin"
+            ),
+        )
+        parser.add_argument(
+            "--standin",
+            action="store_true",
+            help=(
+                "Run an S3 stand-in in this process and upload to it, "
+                "instead of AWS_S3_ENDPOINT_URL"
+            ),
+        )
+        parser.add_argument(
+            "--standin-root",
+            default=None,
+            help="With --standin, where objects are stored (default: a temporary dir)",
+        )
+        parser.add_argument(
+            "--max-error-rate",
+            type=float,
+            default=None,
+            metavar="RATIO",
+            help="Fail when more than RATIO of the uploads fail (e.g. 0.01)",
+        )
+        parser.add_argument(
+            "--save", metavar="PATH", help="Write the results to a JSON baseline"
+        )
+
+    def handle(self, *args, **options):
+        if options["files"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--files and --concurrency must be at least 1")
+        try:
+            mix = loadtest.parse_size_mix(options["sizes"])
+            multipart_threshold = loadtest.parse_size(options["multipart_threshold"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options["bucket"] and options["standin"]:
+            # The stand-in would need its own credentials on the bucket row
+            raise CommandError(
+                "--bucket can't be combined with --standin, which uses the "
+                "load-test user's bucket"
+            )
+        sizes = loadtest.sample_sizes(mix, options["files"], seed=options["seed"])
+
+        with contextlib.ExitStack() as stack:
+            standin = None
+            if options["standin"]:
+                from django_r2.testing import S3StandIn
+
+                standin = stack.enter_context(S3StandIn(root=options["standin_root"]))
+                stack.enter_context(
+                    override_settings(AWS_S3_ENDPOINT_URL=standin.endpoint_url)
+                )
+                self.stdout.write(f"S3 stand-in at {standin.endpoint_url}")
+            bucket = self.get_bucket(options["bucket"], standin)
+
+            total_mb = sum(sizes) / 1024 / 1024
+            self.stdout.write(
+                f"Uploading {len(sizes)} files ({total_mb:.1f} MB) to bucket "
+                f"{bucket.name} with concurrency {options['concurrency']}"
+            )
+            step = max(len(sizes) // 10, 1)
+
+            def progress(done):
+                if options["verbosity"] > 1 and (
+                    done % step == 0 or done == len(sizes)
+                ):
+                    self.stdout.write(f"  {done}/{len(sizes)} files")
+
+            test = loadtest.LoadTest(
+                bucket,
+                concurrency=options["concurrency"],
+                multipart_threshold=multipart_threshold,
+                timeout=options["timeout"],
+            )
+            results, elapsed = test.run(sizes, progress=progress)
+
+        summary = loadtest.summarize(results, elapsed)
+        self.write_summary(summary)
+        for line in loadtest.get_error_samples(results):
+            self.stdout.write(self.style.WARNING(f"  {line}"))
+        if options["save"]:
+            dump_baseline({"loadtest": summary}, options["save"])
+            self.stdout.write(f"Saved baseline to {options['save']}")
+
+        failed = sum(1 for result in results if result.error is not None)
+        error_rate = failed / len(results)
+        max_error_rate = options["max_error_rate"]
+        if max_error_rate is not None and error_rate > max_error_rate:
+            raise CommandError(
+                f"{failed} of {len(results)} uploads failed "
+                f"({error_rate:.1%}, limit {max_error_rate:.1%})"
+            )
+
+    def get_bucket(self, bucket_id, standin) -> Bucket:
+        if bucket_id is None:
+            bucket = loadtest.get_loadtest_bucket(standin)
+        else:
+            bucket = Bucket.objects.filter(id=bucket_id).first()
+            if bucket is None:
+                raise CommandError(f"Bucket {bucket_id} does not exist")
+        if not bucket.name or not bucket.active_in_cloudflare:
+            raise CommandError(f"Bucket {bucket.id} is not active in R2")
+        return bucket
+
+    def write_summary(self, summary):
+        self.stdout.write(
+            f"  {'phase':<20} {'p50':>12} {'p95':>12} {'p99':>12} {'max':>12} "
+            f"{'errors':>14}"
+        )
+        for result in summary:
+            if "value" in result:
+                value = result["value"]
+                value = f"{value:.2f}" if isinstance(value, float) else value
+                self.stdout.write(
+                    f"  {result['name']:<20} {value:>12} {result['unit']}"
+                )
+                continue
+            timings = " ".join(
+                f"{format_seconds(result[key]):>12}"
+                for key in ("p50", "p95", "p99", "max")
+            )
+            errors = f"{result['errors']} ({result['error_rate']:.1%})"
+            self.stdout.write(f"  {result['name']:<20} {timings} {errors:>14}")
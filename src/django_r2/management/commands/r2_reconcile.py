@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_r2.buckets import services as buckets_services
+from django_r2.models import Bucket
+from django_r2.objects import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare each bucket's R2 listing with its Object rows and report "
+        "(or, with --fix, repair) orphan keys, missing objects, unconfirmed "
+        "uploads, size mismatches and stale preflights"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "bucket_ids", nargs="*", help="Buckets to check (default: all active)"
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Only check the most recent N day prefixes",
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help=(
+                "Delete orphan keys and stale preflights, flag missing objects, "
+                "and record actual sizes"
+            ),
+        )
+        parser.add_argument(
+            "--stale-hours",
+            type=int,
+            default=24,
+            help="Never-uploaded rows older than this are stale preflights",
+        )
+        parser.add_argument(
+            "--orphan-grace-minutes",
+            type=int,
+            default=15,
+            help=(
+                "Orphan keys modified this close to the check may be uploads "
+                "in flight; they are reported but never deleted"
+            ),
+        )
+        parser.add_argument(
+            "--workers", type=int, default=8, help="Prefixes checked in parallel"
+        )
+
+    def handle(self, *args, **options):
+        buckets = Bucket.objects.filter(active_in_cloudflare=True)
+        if options["bucket_ids"]:
+            buckets = buckets.filter(id__in=options["bucket_ids"])
+        if options["days"] is not None and options["days"] < 1:
+            raise CommandError("--days must be at least 1")
+        prefixes = None
+        if options["days"]:
+            prefixes = reconcile.recent_date_prefixes(options["days"])
+        verbosity = options["verbosity"]
+
+        def on_prefix(report):
+            if verbosity < 2:
+                return
+            issues = {k: v for k, v in report.counts.items() if v}
+            self.stdout.write(f"  {report.prefix} matched={report.matched} {issues}")
+
+        for bucket in buckets:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(f"{bucket.name} ({bucket.id})")
+            )
+            cred_obj = buckets_services.get_today_bucket_credentials_by_bucket_id(
+                bucket.id
+            )
+            if cred_obj is None:
+                raise CommandError(
+                    f"No credentials for bucket {bucket.name} ({bucket.id}); "
+                    "can't list it"
+                )
+            report = reconcile.reconcile_bucket(
+                bucket,
+                cred_obj.get_s3_client(),
+                prefixes=prefixes,
+                fix=options["fix"],
+                stale_after=timedelta(hours=options["stale_hours"]),
+                orphan_grace=timedelta(minutes=options["orphan_grace_minutes"]),
+                max_workers=options["workers"],
+                on_prefix=on_prefix,
+            )
+            self.stdout.write(f"  matched: {report.matched}")
+            for category in reconcile.CATEGORIES:
+                count = report.counts[category]
+                style = self.style.WARNING if count else str
+                self.stdout.write(style(f"  {category}: {count}"))
+                if verbosity >= 2:
+                    for key in report.samples.get(category, []):
+                        self.stdout.write(f"    {key}")
+            if options["fix"]:
+                self.stdout.write(self.style.SUCCESS(f"  fixed: {report.fixed}"))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from django_r2.testing import S3StandIn
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local S3-compatible stand-in for R2 (point AWS_S3_ENDPOINT_URL "
+        "at it, with DJANGO_R2_CLOUDFLARE_CLIENT set to the fake client)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=9000)
+        parser.add_argument(
+            "--root",
+            default=None,
+            help="Directory objects are stored in (default: a temporary one)",
+        )
+        parser.add_argument(
+            "--bucket",
+            action="append",
+            dest="buckets",
+            default=[],
+            help="Bucket to create on startup (repeatable)",
+        )
+        parser.add_argument(
+            "--no-verify",
+            action="store_true",
+            help="Accept requests without checking their signatures",
+        )
+
+    def handle(self, *args, **options):
+        standin = S3StandIn(
+            root=options["root"],
+            host=options["host"],
+            port=options["port"],
+            verify_signatures=not options["no_verify"],
+        )
+        for bucket in options["buckets"]:
+            standin.create_bucket(bucket)
+        self.stdout.write(
+            f"S3 stand-in at {standin.endpoint_url} (data in {standin.root}); "
+            f"access key id {standin.access_key_id!r}"
+        )
+        try:
+            standin.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            standin.stop()
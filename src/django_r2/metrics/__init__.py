@@ -0,0 +1,146 @@
+"""
+Instrumentation for django_r2's hot paths.
+
+Counters (`increment`) and latency histograms (`timed`/`observe`) are
+recorded with labels such as `operation` and `outcome` and handed to
+the exporters listed in `DJANGO_R2_METRICS_EXPORTERS` (dotted paths
+to `exporters.BaseExporter` subclasses). Exporters that collect in
+memory, like `PrometheusExporter`, are served by `views.metrics_view`;
+push exporters, like `StatsdExporter`, send each sample as it comes.
+
+A per-bucket `bucket` label (the R2 bucket name) is only added with
+`DJANGO_R2_METRICS_BUCKET_LABEL`: every bucket then gets its own
+series, which adds up quickly with many buckets.
+
+Everything is off unless `DJANGO_R2_METRICS` is set, in which case
+every call returns right after checking that flag.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from django.utils.module_loading import import_string
+
+from django_r2 import settings
+
+DJANGO_R2_METRICS = getattr(settings, "DJANGO_R2_METRICS", False)
+DJANGO_R2_METRICS_EXPORTERS = getattr(
+    settings,
+    "DJANGO_R2_METRICS_EXPORTERS",
+    ["django_r2.metrics.exporters.PrometheusExporter"],
+)
+DJANGO_R2_METRICS_BUCKET_LABEL = getattr(
+    settings, "DJANGO_R2_METRICS_BUCKET_LABEL", False
+)
+
+_exporters = None
+_exporters_lock = threading.Lock()
+
+
+def get_exporters() -> list:
+    global _exporters
+    if _exporters is None:
+        with _exporters_lock:
+            if _exporters is None:
+                _exporters = [
+                    import_string(path)() for path in DJANGO_R2_METRICS_EXPORTERS
+                ]
+    return _exporters
+
+
+def bucket_label(bucket_name: Optional[str]) -> dict:
+    """
+    `{"bucket": bucket_name}` (an R2 bucket name) when per-bucket
+    labels are on, else `{}`; splat it into the labels.
+    """
+    if not DJANGO_R2_METRICS_BUCKET_LABEL or not bucket_name:
+        return {}
+    return {"bucket": str(bucket_name)}
+
+
+def increment(name: str, value: int = 1, **labels):
+    """
+    Add `value` to the counter `name`.
+    """
+    if not DJANGO_R2_METRICS:
+        return
+    for exporter in get_exporters():
+        exporter.increment(name, value, labels)
+
+
+def observe(name: str, seconds: float, **labels):
+    """
+    Record a `seconds` latency sample for the histogram `name`.
+    """
+    if not DJANGO_R2_METRICS:
+        return
+    for exporter in get_exporters():
+        exporter.observe(name, seconds, labels)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1, **labels):
+    if not count:
+        return
+    increment(
+        "cache_requests", count, cache=cache, outcome="hit" if hit else "miss", **labels
+    )
+
+
+class Timer:
+    """
+    Times its block into the histogram `name`. The label dict is
+    returned on enter so the block can add labels (e.g. `source`);
+    `outcome` is "error" when the block raises and defaults to "ok".
+    """
+
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self) -> dict:
+        self.start = time.perf_counter()
+        return self.labels
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.labels["outcome"] = "error"
+        else:
+            self.labels.setdefault("outcome", "ok")
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> dict:
+        return {}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+def timed(name: str, **labels) -> Timer | NullTimer:
+    if not DJANGO_R2_METRICS:
+        return NULL_TIMER
+    return Timer(name, labels)
+
+
+def render() -> Optional[tuple[str, str]]:
+    """
+    `(body, content_type)` from the first exporter that renders its
+    metrics for scraping, or None.
+    """
+    if not DJANGO_R2_METRICS:
+        return None
+    for exporter in get_exporters():
+        if exporter.content_type is not None:
+            return exporter.render(), exporter.content_type
+    return None
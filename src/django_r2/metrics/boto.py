@@ -0,0 +1,103 @@
+"""
+botocore event hooks for S3 metrics.
+
+`instrument_s3_client` times every API call of a client (including
+its retries) into the `s3_request` histogram, labeled by operation
+and outcome (and bucket, see `metrics.bucket_label`), counts retries
+in `s3_retries`, and counts the
+HTTP connections its pool had to open in `s3_connections_opened`;
+compare that with the number of requests to see connection reuse.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from django_r2 import metrics
+
+CONTEXT_KEY = "django_r2_metrics"
+
+
+def get_pool_manager(client):
+    # botocore internals; connection counts are skipped without them
+    try:
+        return client._endpoint.http_session._manager
+    except AttributeError:
+        return None
+
+
+def get_connection_count(pool_manager) -> Optional[int]:
+    """
+    Connections opened so far by the manager's live urllib3 pools.
+    """
+    if pool_manager is None:
+        return None
+    try:
+        pools = pool_manager.pools
+        total = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                total += pool.num_connections
+        return total
+    except AttributeError:
+        return None
+
+
+def get_outcome(status: int) -> str:
+    if status < 400:
+        return "ok"
+    if status == 404:
+        return "not_found"
+    return "error"
+
+
+def instrument_s3_client(client):
+    pool_manager = get_pool_manager(client)
+    connections = {"seen": get_connection_count(pool_manager) or 0}
+    lock = threading.Lock()
+
+    def record_connections():
+        count = get_connection_count(pool_manager)
+        if count is None:
+            return
+        with lock:
+            # Pools evicted by urllib3 take their counts with them
+            opened, connections["seen"] = count - connections["seen"], count
+        if opened > 0:
+            metrics.increment("s3_connections_opened", opened)
+
+    def before_parameter_build(params, context, **kwargs):
+        context[CONTEXT_KEY] = (
+            time.perf_counter(),
+            metrics.bucket_label(params.get("Bucket")),
+        )
+
+    def record(model, context, outcome: str, retries: int = 0):
+        started = context.pop(CONTEXT_KEY, None)
+        if started is None:
+            return
+        start, bucket = started
+        metrics.observe(
+            "s3_request",
+            time.perf_counter() - start,
+            operation=model.name,
+            outcome=outcome,
+            **bucket,
+        )
+        if retries:
+            metrics.increment("s3_retries", retries, operation=model.name, **bucket)
+        record_connections()
+
+    def after_call(http_response, parsed, model, context, **kwargs):
+        retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        record(model, context, get_outcome(http_response.status_code), retries)
+
+    def after_call_error(exception, model, context, **kwargs):
+        record(model, context, "error")
+
+    events = client.meta.events
+    events.register("before-parameter-build.s3", before_parameter_build)
+    events.register("after-call.s3", after_call)
+    events.register("after-call-error.s3", after_call_error)
+    return client
@@ -0,0 +1,166 @@
+"""
+Metrics exporters.
+
+An exporter receives every counter increment and histogram sample.
+Pull exporters set `content_type` and implement `render()`; the
+metrics view serves the first one configured. Samples are kept per
+process, so with several workers each one is scraped separately
+(or use a push exporter such as statsd).
+"""
+
+import bisect
+import socket
+import threading
+
+from django_r2 import settings
+
+DJANGO_R2_METRICS_PREFIX = getattr(settings, "DJANGO_R2_METRICS_PREFIX", "django_r2")
+# Histogram bucket upper bounds, in seconds
+DJANGO_R2_METRICS_BUCKETS = getattr(
+    settings,
+    "DJANGO_R2_METRICS_BUCKETS",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DJANGO_R2_STATSD_HOST = getattr(settings, "DJANGO_R2_STATSD_HOST", "localhost")
+DJANGO_R2_STATSD_PORT = getattr(settings, "DJANGO_R2_STATSD_PORT", 8125)
+
+
+def label_key(labels: dict) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class BaseExporter:
+    content_type = None
+
+    def increment(self, name: str, value: int, labels: dict):
+        raise NotImplementedError
+
+    def observe(self, name: str, seconds: float, labels: dict):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        raise NotImplementedError
+
+
+class PrometheusExporter(BaseExporter):
+    """
+    Keeps counters and histograms in memory and renders them in the
+    Prometheus text format: counter `x` becomes `<prefix>_x_total`
+    and histogram `x` becomes `<prefix>_x_seconds`.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(
+        self,
+        prefix: str = DJANGO_R2_METRICS_PREFIX,
+        buckets=DJANGO_R2_METRICS_BUCKETS,
+    ):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # name -> {label key: value}
+        self._counters = {}
+        # name -> {label key: [bucket counts..., +Inf count, sum]}
+        self._histograms = {}
+
+    def increment(self, name: str, value: int, labels: dict):
+        key = label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, labels: dict):
+        key = label_key(labels)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            values = series.get(key)
+            if values is None:
+                values = series[key] = [0] * (len(self.buckets) + 2)
+            values[index] += 1
+            values[-1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def format_labels(key: tuple, extra: tuple = ()) -> str:
+        pairs = key + extra
+        if not pairs:
+            return ""
+        escaped = (
+            (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in pairs
+        )
+        return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+    def render(self) -> str:
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: list(values) for key, values in series.items()}
+                for name, series in self._histograms.items()
+            }
+        lines = []
+        for name, series in sorted(counters.items()):
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{metric}{self.format_labels(key)} {value}")
+        bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for name, series in sorted(histograms.items()):
+            metric = f"{self.prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for key, values in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(bounds, values):
+                    cumulative += count
+                    labels = self.format_labels(key, (("le", bound),))
+                    lines.append(f"{metric}_bucket{labels} {cumulative}")
+                labels = self.format_labels(key)
+                lines.append(f"{metric}_sum{labels} {values[-1]}")
+                lines.append(f"{metric}_count{labels} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+class StatsdExporter(BaseExporter):
+    """
+    Sends each sample over UDP as it is recorded, with labels as
+    DogStatsD-style tags (`name:1|c|#bucket:...,outcome:ok`), which
+    Datadog, Telegraf and the Prometheus statsd_exporter accept.
+    """
+
+    def __init__(
+        self,
+        host: str = DJANGO_R2_STATSD_HOST,
+        port: int = DJANGO_R2_STATSD_PORT,
+        prefix: str = DJANGO_R2_METRICS_PREFIX,
+    ):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    @staticmethod
+    def format_tags(labels: dict) -> str:
+        if not labels:
+            return ""
+        return "|#" + ",".join(f"{name}:{value}" for name, value in labels.items())
+
+    def send(self, line: str):
+        try:
+            self.socket.sendto(line.encode("utf-8"), self.address)
+        except OSError:
+            # Metrics must never break the request
+            pass
+
+    def increment(self, name: str, value: int, labels: dict):
+        self.send(f"{self.prefix}.{name}:{value}|c{self.format_tags(labels)}")
+
+    def observe(self, name: str, seconds: float, labels: dict):
+        self.send(
+            f"{self.prefix}.{name}:{seconds * 1000:.3f}|ms{self.format_tags(labels)}"
+        )
@@ -0,0 +1,33 @@
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from django_r2 import metrics, settings
+
+DJANGO_R2_METRICS_TOKEN = getattr(settings, "DJANGO_R2_METRICS_TOKEN", None)
+
+
+def is_authorized(request) -> bool:
+    """
+    Scrapers send `Authorization: Bearer <DJANGO_R2_METRICS_TOKEN>`;
+    staff users may also view the metrics.
+    """
+    if DJANGO_R2_METRICS_TOKEN:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and constant_time_compare(
+            token, DJANGO_R2_METRICS_TOKEN
+        ):
+            return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def metrics_view(request):
+    if not metrics.DJANGO_R2_METRICS:
+        raise Http404("Metrics are disabled")
+    if not is_authorized(request):
+        return HttpResponseForbidden()
+    rendered = metrics.render()
+    if rendered is None:
+        raise Http404("No exporter renders metrics")
+    body, content_type = rendered
+    return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_r2", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="object",
+            name="uploaded_size",
+            field=models.BigIntegerField(
+                blank=True, help_text="Uploaded file size in bytes", null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_r2", "0002_object_uploaded_size_bigint"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="object",
+            index=models.Index(
+                fields=["bucket", "-created_at", "-id"],
+                name="django_r2_obj_bucket_created",
+            ),
+        ),
+    ]
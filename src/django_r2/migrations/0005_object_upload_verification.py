@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_r2", "0004_urluploadrequest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="object",
+            name="uploaded_etag",
+            field=models.CharField(
+                blank=True,
+                help_text="ETag reported by the bucket",
+                max_length=255,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="object",
+            name="verified_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Date and time the upload was verified against the bucket",
+                null=True,
+            ),
+        ),
+    ]
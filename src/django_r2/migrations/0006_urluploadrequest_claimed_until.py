@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_r2", "0005_object_upload_verification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="urluploadrequest",
+            name="claimed_until",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Bulk ingest holds the request until this time",
+                null=True,
+            ),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django_r2.buckets.models import Bucket, BucketCredentials
 from django_r2.objects.models import Object
+from django_r2.uploads.models import URLUploadRequest
 
-__all__ = ["Bucket", "BucketCredentials", "Object"]
+__all__ = ["Bucket", "BucketCredentials", "Object", "URLUploadRequest"]
@@ -11,6 +11,7 @@ from django_r2.buckets import services as buckets_services
 from django_r2.helpers.formatting.filenames import create_s3_filename
 from django_r2.helpers.formatting.humanize import humanize_filesize
 from django_r2.models import Bucket
+from django_r2.objects import services as objects_services
 
 User = settings.AUTH_USER_MODEL
 
@@ -69,7 +70,7 @@ class Object(models.Model):
         blank=True,
         null=True,
     )
-    uploaded_size = models.IntegerField(
+    uploaded_size = models.BigIntegerField(
         help_text="Uploaded file size in bytes",
         blank=True,
         null=True,
@@ -102,6 +103,17 @@ class Object(models.Model):
         null=True,
     )
     uploaded = models.BooleanField(default=False)
+    uploaded_etag = models.CharField(
+        max_length=255,
+        help_text="ETag reported by the bucket",
+        blank=True,
+        null=True,
+    )
+    verified_at = models.DateTimeField(
+        help_text="Date and time the upload was verified against the bucket",
+        blank=True,
+        null=True,
+    )
     uploaded_at = models.DateTimeField(
         help_text="Date and time the file was successfully uploaded to S3",
         auto_now_add=False,
@@ -120,29 +132,51 @@ class Object(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a bucket's objects, newest first
+            models.Index(
+                fields=["bucket", "-created_at", "-id"],
+                name="django_r2_obj_bucket_created",
+            ),
+        ]
+
     def get_absolute_url(self):
-        return reverse("objects:detail", kwargs={"pk": self.id})
+        return reverse(
+            "django_r2:objects-detail",
+            kwargs={"bucket_id": self.bucket_id, "pk": self.id},
+        )
 
     def get_proxy_download_url(self):
-        return reverse("objects:download", kwargs={"pk": self.id})
+        return reverse(
+            "django_r2:objects-download",
+            kwargs={"bucket_id": self.bucket_id, "pk": self.id},
+        )
+
+    def get_download_filename(self) -> str:
+        return f"{self.filename}.{self.file_extension}"
 
     def get_s3_download_url(self, force_download=False) -> str | None:
         s3_key = self.get_s3_key()
         if not s3_key:
             return None
-        uploaded_filename = self.filename
-        file_ext = self.file_extension
-        fname = f"{uploaded_filename}.{file_ext}"
+        fname = self.get_download_filename()
         bucket_credentials = buckets_services.get_today_bucket_credentials_by_bucket_id(
-            self.bucket.id
+            self.bucket_id
         )
-        return bucket_credentials.presign_download_url(
+        return objects_services.get_download_url(
+            bucket_credentials,
             s3_key,
             filename=fname,
             force_download=force_download,
         )
 
-    def save(self, *args, **kwargs):
+    def populate_derived_fields(self):
+        """
+        Fill in the fields derived from `filename`, `uploaded_type`
+        and friends. Called by `save()` and by bulk code paths
+        (`bulk_create`/`bulk_update`) that bypass it.
+        """
         if self.filename:
             if not self.keyname:
                 """
@@ -173,6 +207,9 @@ class Object(models.Model):
             self.display_size = humanize_filesize(self.uploaded_size)
         if self.downloadable_filename and self.filename:
             self.downloadable_filename = self.downloadable_filename
+
+    def save(self, *args, **kwargs):
+        self.populate_derived_fields()
         super().save(*args, **kwargs)
 
     def date_folders(self):
@@ -0,0 +1,134 @@
+"""
+Keyset (cursor) pagination over `(created_at, id)`.
+
+Unlike `Paginator`, there is no `COUNT(*)` and no `OFFSET`: each
+page is a range scan on the `(bucket, created_at, id)` index that
+starts right after the previous page's last row, so a deep page
+costs the same as the first one.
+"""
+
+import base64
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from django.db.models import Q
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+def encode_cursor(created_at: datetime, object_id, direction: str = NEXT) -> str:
+    raw = f"{direction}|{created_at.isoformat()}|{object_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]):
+    """
+    Returns `(direction, created_at, id)`, or None for a missing
+    or malformed cursor (which means "first page").
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        direction, created_at, object_id = raw.split("|")
+        if direction not in (NEXT, PREVIOUS):
+            return None
+        return direction, datetime.fromisoformat(created_at), uuid.UUID(object_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+@dataclass
+class KeysetPage:
+    object_list: list = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+
+def get_cursor_queryset(queryset, cursor: Optional[str] = None, page_size: int = 50):
+    """
+    `(queryset, position, direction)`: the `page_size + 1` rows to
+    fetch for `cursor`, plus what `make_keyset_page` needs to cut
+    them into a page.
+    """
+    position = decode_cursor(cursor)
+    direction = NEXT
+    if position is None:
+        queryset = queryset.order_by("-created_at", "-id")
+    else:
+        direction, created_at, object_id = position
+        # The redundant `created_at` bound gives the planner an index
+        # range to seek to; the OR alone makes it scan from the start.
+        if direction == NEXT:
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at)
+                | Q(created_at=created_at, id__lt=object_id),
+                created_at__lte=created_at,
+            ).order_by("-created_at", "-id")
+        else:
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at)
+                | Q(created_at=created_at, id__gt=object_id),
+                created_at__gte=created_at,
+            ).order_by("created_at", "id")
+    return queryset[: page_size + 1], position, direction
+
+
+def make_keyset_page(rows: list, position, direction: str, page_size: int):
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == PREVIOUS:
+        rows.reverse()
+
+    page = KeysetPage(object_list=rows)
+    if not rows:
+        return page
+    first, last = rows[0], rows[-1]
+    if direction == NEXT:
+        if has_more:
+            page.next_cursor = encode_cursor(last.created_at, last.id, NEXT)
+        if position is not None:
+            page.previous_cursor = encode_cursor(first.created_at, first.id, PREVIOUS)
+    else:
+        page.next_cursor = encode_cursor(last.created_at, last.id, NEXT)
+        if has_more:
+            page.previous_cursor = encode_cursor(first.created_at, first.id, PREVIOUS)
+    return page
+
+
+def paginate_by_cursor(queryset, cursor: Optional[str] = None, page_size: int = 50):
+    """
+    Newest-first page of `queryset` ordered by `(-created_at, -id)`.
+
+    Fetches `page_size + 1` rows to learn whether another page
+    exists without counting.
+    """
+    queryset, position, direction = get_cursor_queryset(queryset, cursor, page_size)
+    return make_keyset_page(list(queryset), position, direction, page_size)
+
+
+async def apaginate_by_cursor(
+    queryset, cursor: Optional[str] = None, page_size: int = 50
+):
+    """
+    Async `paginate_by_cursor`.
+    """
+    queryset, position, direction = get_cursor_queryset(queryset, cursor, page_size)
+    rows = [row async for row in queryset]
+    return make_keyset_page(rows, position, direction, page_size)
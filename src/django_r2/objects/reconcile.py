@@ -0,0 +1,370 @@
+"""
+Bucket/database reconciliation.
+
+Object keys are `<Object.date_folders()><keyname>`, so every key of a
+day lives under one `YYYY/M/D/` prefix. For each day prefix, the
+sorted `list_objects_v2` listing and the day's `Object` rows (sorted
+by keyname with a binary collation, i.e. in the same byte order S3
+uses) are merge-joined in a single pass, so memory stays constant
+however large the day is. Prefixes are reconciled in parallel.
+
+The listing is paged in lazily, after the rows were read, so a key
+uploaded meanwhile has no row to match. Orphans modified after the
+prefix's reconciliation started (less an `orphan_grace` for clock
+skew) are counted as `recent_orphan` and never fixed.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, Iterator, Optional
+
+from django.apps import apps
+from django.db import close_old_connections, connection
+from django.db.models.functions import Collate
+from django.utils import timezone as django_timezone
+
+from django_r2.helpers.formatting.humanize import humanize_filesize
+from django_r2.helpers.myboto.empty import DELETE_BATCH_SIZE
+from django_r2.objects import services as objects_services
+
+logger = logging.getLogger(__name__)
+
+# Binary (byte order) collations, matching S3's UTF-8 key order
+BINARY_COLLATIONS = {
+    "postgresql": "C",
+    "sqlite": "BINARY",
+    "mysql": "utf8mb4_bin",
+    "oracle": "BINARY",
+}
+
+ORPHAN = "orphan"
+RECENT_ORPHAN = "recent_orphan"
+MISSING = "missing"
+UNCONFIRMED = "unconfirmed"
+SIZE_MISMATCH = "size_mismatch"
+STALE_PREFLIGHT = "stale_preflight"
+CATEGORIES = [
+    ORPHAN,
+    RECENT_ORPHAN,
+    MISSING,
+    UNCONFIRMED,
+    SIZE_MISMATCH,
+    STALE_PREFLIGHT,
+]
+
+
+@dataclass
+class ReconcileReport:
+    prefix: str
+    matched: int = 0
+    counts: dict = field(default_factory=lambda: dict.fromkeys(CATEGORIES, 0))
+    fixed: int = 0
+    # First few examples per category, for display
+    samples: dict = field(default_factory=dict)
+
+    def record(self, category: str, key: str, max_samples: int = 10):
+        self.counts[category] += 1
+        samples = self.samples.setdefault(category, [])
+        if len(samples) < max_samples:
+            samples.append(key)
+
+    def merge(self, other: "ReconcileReport"):
+        self.matched += other.matched
+        self.fixed += other.fixed
+        for category, count in other.counts.items():
+            self.counts[category] += count
+        for category, keys in other.samples.items():
+            samples = self.samples.setdefault(category, [])
+            samples.extend(keys[: max(0, 10 - len(samples))])
+
+
+def date_folders_for(day: date) -> str:
+    # Same format as `Object.date_folders()`
+    return f"{day.year}/{day.month}/{day.day}/"
+
+
+def recent_date_prefixes(days: int, today: Optional[date] = None) -> list[str]:
+    today = today or django_timezone.now().astimezone(timezone.utc).date()
+    return [date_folders_for(today - timedelta(days=n)) for n in range(days)]
+
+
+def list_child_prefixes(client, bucket: str, prefix: str = "") -> Iterator[str]:
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        for common_prefix in page.get("CommonPrefixes", []):
+            yield common_prefix["Prefix"]
+
+
+def all_date_prefixes(client, bucket_name: str, bucket_id) -> list[str]:
+    """
+    Every day prefix present in the bucket or in the database.
+    """
+    Object = apps.get_model("django_r2", "Object")
+    prefixes = set()
+    for year in list_child_prefixes(client, bucket_name):
+        for month in list_child_prefixes(client, bucket_name, year):
+            for prefix in list_child_prefixes(client, bucket_name, month):
+                # Other folders (e.g. `backups/2024/x/`) have no rows to
+                # join against; every key in them would look orphaned
+                if parse_date_prefix(prefix) is not None:
+                    prefixes.add(prefix)
+    days = Object.objects.filter(bucket_id=bucket_id).datetimes(
+        "created_at", "day", tzinfo=timezone.utc
+    )
+    prefixes.update(date_folders_for(day.date()) for day in days)
+    return sorted(prefixes)
+
+
+def parse_date_prefix(prefix: str) -> Optional[date]:
+    """
+    The day a `YYYY/M/D/` prefix names, or None unless `prefix` is
+    exactly as `Object.date_folders()` writes it.
+    """
+    try:
+        year, month, day = (int(part) for part in prefix[:-1].split("/"))
+        parsed = date(year, month, day)
+    except ValueError:
+        return None
+    if date_folders_for(parsed) != prefix:
+        return None
+    return parsed
+
+
+def iter_bucket_keys(
+    client, bucket: str, prefix: str
+) -> Iterator[tuple[str, tuple[int, datetime]]]:
+    """
+    `(key, (size, last_modified))` in key order.
+    """
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for entry in page.get("Contents", []):
+            yield entry["Key"], (entry["Size"], entry["LastModified"])
+
+
+def iter_db_keys(bucket_id, prefix: str) -> Iterator[tuple[str, tuple]]:
+    """
+    `(key, (id, uploaded, uploaded_size, created_at))` for the day's
+    rows, in binary key order.
+    """
+    Object = apps.get_model("django_r2", "Object")
+    day = parse_date_prefix(prefix)
+    if day is None:
+        return
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    keyname = "keyname"
+    collation = BINARY_COLLATIONS.get(connection.vendor)
+    if collation:
+        keyname = Collate("keyname", collation)
+    rows = (
+        Object.objects.filter(
+            bucket_id=bucket_id,
+            created_at__gte=start,
+            created_at__lt=start + timedelta(days=1),
+            keyname__isnull=False,
+        )
+        .order_by(keyname)
+        .values_list("keyname", "id", "uploaded", "uploaded_size", "created_at")
+    )
+    for name, *row in rows.iterator(chunk_size=2000):
+        yield f"{prefix}{name}", tuple(row)
+
+
+def merge_join(bucket_keys, db_keys):
+    """
+    Yield `(key, bucket_entry, db_row)` for every key on either side;
+    the missing side is None. Both inputs must be sorted by key.
+    """
+    bucket_iter, db_iter = iter(bucket_keys), iter(db_keys)
+    # Rows first, so the whole listing is newer than the row query
+    db_item = next(db_iter, None)
+    bucket_item = next(bucket_iter, None)
+    while bucket_item is not None or db_item is not None:
+        if db_item is None or (bucket_item is not None and bucket_item[0] < db_item[0]):
+            yield bucket_item[0], bucket_item[1], None
+            bucket_item = next(bucket_iter, None)
+        elif bucket_item is None or db_item[0] < bucket_item[0]:
+            yield db_item[0], None, db_item[1]
+            db_item = next(db_iter, None)
+        else:
+            yield bucket_item[0], bucket_item[1], db_item[1]
+            bucket_item = next(bucket_iter, None)
+            db_item = next(db_iter, None)
+
+
+class Fixer:
+    """
+    Buffers fixes and applies them in batches of `DELETE_BATCH_SIZE`.
+    """
+
+    def __init__(self, client, bucket_name: str, bucket_id, report: ReconcileReport):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.bucket_id = bucket_id
+        self.report = report
+        self.orphan_keys = []
+        self.stale_ids = []
+        self.missing_ids = []
+        self.sizes = {}
+
+    def add(self, category: str, key: str, bucket_size, db_row):
+        if category == ORPHAN:
+            self.orphan_keys.append(key)
+        elif category == STALE_PREFLIGHT:
+            self.stale_ids.append(db_row[0])
+        elif category == MISSING:
+            self.missing_ids.append(db_row[0])
+        elif category in (UNCONFIRMED, SIZE_MISMATCH):
+            self.sizes[db_row[0]] = bucket_size
+        pending = (
+            len(self.orphan_keys)
+            + len(self.stale_ids)
+            + len(self.missing_ids)
+            + len(self.sizes)
+        )
+        if pending >= DELETE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        Object = apps.get_model("django_r2", "Object")
+        if self.orphan_keys:
+            response = self.client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={
+                    "Objects": [{"Key": key} for key in self.orphan_keys],
+                    "Quiet": True,
+                },
+            )
+            self.report.fixed += len(self.orphan_keys) - len(response.get("Errors", []))
+        if self.stale_ids:
+            Object.objects.filter(id__in=self.stale_ids).delete()
+            self.report.fixed += len(self.stale_ids)
+        if self.missing_ids:
+            now = django_timezone.now()
+            self.report.fixed += Object.objects.filter(id__in=self.missing_ids).update(
+                uploaded=False,
+                errors={"reconcile": "Missing from bucket"},
+                errors_at=now,
+                updated_at=now,
+            )
+        if self.sizes:
+            now = django_timezone.now()
+            instances = list(Object.objects.filter(id__in=list(self.sizes)))
+            for instance in instances:
+                size = self.sizes[instance.id]
+                instance.uploaded = True
+                instance.uploaded_size = size
+                instance.display_size = humanize_filesize(size)
+                instance.uploaded_at = instance.uploaded_at or now
+                instance.updated_at = now
+            Object.objects.bulk_update(
+                instances,
+                [
+                    "uploaded",
+                    "uploaded_size",
+                    "display_size",
+                    "uploaded_at",
+                    "updated_at",
+                ],
+            )
+            self.report.fixed += len(instances)
+        if self.stale_ids or self.missing_ids or self.sizes:
+            # update()/bulk_update() skip the post_save receivers
+            objects_services.clear_cache_for_bucket_objects(self.bucket_id)
+        self.orphan_keys, self.stale_ids, self.missing_ids = [], [], []
+        self.sizes = {}
+
+
+def reconcile_prefix(
+    client,
+    bucket_name: str,
+    bucket_id,
+    prefix: str,
+    fix: bool = False,
+    stale_before: Optional[datetime] = None,
+    orphan_grace: timedelta = timedelta(minutes=15),
+) -> ReconcileReport:
+    if fix and parse_date_prefix(prefix) is None:
+        # Without rows to match, every key under it would be deleted
+        raise ValueError(f"Refusing to fix {prefix!r}: not a YYYY/M/D/ prefix")
+    report = ReconcileReport(prefix=prefix)
+    fixer = Fixer(client, bucket_name, bucket_id, report) if fix else None
+    # Before the rows are read: anything newer may be a live upload
+    recent_after = django_timezone.now() - orphan_grace
+    joined = merge_join(
+        iter_bucket_keys(client, bucket_name, prefix), iter_db_keys(bucket_id, prefix)
+    )
+    for key, bucket_entry, db_row in joined:
+        category = None
+        bucket_size = None
+        if bucket_entry is not None:
+            bucket_size, last_modified = bucket_entry
+        if db_row is None:
+            category = ORPHAN if last_modified < recent_after else RECENT_ORPHAN
+        else:
+            _, uploaded, uploaded_size, created_at = db_row
+            if bucket_size is None:
+                if uploaded:
+                    category = MISSING
+                elif stale_before is not None and created_at < stale_before:
+                    category = STALE_PREFLIGHT
+            elif not uploaded:
+                category = UNCONFIRMED
+            elif uploaded_size != bucket_size:
+                category = SIZE_MISMATCH
+            else:
+                report.matched += 1
+        if category is None:
+            continue
+        report.record(category, key)
+        if fixer is not None:
+            fixer.add(category, key, bucket_size, db_row)
+    if fixer is not None:
+        fixer.flush()
+    return report
+
+
+def reconcile_bucket(
+    bucket,
+    client,
+    prefixes: Optional[list[str]] = None,
+    fix: bool = False,
+    stale_after: timedelta = timedelta(days=1),
+    orphan_grace: timedelta = timedelta(minutes=15),
+    max_workers: int = 8,
+    on_prefix: Optional[Callable[[ReconcileReport], None]] = None,
+) -> ReconcileReport:
+    """
+    Reconcile `bucket` day prefix by day prefix (all of them unless
+    `prefixes` is given). Unconfirmed rows older than `stale_after`
+    count as stale preflights; orphan keys newer than `orphan_grace`
+    before their prefix was checked are left alone.
+    """
+    if prefixes is None:
+        prefixes = all_date_prefixes(client, bucket.name, bucket.id)
+    stale_before = django_timezone.now() - stale_after
+    total = ReconcileReport(prefix="")
+
+    def run(prefix):
+        try:
+            return reconcile_prefix(
+                client,
+                bucket.name,
+                bucket.id,
+                prefix,
+                fix,
+                stale_before,
+                orphan_grace=orphan_grace,
+            )
+        finally:
+            # Runs on worker threads
+            close_old_connections()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for report in executor.map(run, prefixes):
+            total.merge(report)
+            if on_prefix is not None:
+                on_prefix(report)
+    return total
@@ -0,0 +1,140 @@
+"""
+Compact cache format for object listings.
+
+A cached listing page is a `marshal`-encoded tuple of plain values
+(bytes, str, int, bool, None) instead of a pickled `Page` of model
+instances: ids are stored as 16 raw bytes and datetimes as integer
+microseconds since the epoch. Reads rebuild `ObjectRow` tuples,
+which carry only what the list renders. marshal's format can change
+between Python versions, so the cache key also carries the running
+Python's major and minor version.
+"""
+
+import datetime
+import marshal
+import uuid
+from typing import NamedTuple, Optional
+
+from django.urls import reverse
+
+# Bump when the row layout changes; it is part of the cache key.
+ROW_FORMAT_VERSION = 1
+
+MARSHAL_VERSION = 4
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+NAIVE_EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class ObjectRow(NamedTuple):
+    id: uuid.UUID
+    bucket_id: uuid.UUID
+    keyname: Optional[str]
+    filename: Optional[str]
+    file_extension: Optional[str]
+    downloadable_filename: Optional[str]
+    uploaded_size: Optional[int]
+    display_size: Optional[str]
+    uploaded_type: Optional[str]
+    is_image_file: bool
+    is_video_file: bool
+    is_audio_file: bool
+    uploaded: bool
+    uploaded_at: Optional[datetime.datetime]
+    created_at: datetime.datetime
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def uuid(self):
+        return self.id
+
+    @property
+    def type(self) -> str:
+        return self.uploaded_type or ""
+
+    def get_absolute_url(self):
+        return reverse(
+            "django_r2:objects-detail",
+            kwargs={"bucket_id": self.bucket_id, "pk": self.id},
+        )
+
+    def get_proxy_download_url(self):
+        return reverse(
+            "django_r2:objects-download",
+            kwargs={"bucket_id": self.bucket_id, "pk": self.id},
+        )
+
+
+# Columns selected for a listing, in `ObjectRow` order
+OBJECT_ROW_FIELDS = list(ObjectRow._fields)
+
+
+def _encode_datetime(value: Optional[datetime.datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    epoch = NAIVE_EPOCH if value.tzinfo is None else EPOCH
+    return (value - epoch) // MICROSECOND
+
+
+def _decode_datetime(value: Optional[int], aware: bool) -> Optional[datetime.datetime]:
+    if value is None:
+        return None
+    return (EPOCH if aware else NAIVE_EPOCH) + datetime.timedelta(microseconds=value)
+
+
+def encode_row(row: ObjectRow) -> tuple:
+    return (
+        row.id.bytes,
+        row.bucket_id.bytes,
+        row.keyname,
+        row.filename,
+        row.file_extension,
+        row.downloadable_filename,
+        row.uploaded_size,
+        row.display_size,
+        row.uploaded_type,
+        row.is_image_file,
+        row.is_video_file,
+        row.is_audio_file,
+        row.uploaded,
+        _encode_datetime(row.uploaded_at),
+        _encode_datetime(row.created_at),
+    )
+
+
+def decode_row(values: tuple, aware: bool = True) -> ObjectRow:
+    (
+        object_id,
+        bucket_id,
+        *middle,
+        uploaded_at,
+        created_at,
+    ) = values
+    return ObjectRow(
+        uuid.UUID(bytes=object_id),
+        uuid.UUID(bytes=bucket_id),
+        *middle,
+        _decode_datetime(uploaded_at, aware),
+        _decode_datetime(created_at, aware),
+    )
+
+
+def dump_rows(rows, *extra) -> bytes:
+    """
+    Encode `rows` plus any `extra` plain values (cursors, ...).
+    """
+    aware = bool(rows) and rows[0].created_at.tzinfo is not None
+    return marshal.dumps(
+        (aware, tuple(encode_row(row) for row in rows), extra), MARSHAL_VERSION
+    )
+
+
+def load_rows(payload: bytes):
+    """
+    Inverse of `dump_rows`: returns `(rows, extra)`.
+    """
+    aware, encoded, extra = marshal.loads(payload)
+    return [decode_row(values, aware) for values in encoded], extra
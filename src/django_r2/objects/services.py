@@ -1,13 +1,32 @@
+import datetime
+import hashlib
+import sys
+import time
 import uuid
 from typing import Optional
 
 from django.apps import apps
 from django.core.cache import cache
-from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
 
-from django_r2 import settings
+from django_r2 import metrics, settings
+from django_r2.helpers.myboto.presign import get_signing_window
+from django_r2.objects.pagination import (
+    KeysetPage,
+    apaginate_by_cursor,
+    paginate_by_cursor,
+)
+from django_r2.objects.rows import (
+    OBJECT_ROW_FIELDS,
+    ROW_FORMAT_VERSION,
+    ObjectRow,
+    dump_rows,
+    load_rows,
+)
 
 DJANGO_R2_BUCKET_CACHE_FORMAT = "django_r2:bucket:{bucket_id}"
+DJANGO_R2_BUCKET_GENERATION_CACHE_FORMAT = "django_r2:bucket:{bucket_id}:generation"
 DJANGO_R2_BUCKET_CACHE_TTL = getattr(
     settings, "DJANGO_R2_BUCKET_CACHE_TTL", 60 * 60 * 24 * 7
 )
@@ -17,13 +36,20 @@ DJANGO_R2_OBJECT_CACHE_TTL = getattr(
     settings, "DJANGO_R2_OBJECT_CACHE_TTL", 60 * 60 * 24 * 7
 )
 
+DJANGO_R2_DOWNLOAD_URL_CACHE_FORMAT = "django_r2:download_url:{digest}"
+DJANGO_R2_PRESIGN_WINDOW_SECONDS = getattr(
+    settings, "DJANGO_R2_PRESIGN_WINDOW_SECONDS", 0
+)
+
 
 def preflight_object_create(
+    bucket_id,
     filename,
     user,
 ):
-    Object = apps.get_model("objects", "Object")
+    Object = apps.get_model("django_r2", "Object")
     obj = Object.objects.create(
+        bucket_id=bucket_id,
         filename=filename,
         added_by=user,
         source=Object.SourceChoices.USER,
@@ -31,16 +57,104 @@ def preflight_object_create(
     return obj
 
 
+async def apreflight_object_create(
+    bucket_id,
+    filename,
+    user,
+):
+    Object = apps.get_model("django_r2", "Object")
+    return await Object.objects.acreate(
+        bucket_id=bucket_id,
+        filename=filename,
+        added_by=user,
+        source=Object.SourceChoices.USER,
+    )
+
+
+def build_preflight_objects(bucket_id, filenames, user) -> list:
+    Object = apps.get_model("django_r2", "Object")
+    objs = []
+    for filename in filenames:
+        obj = Object(
+            bucket_id=bucket_id,
+            filename=filename,
+            added_by=user,
+            source=Object.SourceChoices.USER,
+        )
+        obj.populate_derived_fields()
+        objs.append(obj)
+    return objs
+
+
+def preflight_objects_bulk_create(
+    bucket_id,
+    filenames,
+    user,
+):
+    """
+    Create one `Object` per filename with a single `bulk_create`.
+    """
+    Object = apps.get_model("django_r2", "Object")
+    objs = build_preflight_objects(bucket_id, filenames, user)
+    # created_at (auto_now_add) is set on each instance during the insert
+    objs = Object.objects.bulk_create(objs)
+    # bulk_create() doesn't send post_save
+    clear_cache_for_bucket_objects(bucket_id)
+    return objs
+
+
+async def apreflight_objects_bulk_create(
+    bucket_id,
+    filenames,
+    user,
+):
+    Object = apps.get_model("django_r2", "Object")
+    objs = build_preflight_objects(bucket_id, filenames, user)
+    objs = await Object.objects.abulk_create(objs)
+    await aclear_cache_for_bucket_objects(bucket_id)
+    return objs
+
+
 def postflight_object_update(
     object_data,
     uploaded: bool = False,
     errors: Optional[dict] = None,
     file_data: Optional[dict] = None,
 ):
-    Object = apps.get_model("objects", "Object")
+    Object = apps.get_model("django_r2", "Object")
     instance = Object.objects.get(
-        id=object_data["object_id"], project__id=object_data["project_id"]
+        id=object_data["object_id"], bucket__id=object_data["bucket_id"]
+    )
+    apply_postflight_data(
+        instance, uploaded=uploaded, errors=errors, file_data=file_data
     )
+    instance.save()
+    return instance
+
+
+async def apostflight_object_update(
+    object_data,
+    uploaded: bool = False,
+    errors: Optional[dict] = None,
+    file_data: Optional[dict] = None,
+):
+    Object = apps.get_model("django_r2", "Object")
+    instance = await Object.objects.aget(
+        id=object_data["object_id"], bucket__id=object_data["bucket_id"]
+    )
+    apply_postflight_data(
+        instance, uploaded=uploaded, errors=errors, file_data=file_data
+    )
+    await instance.asave()
+    return instance
+
+
+def apply_postflight_data(
+    instance,
+    uploaded: bool = False,
+    errors: Optional[dict] = None,
+    file_data: Optional[dict] = None,
+):
     instance.uploaded = uploaded
     instance.errors = errors
     if isinstance(file_data, dict):
@@ -50,47 +164,277 @@ def postflight_object_update(
         instance.uploaded_width = file_data.get("width") or None
         instance.uploaded_height = file_data.get("height") or None
         instance.uploaded_metadata = file_data
-    instance.save()
-    return instance
+
+
+POSTFLIGHT_UPDATE_FIELDS = [
+    "uploaded",
+    "uploaded_at",
+    "uploaded_size",
+    "uploaded_type",
+    "uploaded_duration",
+    "uploaded_width",
+    "uploaded_height",
+    "uploaded_metadata",
+    "display_size",
+    "is_image_file",
+    "is_video_file",
+    "is_audio_file",
+    "errors",
+    "errors_at",
+    "updated_at",
+]
+
+
+def postflight_objects_bulk_update(updates: list[dict]):
+    """
+    Batch version of `postflight_object_update`.
+
+    `updates` is a list of dicts with `object_data` (already
+    verified), `uploaded`, and optional `errors` and `file_data`.
+    Rows are read with one query and written with one `bulk_update`.
+    Returns the updated instances.
+    """
+    Object = apps.get_model("django_r2", "Object")
+    if not updates:
+        return []
+    by_id = {str(update["object_data"]["object_id"]): update for update in updates}
+    instances = list(Object.objects.filter(id__in=list(by_id.keys())))
+    updated = apply_postflight_updates(instances, by_id)
+    Object.objects.bulk_update(updated, POSTFLIGHT_UPDATE_FIELDS, batch_size=500)
+    # bulk_update() doesn't send post_save
+    for bucket_id in {instance.bucket_id for instance in updated}:
+        clear_cache_for_bucket_objects(bucket_id)
+    for instance in updated:
+        clear_cache_for_object(instance.id)
+    return updated
+
+
+async def apostflight_objects_bulk_update(updates: list[dict]):
+    Object = apps.get_model("django_r2", "Object")
+    if not updates:
+        return []
+    by_id = {str(update["object_data"]["object_id"]): update for update in updates}
+    instances = [
+        instance async for instance in Object.objects.filter(id__in=list(by_id.keys()))
+    ]
+    updated = apply_postflight_updates(instances, by_id)
+    await Object.objects.abulk_update(updated, POSTFLIGHT_UPDATE_FIELDS, batch_size=500)
+    for bucket_id in {instance.bucket_id for instance in updated}:
+        await aclear_cache_for_bucket_objects(bucket_id)
+    await cache.adelete_many(
+        [
+            DJANGO_R2_OBJECT_CACHE_FORMAT.format(object_id=instance.id)
+            for instance in updated
+        ]
+    )
+    return updated
+
+
+def apply_postflight_updates(instances, by_id: dict) -> list:
+    """
+    Apply each instance's update from `by_id` (keyed by object id);
+    instances whose signed bucket doesn't match are skipped.
+    """
+    now = timezone.now()
+    updated = []
+    for instance in instances:
+        update = by_id[str(instance.id)]
+        if str(instance.bucket_id) != str(update["object_data"]["bucket_id"]):
+            continue
+        apply_postflight_data(
+            instance,
+            uploaded=update.get("uploaded", False),
+            errors=update.get("errors"),
+            file_data=update.get("file_data"),
+        )
+        instance.populate_derived_fields()
+        # bulk_update() skips auto_now
+        instance.updated_at = now
+        updated.append(instance)
+    return updated
+
+
+def parse_s3_key(key: str) -> Optional[tuple[datetime.date, str]]:
+    """
+    `(day, keyname)` for a `<YYYY/M/D>/<keyname>` key, as built by
+    `Object.get_s3_key()`, or None for any other key.
+    """
+    parts = str(key).split("/")
+    if len(parts) != 4 or not parts[3]:
+        return None
+    try:
+        day = datetime.date(int(parts[0]), int(parts[1]), int(parts[2]))
+    except ValueError:
+        return None
+    return day, parts[3]
+
+
+def delete_objects_for_keys(bucket_id, keys):
+    """
+    Delete the `Object` rows whose S3 keys were just deleted.
+    Keynames only carry a short id suffix and repeat across days, so
+    rows are matched on the full key: keyname plus the (UTC) day of
+    `created_at` that the key's date folders name.
+    """
+    Object = apps.get_model("django_r2", "Object")
+    by_day = {}
+    for key in keys:
+        parsed = parse_s3_key(key)
+        if parsed is not None:
+            by_day.setdefault(parsed[0], set()).add(parsed[1])
+    if not by_day:
+        return 0, {}
+    query = Q()
+    for day, keynames in by_day.items():
+        start = datetime.datetime.combine(
+            day, datetime.time.min, tzinfo=datetime.timezone.utc
+        )
+        query |= Q(
+            created_at__gte=start,
+            created_at__lt=start + datetime.timedelta(days=1),
+            keyname__in=keynames,
+        )
+    return Object.objects.filter(query, bucket_id=bucket_id).delete()
+
+
+def get_bucket_cache_generation(bucket_id) -> int:
+    """
+    Every cached page of a bucket's listing is keyed by the bucket's
+    current generation, so bumping it invalidates all of them at once.
+    """
+    key = DJANGO_R2_BUCKET_GENERATION_CACHE_FORMAT.format(bucket_id=bucket_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Start from the clock rather than 1, so a generation evicted
+        # from the cache can't be reused for stale pages.
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key, 0)
+    return generation
+
+
+async def aget_bucket_cache_generation(bucket_id) -> int:
+    key = DJANGO_R2_BUCKET_GENERATION_CACHE_FORMAT.format(bucket_id=bucket_id)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, time.time_ns(), None)
+        generation = await cache.aget(key, 0)
+    return generation
 
 
 def clear_cache_for_bucket_objects(bucket_id):
-    cache_key_base = f"django_r2:bucket:{bucket_id}"
-    cache.delete(cache_key_base)
+    key = DJANGO_R2_BUCKET_GENERATION_CACHE_FORMAT.format(bucket_id=bucket_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+async def aclear_cache_for_bucket_objects(bucket_id):
+    key = DJANGO_R2_BUCKET_GENERATION_CACHE_FORMAT.format(bucket_id=bucket_id)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, time.time_ns(), None)
+
+
+def clear_cache_for_object(object_id):
+    cache.delete(DJANGO_R2_OBJECT_CACHE_FORMAT.format(object_id=object_id))
 
 
 def get_paginated_objects_for_bucket(
     bucket_id: uuid.UUID | str,
-    page: int = 1,
+    cursor: Optional[str] = None,
     page_size: int = 50,
     force_cache_refresh: bool = False,
 ):
-    Object = apps.get_model("objects", "Object")
-    if bucket_id is None:
-        return Object.objects.none()
-    if str(bucket_id) == "":
-        return Object.objects.none()
-    cache_key_base = DJANGO_R2_BUCKET_CACHE_FORMAT.format(bucket_id=bucket_id)
-    cache_key = f"{cache_key_base}:p{page}:s{page_size}"
+    """
+    Newest-first page of a bucket's objects as `ObjectRow`s.
+    `cursor` comes from the previous page's `next_cursor` or
+    `previous_cursor`; omit it for the first page.
+
+    Only the listed columns are selected (the JSON fields
+    `uploaded_metadata` and `errors` are left out) and the page
+    is cached in the compact format from `objects.rows`.
+    """
+    if bucket_id is None or str(bucket_id) == "":
+        return KeysetPage()
+    generation = get_bucket_cache_generation(bucket_id)
+    cache_key = get_page_cache_key(bucket_id, generation, cursor, page_size)
     cached_result = cache.get(cache_key)
+    hit = cached_result is not None and not force_cache_refresh
+    metrics.record_cache("object_page", hit)
+    if hit:
+        return load_cached_page(cached_result)
 
-    if cached_result is not None and not force_cache_refresh:
-        return cached_result
+    page_objects = paginate_by_cursor(
+        get_object_rows_queryset(bucket_id), cursor=cursor, page_size=page_size
+    )
+    page_objects.object_list = [ObjectRow(*row) for row in page_objects.object_list]
+    # Cache for 5 minutes (300 seconds)
+    cache.set(cache_key, dump_page(page_objects), 300)
+    return page_objects
 
-    queryset = Object.objects.filter(bucket__id=bucket_id).order_by("-created_at")
-    paginator = Paginator(queryset, page_size)
-    page_objects = paginator.get_page(page)
 
-    # Cache for 5 minutes (300 seconds)
-    cache.set(cache_key, page_objects, 300)
+async def aget_paginated_objects_for_bucket(
+    bucket_id: uuid.UUID | str,
+    cursor: Optional[str] = None,
+    page_size: int = 50,
+    force_cache_refresh: bool = False,
+):
+    """
+    Async `get_paginated_objects_for_bucket`, sharing its cache.
+    """
+    if bucket_id is None or str(bucket_id) == "":
+        return KeysetPage()
+    generation = await aget_bucket_cache_generation(bucket_id)
+    cache_key = get_page_cache_key(bucket_id, generation, cursor, page_size)
+    cached_result = await cache.aget(cache_key)
+    hit = cached_result is not None and not force_cache_refresh
+    metrics.record_cache("object_page", hit)
+    if hit:
+        return load_cached_page(cached_result)
+
+    page_objects = await apaginate_by_cursor(
+        get_object_rows_queryset(bucket_id), cursor=cursor, page_size=page_size
+    )
+    page_objects.object_list = [ObjectRow(*row) for row in page_objects.object_list]
+    await cache.aset(cache_key, dump_page(page_objects), 300)
     return page_objects
 
 
+def get_object_rows_queryset(bucket_id):
+    Object = apps.get_model("django_r2", "Object")
+    return Object.objects.filter(bucket_id=bucket_id).values_list(
+        *OBJECT_ROW_FIELDS, named=True
+    )
+
+
+def get_page_cache_key(bucket_id, generation: int, cursor, page_size: int) -> str:
+    cache_key_base = DJANGO_R2_BUCKET_CACHE_FORMAT.format(bucket_id=bucket_id)
+    # marshal output is only guaranteed to load on the Python that wrote it
+    python_version = "%d.%d" % sys.version_info[:2]
+    return (
+        f"{cache_key_base}:g{generation}:r{ROW_FORMAT_VERSION}:py{python_version}"
+        f":c{cursor or ''}:s{page_size}"
+    )
+
+
+def dump_page(page: KeysetPage) -> bytes:
+    return dump_rows(page.object_list, page.next_cursor, page.previous_cursor)
+
+
+def load_cached_page(payload: bytes) -> KeysetPage:
+    rows, (next_cursor, previous_cursor) = load_rows(payload)
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
 def get_object_by_id(object_id: uuid.UUID | str, force_cache_refresh: bool = False):
-    Object = apps.get_model("objects", "Object")
+    Object = apps.get_model("django_r2", "Object")
     cache_key = DJANGO_R2_OBJECT_CACHE_FORMAT.format(object_id=object_id)
     cached_result = cache.get(cache_key)
-    if cached_result is not None and not force_cache_refresh:
+    hit = cached_result is not None and not force_cache_refresh
+    metrics.record_cache("object", hit)
+    if hit:
         return cached_result
     try:
         instance = Object.objects.get(id=object_id)
@@ -98,3 +442,128 @@ def get_object_by_id(object_id: uuid.UUID | str, force_cache_refresh: bool = Fal
         return None
     cache.set(cache_key, instance, 300)
     return instance
+
+
+async def aget_object_by_id(
+    object_id: uuid.UUID | str, force_cache_refresh: bool = False
+):
+    Object = apps.get_model("django_r2", "Object")
+    cache_key = DJANGO_R2_OBJECT_CACHE_FORMAT.format(object_id=object_id)
+    cached_result = await cache.aget(cache_key)
+    hit = cached_result is not None and not force_cache_refresh
+    metrics.record_cache("object", hit)
+    if hit:
+        return cached_result
+    try:
+        instance = await Object.objects.aget(id=object_id)
+    except Object.DoesNotExist:
+        return None
+    await cache.aset(cache_key, instance, 300)
+    return instance
+
+
+def get_download_url(
+    bucket_credentials, key, filename=None, force_download: bool = False
+) -> str:
+    """
+    Presigned download URL for `key`.
+
+    With `DJANGO_R2_PRESIGN_WINDOW_SECONDS` set, the signing time is
+    aligned to that window so the same key/filename/disposition gives
+    the same URL (and browser/CDN cache hits) for the whole window;
+    the URL is memoized in the cache until the window rolls over.
+    """
+    return get_download_urls(
+        bucket_credentials, [(key, filename)], force_download=force_download
+    )[0]
+
+
+def get_download_urls(
+    bucket_credentials, items, force_download: bool = False
+) -> list[str]:
+    """
+    `get_download_url` for many `(key, filename)` pairs of one
+    bucket: one cache round trip and one signing pass.
+    """
+    items = [(str(key), filename) for key, filename in items]
+    window = DJANGO_R2_PRESIGN_WINDOW_SECONDS
+    if not window:
+        return bucket_credentials.presign_download_urls(
+            items, force_download=force_download
+        )
+    now = timezone.now()
+    signing_time, window_end = get_signing_window(
+        window, now=now, not_before=bucket_credentials.created_at
+    )
+    disposition = "attachment" if force_download else "inline"
+    cache_keys = []
+    for key, filename in items:
+        parts = [
+            bucket_credentials.access_key_id or "",
+            key,
+            filename or "",
+            disposition,
+            signing_time.isoformat(),
+        ]
+        digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+        cache_keys.append(DJANGO_R2_DOWNLOAD_URL_CACHE_FORMAT.format(digest=digest))
+    cached = cache.get_many(cache_keys)
+    missing = [
+        (cache_key, item)
+        for cache_key, item in zip(cache_keys, items)
+        if cache_key not in cached
+    ]
+    metrics.record_cache("download_url", True, len(cache_keys) - len(missing))
+    metrics.record_cache("download_url", False, len(missing))
+    if missing:
+        urls = bucket_credentials.presign_download_urls(
+            [item for _, item in missing],
+            force_download=force_download,
+            signing_time=signing_time,
+        )
+        signed = {cache_key: url for (cache_key, _), url in zip(missing, urls)}
+        valid_until = window_end
+        if bucket_credentials.expires_at is not None:
+            valid_until = min(valid_until, bucket_credentials.expires_at)
+        timeout = int((valid_until - now).total_seconds())
+        if timeout > 0:
+            cache.set_many(signed, timeout)
+        cached.update(signed)
+    return [cached[cache_key] for cache_key in cache_keys]
+
+
+def get_download_urls_for_objects(instances, force_download: bool = False) -> dict:
+    """
+    `{object_id: url}` for `instances` (which may span buckets),
+    fetching credentials once per bucket. Objects without a
+    keyname are skipped; objects in a bucket without credentials
+    map to None.
+    """
+    # buckets.services imports this module
+    from django_r2.buckets import services as buckets_services
+
+    by_bucket = {}
+    for instance in instances:
+        # get_s3_key() is never empty (it always has the date folders)
+        if instance.keyname:
+            by_bucket.setdefault(instance.bucket_id, []).append(instance)
+    urls = {}
+    for bucket_id, bucket_instances in by_bucket.items():
+        bucket_credentials = buckets_services.get_today_bucket_credentials_by_bucket_id(
+            bucket_id
+        )
+        if bucket_credentials is None:
+            for instance in bucket_instances:
+                urls[str(instance.id)] = None
+            continue
+        bucket_urls = get_download_urls(
+            bucket_credentials,
+            [
+                (instance.get_s3_key(), instance.get_download_filename())
+                for instance in bucket_instances
+            ],
+            force_download=force_download,
+        )
+        for instance, url in zip(bucket_instances, bucket_urls):
+            urls[str(instance.id)] = url
+    return urls
@@ -0,0 +1,196 @@
+"""
+Streaming proxy downloads.
+
+With `DJANGO_R2_PROXY_STREAMING` on, `ObjectProxyDownloadView` serves
+the object's bytes itself instead of redirecting to a presigned R2
+URL, so the R2 hostname is never exposed. `Range`, `If-None-Match`
+and `If-Modified-Since` are forwarded to `get_object`; R2's 206/304
+answers are passed through. `If-Range` is sent as `If-Match` (an
+ETag) or `If-Unmodified-Since` (a date); when it fails, the whole
+object is fetched again and sent as a 200. The body is relayed in
+fixed-size chunks (`DJANGO_R2_PROXY_CHUNK_SIZE`) without ever being
+buffered whole.
+
+`stream_object` is for sync views; `astream_object` reads the body
+off the event loop so a slow client only holds a coroutine under ASGI.
+"""
+
+import datetime
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from botocore.exceptions import ClientError
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.http import http_date, parse_http_date_safe
+
+from django_r2 import settings
+from django_r2.helpers.myboto.client import get_content_disposition
+
+# Response headers copied from R2, keyed by `get_object` response field
+PASSTHROUGH_HEADERS = {
+    "ContentType": "Content-Type",
+    "ContentLength": "Content-Length",
+    "ContentRange": "Content-Range",
+    "ETag": "ETag",
+    "CacheControl": "Cache-Control",
+}
+
+
+def get_object_params(request, bucket: str, key: str) -> dict:
+    """
+    `get_object` parameters, forwarding the client's conditional
+    and range headers.
+    """
+    params = {"Bucket": bucket, "Key": key}
+    if request.headers.get("Range"):
+        if_range = request.headers.get("If-Range", "").strip()
+        unmodified_since = parse_http_date_safe(if_range)
+        if not if_range:
+            params["Range"] = request.headers["Range"]
+        elif unmodified_since is not None:
+            params["Range"] = request.headers["Range"]
+            params["IfUnmodifiedSince"] = datetime.datetime.fromtimestamp(
+                unmodified_since, datetime.timezone.utc
+            )
+        elif if_range.startswith('"'):
+            params["Range"] = request.headers["Range"]
+            params["IfMatch"] = if_range
+        # A weak ETag never matches: ignore the Range
+    if request.headers.get("If-None-Match"):
+        params["IfNoneMatch"] = request.headers["If-None-Match"]
+    modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since"))
+    if modified_since is not None:
+        params["IfModifiedSince"] = datetime.datetime.fromtimestamp(
+            modified_since, datetime.timezone.utc
+        )
+    return params
+
+
+def get_full_object_params(params: dict) -> dict:
+    """
+    `params` without the range and its `If-Range` condition.
+    """
+    return {
+        name: value
+        for name, value in params.items()
+        if name not in ("Range", "IfMatch", "IfUnmodifiedSince")
+    }
+
+
+def is_if_range_failure(params: dict, error: ClientError) -> bool:
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    code = error.response.get("Error", {}).get("Code")
+    return ("IfMatch" in params or "IfUnmodifiedSince" in params) and (
+        status == 412 or code in ("412", "PreconditionFailed")
+    )
+
+
+def get_error_response(error: ClientError) -> Optional[HttpResponse]:
+    """
+    The response for an R2 error the client should see, or None
+    to re-raise it.
+    """
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    code = error.response.get("Error", {}).get("Code")
+    headers = error.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    if status == 304 or code == "304":
+        response = HttpResponseNotModified()
+        for header in ("etag", "last-modified", "cache-control"):
+            if headers.get(header):
+                response[header] = headers[header]
+        return response
+    if status == 416 or code == "InvalidRange":
+        response = HttpResponse(status=416)
+        if headers.get("content-range"):
+            response["Content-Range"] = headers["content-range"]
+        return response
+    if status == 404 or code in ("404", "NoSuchKey"):
+        raise Http404("File not found")
+    return None
+
+
+def set_response_headers(response, s3_response: dict, filename: Optional[str]):
+    for field, header in PASSTHROUGH_HEADERS.items():
+        if s3_response.get(field) is not None:
+            response[header] = str(s3_response[field])
+    if s3_response.get("LastModified") is not None:
+        response["Last-Modified"] = http_date(s3_response["LastModified"].timestamp())
+    response["Accept-Ranges"] = "bytes"
+    disposition = get_content_disposition(filename, force_download=True)
+    if disposition:
+        response["Content-Disposition"] = disposition
+    return response
+
+
+def iter_body(body, chunk_size: int = settings.DJANGO_R2_PROXY_CHUNK_SIZE):
+    try:
+        yield from body.iter_chunks(chunk_size)
+    finally:
+        body.close()
+
+
+async def aiter_body(body, chunk_size: int = settings.DJANGO_R2_PROXY_CHUNK_SIZE):
+    read = sync_to_async(body.read, thread_sensitive=False)
+    try:
+        while True:
+            chunk = await read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(body.close, thread_sensitive=False)()
+
+
+def stream_object(request, my_s3_client, key: str, filename: Optional[str] = None):
+    """
+    Proxy `key` to the client as a `StreamingHttpResponse` (200 or
+    206), or a 304/416 passed through from R2.
+    """
+    params = get_object_params(request, my_s3_client.bucket, key)
+    get_object = my_s3_client.client.get_object
+    try:
+        try:
+            s3_response = get_object(**params)
+        except ClientError as e:
+            if not is_if_range_failure(params, e):
+                raise
+            # The object changed since the client's copy: send all of it
+            s3_response = get_object(**get_full_object_params(params))
+    except ClientError as e:
+        response = get_error_response(e)
+        if response is None:
+            raise
+        return response
+    status = s3_response["ResponseMetadata"]["HTTPStatusCode"]
+    response = StreamingHttpResponse(iter_body(s3_response["Body"]), status=status)
+    return set_response_headers(response, s3_response, filename)
+
+
+async def astream_object(
+    request, my_s3_client, key: str, filename: Optional[str] = None
+):
+    """
+    `stream_object` for async views.
+    """
+    params = get_object_params(request, my_s3_client.bucket, key)
+    get_object = sync_to_async(my_s3_client.client.get_object, thread_sensitive=False)
+    try:
+        try:
+            s3_response = await get_object(**params)
+        except ClientError as e:
+            if not is_if_range_failure(params, e):
+                raise
+            s3_response = await get_object(**get_full_object_params(params))
+    except ClientError as e:
+        response = get_error_response(e)
+        if response is None:
+            raise
+        return response
+    status = s3_response["ResponseMetadata"]["HTTPStatusCode"]
+    response = StreamingHttpResponse(aiter_body(s3_response["Body"]), status=status)
+    return set_response_headers(response, s3_response, filename)
@@ -0,0 +1,227 @@
+"""
+Server-side verification of completed uploads.
+
+The completion endpoints trust the size/type the browser reports.
+When `DJANGO_R2_VERIFY_UPLOADS` is on, completed objects are queued
+here and checked off the request path: `head_object` is issued for
+each key on a thread pool and the bucket's `ContentLength`,
+`ContentType` and `ETag` are recorded with one `bulk_update` per
+batch. Keys that don't exist are marked as not uploaded.
+
+Without Celery/django-qstash, a single in-process dispatcher thread
+drains the queue in batches and reports HEAD latency (p50/p95).
+"""
+
+import logging
+import queue
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from asgiref.sync import sync_to_async
+from botocore.exceptions import ClientError
+from django.apps import apps
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from django_r2 import settings
+from django_r2.buckets import services as buckets_services
+from django_r2.helpers.formatting.humanize import humanize_filesize
+from django_r2.objects import services as objects_services
+
+DJANGO_R2_VERIFY_UPLOADS = getattr(settings, "DJANGO_R2_VERIFY_UPLOADS", False)
+DJANGO_R2_VERIFY_WORKERS = getattr(settings, "DJANGO_R2_VERIFY_WORKERS", 16)
+DJANGO_R2_VERIFY_BATCH_SIZE = getattr(settings, "DJANGO_R2_VERIFY_BATCH_SIZE", 100)
+
+VERIFY_UPDATE_FIELDS = [
+    "uploaded",
+    "uploaded_size",
+    "display_size",
+    "uploaded_type",
+    "is_image_file",
+    "is_video_file",
+    "is_audio_file",
+    "uploaded_etag",
+    "verified_at",
+    "errors",
+    "errors_at",
+    "updated_at",
+]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VerifyStats:
+    verified: int = 0
+    missing: int = 0
+    failed: int = 0
+    head_seconds: list = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> dict:
+        latencies = sorted(self.head_seconds)
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        return {
+            "verified": self.verified,
+            "missing": self.missing,
+            "failed": self.failed,
+            "seconds": round(time.monotonic() - self.started_at, 3),
+            "head_p50_ms": (
+                round(statistics.median(latencies) * 1000, 1) if latencies else 0
+            ),
+            "head_p95_ms": round(p95 * 1000, 1),
+        }
+
+
+def head_object(client, bucket: str, key: str):
+    """
+    `(response, seconds)`; `response` is None when the key is missing.
+    """
+    start = time.perf_counter()
+    try:
+        response = client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey"):
+            raise
+        response = None
+    return response, time.perf_counter() - start
+
+
+def verify_objects(object_ids, max_workers: int = DJANGO_R2_VERIFY_WORKERS):
+    """
+    HEAD every object's key and record what the bucket reports.
+    """
+    Object = apps.get_model("django_r2", "Object")
+    stats = VerifyStats()
+    instances = list(Object.objects.filter(id__in=list(object_ids), uploaded=True))
+    by_bucket = {}
+    for instance in instances:
+        by_bucket.setdefault(instance.bucket_id, []).append(instance)
+
+    now = timezone.now()
+    changed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for bucket_id, bucket_instances in by_bucket.items():
+            cred_obj = buckets_services.get_today_bucket_credentials_by_bucket_id(
+                bucket_id
+            )
+            my_s3_client = cred_obj.get_my_s3_client()
+            futures = [
+                executor.submit(
+                    head_object,
+                    my_s3_client.client,
+                    my_s3_client.bucket,
+                    instance.get_s3_key(),
+                )
+                for instance in bucket_instances
+            ]
+            for instance, future in zip(bucket_instances, futures):
+                try:
+                    response, seconds = future.result()
+                except Exception as e:
+                    logger.warning("Could not verify %s: %s", instance.id, e)
+                    stats.failed += 1
+                    continue
+                stats.head_seconds.append(seconds)
+                instance.verified_at = now
+                instance.updated_at = now
+                if response is None:
+                    stats.missing += 1
+                    instance.uploaded = False
+                    instance.errors = {"verify": "Not found in bucket"}
+                    instance.errors_at = now
+                else:
+                    stats.verified += 1
+                    instance.uploaded_size = response.get("ContentLength")
+                    if instance.uploaded_size is not None:
+                        instance.display_size = humanize_filesize(
+                            instance.uploaded_size
+                        )
+                    instance.uploaded_type = (
+                        response.get("ContentType") or instance.uploaded_type
+                    )
+                    instance.uploaded_etag = response.get("ETag")
+                    # is_image_file and friends follow uploaded_type
+                    instance.populate_derived_fields()
+                changed.append(instance)
+
+    Object.objects.bulk_update(changed, VERIFY_UPDATE_FIELDS)
+    # bulk_update() doesn't send post_save
+    for bucket_id in by_bucket:
+        objects_services.clear_cache_for_bucket_objects(bucket_id)
+    for instance in changed:
+        objects_services.clear_cache_for_object(instance.id)
+    logger.info("Upload verification: %s", stats.as_dict())
+    return stats
+
+
+class VerificationQueue:
+    """
+    Collects object ids from request threads and verifies them in
+    batches on a single daemon thread.
+    """
+
+    def __init__(self, batch_size: int = DJANGO_R2_VERIFY_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def put(self, object_ids):
+        for object_id in object_ids:
+            self._queue.put(object_id)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=0.05))
+                except queue.Empty:
+                    break
+            try:
+                verify_objects(batch)
+            except Exception:
+                logger.exception("Upload verification failed")
+            finally:
+                close_old_connections()
+
+
+verification_queue = VerificationQueue()
+
+
+def enqueue_verification(object_ids):
+    object_ids = [str(object_id) for object_id in object_ids]
+    if not object_ids:
+        return
+    # tasks imports this module
+    from django_r2.tasks import verify_uploaded_objects_task
+
+    if callable(getattr(verify_uploaded_objects_task, "delay", None)):
+        verify_uploaded_objects_task.delay(object_ids)
+        return
+    verification_queue.put(object_ids)
+
+
+def schedule_verification(object_ids):
+    """
+    Verify `object_ids` once the current transaction commits,
+    if `DJANGO_R2_VERIFY_UPLOADS` is on.
+    """
+    if not DJANGO_R2_VERIFY_UPLOADS:
+        return
+    object_ids = list(object_ids)
+    if object_ids:
+        transaction.on_commit(lambda: enqueue_verification(object_ids))
+
+
+async def aschedule_verification(object_ids):
+    if DJANGO_R2_VERIFY_UPLOADS:
+        await sync_to_async(schedule_verification)(list(object_ids))
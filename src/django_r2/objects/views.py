@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-import time
-
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponseBadRequest
-from django.shortcuts import redirect
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, HttpResponseBadRequest
+from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views.generic import DeleteView, DetailView, ListView, View
 
+from django_r2 import settings
 from django_r2.models import Object
-from django_r2.services import buckets as buckets_services
-from django_r2.services import objects as objects_services
+from django_r2.buckets import services as buckets_services
+from django_r2.objects import services as objects_services
+from django_r2.objects import streaming as objects_streaming
+
+DJANGO_R2_PROXY_STREAMING = getattr(settings, "DJANGO_R2_PROXY_STREAMING", False)
 
 
 class ObjectListView(LoginRequiredMixin, ListView):
@@ -19,40 +23,54 @@ class ObjectListView(LoginRequiredMixin, ListView):
     """
 
     template_name = "objects/list.html"
-    paginate_by = 50
+    # Pages are cut by `get_paginated_objects_for_bucket` (keyset
+    # cursors), not by ListView's offset paginator.
+    page_size = 50
 
     def get_queryset(self):
-        request = self.request
         bucket_id = self.kwargs.get("bucket_id")
+        # Cached pages are invalidated by the bucket's cache generation
+        self.page = objects_services.get_paginated_objects_for_bucket(
+            bucket_id,
+            cursor=self.request.GET.get("cursor"),
+            page_size=self.page_size,
+        )
+        return self.page.object_list
 
-        # Track refresh timestamps
-        refresh_history = request.session.get("objects_refresh_history", [])
-        current_time = time.time()
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["page_obj"] = self.page
+        context["is_paginated"] = self.page.has_next() or self.page.has_previous()
+        return context
 
-        # Remove timestamps older than 10 seconds
-        refresh_history = [t for t in refresh_history if current_time - t <= 10]
-        refresh_history.append(current_time)
-        request.session["objects_refresh_history"] = refresh_history
 
-        # Set refresh_cache to True if there are 3 or more refreshes within 10 seconds
-        refresh_cache = request.session.get("refresh_objects_cache", False)
-        if len(refresh_history) >= 3:
-            refresh_cache = True
-            refresh_history.clear()
-            request.session["objects_refresh_history"] = refresh_history
+class AsyncObjectListView(View):
+    """
+    `ObjectListView` for ASGI, reading pages with the async ORM
+    and cache.
+    """
 
-        qs = objects_services.get_paginated_objects_for_bucket(
-            bucket_id,
-            page=self.request.GET.get("page", 1),
-            page_size=self.paginate_by,
-            refresh_cache=refresh_cache,
+    template_name = ObjectListView.template_name
+    page_size = ObjectListView.page_size
+
+    async def get(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        page = await objects_services.aget_paginated_objects_for_bucket(
+            kwargs.get("bucket_id"),
+            cursor=request.GET.get("cursor"),
+            page_size=self.page_size,
         )
-        if refresh_cache:
-            try:
-                del self.request.session["refresh_objects_cache"]
-            except KeyError:
-                pass
-        return qs
+        context = {
+            "view": self,
+            "object_list": page.object_list,
+            "page_obj": page,
+            "paginator": None,
+            "is_paginated": page.has_next() or page.has_previous(),
+        }
+        # Rows are plain tuples; rendering needs no queries
+        return await sync_to_async(render)(request, self.template_name, context)
 
 
 class ObjectDetailView(LoginRequiredMixin, DetailView):
@@ -76,27 +94,91 @@ class ObjectDeleteView(LoginRequiredMixin, DeleteView):
         return objects_services.get_object_by_id(object_id)
 
     def get_success_url(self):
-        self.request.session["refresh_objects_cache"] = True
         return reverse_lazy("objects:list")
 
 
+def get_proxy_download(bucket_id, object_id):
+    """
+    `(bucket_credentials, instance)` for a proxy download.
+    """
+    bucket_credentials = buckets_services.get_today_bucket_credentials_by_bucket_id(
+        bucket_id
+    )
+    instance = objects_services.get_object_by_id(object_id)
+    if instance is None or str(instance.bucket_id) != str(bucket_id):
+        raise Http404("File not found")
+    return bucket_credentials, instance
+
+
+async def aget_proxy_download(bucket_id, object_id):
+    bucket_credentials = (
+        await buckets_services.aget_today_bucket_credentials_by_bucket_id(bucket_id)
+    )
+    instance = await objects_services.aget_object_by_id(object_id)
+    if instance is None or str(instance.bucket_id) != str(bucket_id):
+        raise Http404("File not found")
+    return bucket_credentials, instance
+
+
+def get_proxy_redirect(bucket_credentials, instance):
+    fname = instance.keyname
+    download_url = objects_services.get_download_url(
+        bucket_credentials, instance.get_s3_key(), filename=fname, force_download=True
+    )
+    response = redirect(download_url)
+    # Add headers to encourage download behavior
+    # response['Content-Type'] = 'application/octet-stream'
+    response["Content-Disposition"] = f'inline; filename="{fname}"'
+    return response
+
+
 class ObjectProxyDownloadView(LoginRequiredMixin, View):
+    """
+    Redirects to a presigned URL or, with `DJANGO_R2_PROXY_STREAMING`,
+    streams the object through this server.
+    """
+
     def get(self, request, *args, **kwargs):
-        object_id = kwargs.get("pk")
-        project_id = request.namespace.id
-        bucket_credentials = buckets_services.get_credentials_from_request(request)
+        bucket_credentials, instance = get_proxy_download(
+            kwargs.get("bucket_id"), kwargs.get("pk")
+        )
         if bucket_credentials is None:
             return HttpResponseBadRequest(
                 "There's an error with uploading files to your account."
             )
-        instance = objects_services.get_object_by_id(object_id, project_id)
-        fname = instance.keyname
-        s3_key = instance.get_s3_key()
-        download_url = bucket_credentials.presign_download_url(
-            key=s3_key, filename=fname, force_download=True
+        if DJANGO_R2_PROXY_STREAMING:
+            return objects_streaming.stream_object(
+                request,
+                bucket_credentials.get_my_s3_client(),
+                instance.get_s3_key(),
+                filename=instance.keyname,
+            )
+        return get_proxy_redirect(bucket_credentials, instance)
+
+
+class AsyncObjectProxyDownloadView(View):
+    """
+    `ObjectProxyDownloadView` as an async view, so streamed downloads
+    to slow clients don't hold a worker thread under ASGI.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        bucket_credentials, instance = await aget_proxy_download(
+            kwargs.get("bucket_id"), kwargs.get("pk")
         )
-        response = redirect(download_url)
-        # Add headers to encourage download behavior
-        # response['Content-Type'] = 'application/octet-stream'
-        response["Content-Disposition"] = f'inline; filename="{fname}"'
-        return response
+        if bucket_credentials is None:
+            return HttpResponseBadRequest(
+                "There's an error with uploading files to your account."
+            )
+        if DJANGO_R2_PROXY_STREAMING:
+            my_s3_client = await sync_to_async(bucket_credentials.get_my_s3_client)()
+            return await objects_streaming.astream_object(
+                request,
+                my_s3_client,
+                instance.get_s3_key(),
+                filename=instance.keyname,
+            )
+        return await sync_to_async(get_proxy_redirect)(bucket_credentials, instance)
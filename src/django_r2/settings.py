@@ -7,12 +7,174 @@ from django.conf import settings
 CLOUDFLARE_ACCESS_KEY = getattr(settings, "CLOUDFLARE_ACCESS_KEY", None)
 CLOUDFLARE_SECRET_KEY = getattr(settings, "CLOUDFLARE_SECRET_KEY", None)
 CLOUDFLARE_ACCOUNT_ID = getattr(settings, "CLOUDFLARE_ACCOUNT_ID", None)
+CLOUDFLARE_BUCKET_MANAGER_ACCESS_KEY = getattr(
+    settings, "CLOUDFLARE_BUCKET_MANAGER_ACCESS_KEY", None
+)
 
 
 DJANGO_R2_BASE_PATH = getattr(settings, "DJANGO_R2_BASE_PATH", "/buckets")
 DJANGO_R2_USE_CELERY = getattr(settings, "DJANGO_R2_USE_CELERY", False)
 DJANGO_R2_USE_DJANGO_QSTASH = getattr(settings, "DJANGO_R2_USE_DJANGO_QSTASH", False)
 
+# Create buckets in R2 when a Bucket row is saved, and purge and delete
+# them when the row is deleted. Without Celery or django-qstash the
+# purge runs synchronously once the delete commits.
+DJANGO_R2_MANAGE_R2_BUCKETS = getattr(settings, "DJANGO_R2_MANAGE_R2_BUCKETS", False)
+
+# Files at or above this size (in bytes) are uploaded by the browser
+# with S3 multipart uploads instead of a single presigned PUT.
+DJANGO_R2_MULTIPART_THRESHOLD = getattr(
+    settings, "DJANGO_R2_MULTIPART_THRESHOLD", 64 * 1024 * 1024
+)
+DJANGO_R2_MULTIPART_PART_SIZE = getattr(
+    settings, "DJANGO_R2_MULTIPART_PART_SIZE", 16 * 1024 * 1024
+)
+
+# Most filenames accepted by one batch presign request
+DJANGO_R2_PRESIGN_BATCH_SIZE = getattr(settings, "DJANGO_R2_PRESIGN_BATCH_SIZE", 500)
+# Most completions accepted by one batch upload-complete request
+DJANGO_R2_COMPLETE_BATCH_SIZE = getattr(settings, "DJANGO_R2_COMPLETE_BATCH_SIZE", 500)
+
+# Bucket credentials are cached in-process and in the Django cache
+# until `DJANGO_R2_CREDENTIALS_CACHE_MARGIN` seconds before they expire.
+DJANGO_R2_CREDENTIALS_CACHE_MARGIN = getattr(
+    settings, "DJANGO_R2_CREDENTIALS_CACHE_MARGIN", 60 * 5
+)
+DJANGO_R2_CREDENTIALS_LOCAL_CACHE_SIZE = getattr(
+    settings, "DJANGO_R2_CREDENTIALS_LOCAL_CACHE_SIZE", 256
+)
+# Upper bound on how long another process may keep using credentials
+# that were invalidated elsewhere.
+DJANGO_R2_CREDENTIALS_LOCAL_CACHE_TTL = getattr(
+    settings, "DJANGO_R2_CREDENTIALS_LOCAL_CACHE_TTL", 60
+)
+
+# boto3 clients are pooled per (endpoint, access key, session token)
+DJANGO_R2_S3_CLIENT_REGISTRY_SIZE = getattr(
+    settings, "DJANGO_R2_S3_CLIENT_REGISTRY_SIZE", 64
+)
+DJANGO_R2_S3_CLIENT_MAX_AGE = getattr(settings, "DJANGO_R2_S3_CLIENT_MAX_AGE", 60 * 60)
+DJANGO_R2_S3_MAX_POOL_CONNECTIONS = getattr(
+    settings, "DJANGO_R2_S3_MAX_POOL_CONNECTIONS", 50
+)
+DJANGO_R2_S3_CONNECT_TIMEOUT = getattr(settings, "DJANGO_R2_S3_CONNECT_TIMEOUT", 5)
+DJANGO_R2_S3_READ_TIMEOUT = getattr(settings, "DJANGO_R2_S3_READ_TIMEOUT", 60)
+DJANGO_R2_S3_TCP_KEEPALIVE = getattr(settings, "DJANGO_R2_S3_TCP_KEEPALIVE", True)
+
+# Sign presigned URLs with django_r2's SigV4 presigner instead of
+# botocore's request pipeline (only used with AWS_S3_ENDPOINT_URL).
+DJANGO_R2_FAST_PRESIGN = getattr(settings, "DJANGO_R2_FAST_PRESIGN", True)
+
+# URL ingest streams downloads into S3: full parts are uploaded by
+# `DJANGO_R2_STREAM_UPLOAD_WORKERS` threads while reading continues,
+# holding at most `DJANGO_R2_STREAM_BUFFER_SIZE` bytes of parts.
+DJANGO_R2_STREAM_PART_SIZE = getattr(
+    settings, "DJANGO_R2_STREAM_PART_SIZE", 8 * 1024 * 1024
+)
+DJANGO_R2_STREAM_BUFFER_SIZE = getattr(
+    settings, "DJANGO_R2_STREAM_BUFFER_SIZE", 64 * 1024 * 1024
+)
+DJANGO_R2_STREAM_UPLOAD_WORKERS = getattr(
+    settings, "DJANGO_R2_STREAM_UPLOAD_WORKERS", 4
+)
+# A multipart upload has at most 10,000 parts of one size, fixed by its
+# first part. Streams of unknown length get parts big enough for this
+# many bytes; None means 10,000 x DJANGO_R2_STREAM_PART_SIZE (about
+# 78 GiB with 8 MiB parts). A longer stream fails at that point.
+DJANGO_R2_STREAM_MAX_SIZE = getattr(settings, "DJANGO_R2_STREAM_MAX_SIZE", None)
+DJANGO_R2_URL_INGEST_CHUNK_SIZE = getattr(
+    settings, "DJANGO_R2_URL_INGEST_CHUNK_SIZE", 1024 * 1024
+)
+DJANGO_R2_URL_INGEST_TIMEOUT = getattr(settings, "DJANGO_R2_URL_INGEST_TIMEOUT", 30)
+
+# Bulk URL ingest (`uploads.ingest`): requests are claimed in batches
+# and streamed on `DJANGO_R2_INGEST_MAX_WORKERS` threads, with at most
+# `DJANGO_R2_INGEST_PER_HOST_LIMIT` downloads per origin host.
+DJANGO_R2_INGEST_BATCH_SIZE = getattr(settings, "DJANGO_R2_INGEST_BATCH_SIZE", 500)
+DJANGO_R2_INGEST_MAX_WORKERS = getattr(settings, "DJANGO_R2_INGEST_MAX_WORKERS", 32)
+DJANGO_R2_INGEST_PER_HOST_LIMIT = getattr(
+    settings, "DJANGO_R2_INGEST_PER_HOST_LIMIT", 4
+)
+DJANGO_R2_INGEST_MAX_TRIES = getattr(settings, "DJANGO_R2_INGEST_MAX_TRIES", 3)
+# Claimed requests are skipped by other ingest runs for this long
+DJANGO_R2_INGEST_LEASE_SECONDS = getattr(
+    settings, "DJANGO_R2_INGEST_LEASE_SECONDS", 60 * 60
+)
+# Threads uploading parts, shared by every download of a run
+DJANGO_R2_INGEST_UPLOAD_WORKERS = getattr(
+    settings, "DJANGO_R2_INGEST_UPLOAD_WORKERS", 16
+)
+DJANGO_R2_INGEST_STREAM_BUFFER_SIZE = getattr(
+    settings, "DJANGO_R2_INGEST_STREAM_BUFFER_SIZE", 16 * 1024 * 1024
+)
+
+# Bucket purges delete up to 1,000 keys per request on this many threads
+DJANGO_R2_PURGE_WORKERS = getattr(settings, "DJANGO_R2_PURGE_WORKERS", 8)
+
+# HEAD completed uploads off the request path and record the bucket's
+# size, type and ETag instead of trusting the browser's `file_data`.
+DJANGO_R2_VERIFY_UPLOADS = getattr(settings, "DJANGO_R2_VERIFY_UPLOADS", False)
+DJANGO_R2_VERIFY_WORKERS = getattr(settings, "DJANGO_R2_VERIFY_WORKERS", 16)
+DJANGO_R2_VERIFY_BATCH_SIZE = getattr(settings, "DJANGO_R2_VERIFY_BATCH_SIZE", 100)
+
+# Align download URL signing times to fixed windows (e.g. 3600) so
+# repeated views get identical, cacheable URLs; 0 signs every call.
+DJANGO_R2_PRESIGN_WINDOW_SECONDS = getattr(
+    settings, "DJANGO_R2_PRESIGN_WINDOW_SECONDS", 0
+)
+
+# Stream proxy downloads through Django (with Range/conditional
+# request support) instead of redirecting to a presigned R2 URL.
+DJANGO_R2_PROXY_STREAMING = getattr(settings, "DJANGO_R2_PROXY_STREAMING", False)
+DJANGO_R2_PROXY_CHUNK_SIZE = getattr(
+    settings, "DJANGO_R2_PROXY_CHUNK_SIZE", 1024 * 1024
+)
+# Route views to their async versions (for ASGI deployments, Django 5.1+)
+DJANGO_R2_ASYNC_VIEWS = getattr(settings, "DJANGO_R2_ASYNC_VIEWS", False)
+
+# Most concurrent requests per AsyncMyS3Client connection pool
+DJANGO_R2_ASYNC_S3_CONCURRENCY = getattr(settings, "DJANGO_R2_ASYNC_S3_CONCURRENCY", 64)
+
+# `r2_benchmark importtime` fails when django_r2 imports take longer
+DJANGO_R2_IMPORT_BUDGET_MS = getattr(settings, "DJANGO_R2_IMPORT_BUDGET_MS", 150)
+
+# Counters and latency histograms for S3, Cloudflare, credential and
+# cache operations (see django_r2.metrics)
+DJANGO_R2_METRICS = getattr(settings, "DJANGO_R2_METRICS", False)
+DJANGO_R2_METRICS_EXPORTERS = getattr(
+    settings,
+    "DJANGO_R2_METRICS_EXPORTERS",
+    ["django_r2.metrics.exporters.PrometheusExporter"],
+)
+DJANGO_R2_METRICS_PREFIX = getattr(settings, "DJANGO_R2_METRICS_PREFIX", "django_r2")
+# Label metrics with the R2 bucket name (one series per bucket)
+DJANGO_R2_METRICS_BUCKET_LABEL = getattr(
+    settings, "DJANGO_R2_METRICS_BUCKET_LABEL", False
+)
+DJANGO_R2_METRICS_BUCKETS = getattr(
+    settings,
+    "DJANGO_R2_METRICS_BUCKETS",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+# Bearer token for scraping the metrics endpoint (staff can always view it)
+DJANGO_R2_METRICS_TOKEN = getattr(settings, "DJANGO_R2_METRICS_TOKEN", None)
+DJANGO_R2_STATSD_HOST = getattr(settings, "DJANGO_R2_STATSD_HOST", "localhost")
+DJANGO_R2_STATSD_PORT = getattr(settings, "DJANGO_R2_STATSD_PORT", 8125)
+
+# Local S3 stand-in (django_r2.testing, `manage.py r2_standin`): its
+# root key pair, and dotted paths to Cloudflare client classes to use
+# instead of the SDK (e.g. "django_r2.testing.cloudflare.FakeCloudflare")
+DJANGO_R2_STANDIN_ACCESS_KEY_ID = getattr(
+    settings, "DJANGO_R2_STANDIN_ACCESS_KEY_ID", "standin"
+)
+DJANGO_R2_STANDIN_SECRET_ACCESS_KEY = getattr(
+    settings, "DJANGO_R2_STANDIN_SECRET_ACCESS_KEY", "standin-secret"
+)
+DJANGO_R2_CLOUDFLARE_CLIENT = getattr(settings, "DJANGO_R2_CLOUDFLARE_CLIENT", None)
+DJANGO_R2_ASYNC_CLOUDFLARE_CLIENT = getattr(
+    settings, "DJANGO_R2_ASYNC_CLOUDFLARE_CLIENT", None
+)
+
 if not all([CLOUDFLARE_ACCESS_KEY, CLOUDFLARE_SECRET_KEY]):
     warnings.warn(
         """DJANGO_SETTINGS_MODULE (settings.py required)
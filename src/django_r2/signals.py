@@ -1,42 +1,68 @@
-import hashlib
-
-from cloudflare.types.r2.bucket import Bucket as CloudflareBucket
-from django.conf import settings
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.utils import timezone
-from helpers.packages.mycloudflare.buckets import (
-    create_r2_bucket,
-    delete_r2_bucket,
-    update_r2_bucket_cors,
-)
-from projects.models import Project
-
-from .models import Bucket
-
-
-@receiver(post_save, sender=Project)
-def project_post_save_receiver(sender, instance, **kwargs):
-    bucket_obj, bucket_created = Bucket.objects.get_or_create(project=instance)
-    if not bucket_obj.active_in_cloudflare:
-        # Create a hash using the project's UUID (which never changes)
-        hash_input = str(instance.id).encode("utf-8")
-        hash_object = hashlib.sha256(hash_input)
-        # Take first 16 characters of the hex digest (64 bits)
-        hash_prefix = hash_object.hexdigest()[:16]
-        bucket_prefix = "django_r2" if not settings.DEBUG else "django_r2_dev"
-        bucket_name = f"{bucket_prefix}-{hash_prefix}"
-        cf_bucket_response = create_r2_bucket(bucket_name)
-        cors_response = update_r2_bucket_cors(bucket_name)
-        if isinstance(cf_bucket_response, CloudflareBucket) and cors_response:
-            bucket_obj.name = cf_bucket_response.name
-            bucket_obj.active_in_cloudflare = True
-            bucket_obj.active_in_cloudflare_at = timezone.now()
-            bucket_obj.save()
-            qs = Project.objects.filter(id=instance.id)
-            qs.update(bucket_name=bucket_name, bucket_active=True)
+
+from django_r2.buckets import services as buckets_services
+from django_r2.decorators import enqueue_task
+from django_r2.models import Bucket, BucketCredentials, Object
+from django_r2.objects import services as objects_services
 
 
+@receiver(post_save, sender=Bucket)
 @receiver(post_delete, sender=Bucket)
+def bucket_changed_receiver(sender, instance, **kwargs):
+    buckets_services.clear_cached_bucket_credentials(instance.id)
+
+
+@receiver(post_save, sender=BucketCredentials)
+@receiver(post_delete, sender=BucketCredentials)
+def bucket_credentials_changed_receiver(sender, instance, **kwargs):
+    buckets_services.clear_cached_bucket_credentials(instance.bucket_id)
+
+
+@receiver(post_save, sender=Object)
+@receiver(post_delete, sender=Object)
+def object_changed_receiver(sender, instance, **kwargs):
+    objects_services.clear_cache_for_bucket_objects(instance.bucket_id)
+    objects_services.clear_cache_for_object(instance.id)
+
+
+# Bucket lifecycle in R2, connected by `connect_bucket_lifecycle_receivers()`
+# when DJANGO_R2_MANAGE_R2_BUCKETS is on
+
+
+def bucket_post_save_receiver(sender, instance, **kwargs):
+    if not instance.active_in_cloudflare:
+        buckets_services.provision_r2_bucket(instance)
+
+
 def bucket_post_delete_receiver(sender, instance, **kwargs):
-    delete_r2_bucket(instance.name)
+    if not instance.name:
+        return
+    # R2 only deletes empty buckets: purge, then delete. Without Celery
+    # or django-qstash this runs in the deleting request, after commit.
+    bucket_name = instance.name
+    # Deferred so app loading doesn't import the task modules' SDKs
+    from django_r2.tasks import purge_and_delete_r2_bucket_task
+
+    transaction.on_commit(
+        lambda: enqueue_task(purge_and_delete_r2_bucket_task, bucket_name)
+    )
+
+
+def connect_bucket_lifecycle_receivers():
+    post_save.connect(
+        bucket_post_save_receiver,
+        sender=Bucket,
+        dispatch_uid="django_r2_bucket_provision",
+    )
+    post_delete.connect(
+        bucket_post_delete_receiver,
+        sender=Bucket,
+        dispatch_uid="django_r2_bucket_teardown",
+    )
+
+
+def disconnect_bucket_lifecycle_receivers():
+    post_save.disconnect(sender=Bucket, dispatch_uid="django_r2_bucket_provision")
+    post_delete.disconnect(sender=Bucket, dispatch_uid="django_r2_bucket_teardown")
@@ -0,0 +1,70 @@
+// Replaces ObjectAdmin's placeholder download links with presigned
+// URLs, signing every link on the page with a few batch requests
+// instead of one S3 client per row while the page renders.
+(function () {
+  "use strict";
+
+  var BATCH_SIZE = 500;
+
+  function getCsrfToken() {
+    var match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    if (match) {
+      return decodeURIComponent(match[1]);
+    }
+    var input = document.querySelector("input[name=csrfmiddlewaretoken]");
+    return input ? input.value : "";
+  }
+
+  function signBatch(signUrl, forceDownload, links) {
+    var ids = links.map(function (link) {
+      return link.dataset.djangoR2Object;
+    });
+    return fetch(signUrl, {
+      method: "POST",
+      credentials: "same-origin",
+      headers: {
+        "Content-Type": "application/json",
+        "X-CSRFToken": getCsrfToken(),
+      },
+      body: JSON.stringify({ ids: ids, force_download: forceDownload }),
+    })
+      .then(function (response) {
+        return response.ok ? response.json() : { urls: {} };
+      })
+      .then(function (data) {
+        links.forEach(function (link) {
+          var url = data.urls[link.dataset.djangoR2Object];
+          // Links that could not be signed keep the proxy download URL
+          if (url) {
+            link.href = url;
+          }
+        });
+      })
+      .catch(function () {});
+  }
+
+  function signLinks() {
+    var groups = {};
+    document
+      .querySelectorAll("a[data-django-r2-object]")
+      .forEach(function (link) {
+        var key =
+          link.dataset.djangoR2SignUrl + "|" + link.dataset.djangoR2ForceDownload;
+        (groups[key] = groups[key] || []).push(link);
+      });
+    Object.keys(groups).forEach(function (key) {
+      var links = groups[key];
+      var signUrl = links[0].dataset.djangoR2SignUrl;
+      var forceDownload = links[0].dataset.djangoR2ForceDownload === "1";
+      for (var start = 0; start < links.length; start += BATCH_SIZE) {
+        signBatch(signUrl, forceDownload, links.slice(start, start + BATCH_SIZE));
+      }
+    });
+  }
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", signLinks);
+  } else {
+    signLinks();
+  }
+})();
@@ -1,15 +1,11 @@
-import mimetypes
-import tempfile
-from pathlib import Path
-
-import requests
-from buckets import services as buckets_services
 from django.apps import apps
-from django.db import transaction
-from helpers.packages import myboto
-from objects import services as objects_services
+from django.db.models import F
 
+from django_r2.buckets import services as buckets_services
 from django_r2.decorators import proxy_task
+from django_r2.objects import verify as objects_verify
+from django_r2.uploads import ingest as uploads_ingest
+from django_r2.uploads import services as uploads_services
 
 
 @proxy_task
@@ -18,92 +14,44 @@ def process_url_upload_task(upload_request_id):
     Downloads file from URL and uploads it to S3
     Updates URLUploadRequest status throughout the process
     """
-    with transaction.atomic():
-        URLUploadRequest = apps.get_model("uploads", "URLUploadRequest")
-        upload_request = URLUploadRequest.objects.get(id=upload_request_id)
-        if upload_request.completed:
-            return "Upload request already completed"
-        # Increment try count
-        upload_request.tries += 1
+    URLUploadRequest = apps.get_model("django_r2", "URLUploadRequest")
+    upload_request = URLUploadRequest.objects.get(id=upload_request_id)
+    if upload_request.completed:
+        return "Upload request already completed"
+    # Increment try count
+    URLUploadRequest.objects.filter(id=upload_request_id).update(tries=F("tries") + 1)
+    try:
+        uploads_services.ingest_url_upload_request(upload_request)
+    except Exception as e:
         URLUploadRequest.objects.filter(id=upload_request_id).update(
-            tries=upload_request.tries
+            errors={"ingest": str(e)}
         )
+        raise
+    return f"Successfully uploaded file from {upload_request.url}"
 
-        # Get filename from URL
-        url_path = requests.utils.urlparse(upload_request.url).path
-        filename = Path(url_path).name or "downloaded_file"
-
-        # Create temporary file
-        with tempfile.NamedTemporaryFile() as tmp_file:
-            # Download file
-            response = requests.get(upload_request.url, stream=True)
-            response.raise_for_status()  # Raise an exception for bad status codes
-
-            # Prepare S3 upload
-            name = myboto.formatting.create_s3_filename(filename)
-            if name is None:
-                raise ValueError("Invalid filename")
-
-            # Create object instance
-            instance = objects_services.preflight_object_create(
-                upload_request.project_id, filename, upload_request.added_by
-            )
-
-            # Get bucket credentials
-            bucket_credentials = (
-                buckets_services.get_today_bucket_credentials_by_project_id(
-                    upload_request.project_id
-                )
-            )
-            if not bucket_credentials:
-                raise ValueError("No bucket credentials available")
 
-            # Upload to S3
-            key = instance.get_s3_key()
-            my_s3_client = bucket_credentials.get_my_s3_client()
-            boto_s3_client = my_s3_client.client
-
-            file_size = 0
-            with open(tmp_file.name, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    file_size += len(chunk)
-                    f.write(chunk)
-
-            boto_s3_client.upload_fileobj(
-                tmp_file,
-                bucket_credentials.bucket.name,
-                key,
-            )
-
-            file_data = {
-                "size": file_size,
-                "type": mimetypes.guess_type(filename)[0],
-                "duration": None,
-                "width": None,
-                "height": None,
-            }
+@proxy_task
+def ingest_pending_url_uploads_task(limit=None):
+    """
+    Bulk-ingests pending URLUploadRequests (see `uploads.ingest`)
+    Returns the run's totals
+    """
+    stats = uploads_ingest.ingest_pending_url_uploads(limit=limit)
+    return stats.as_dict()
 
-            # Update object status
-            object_data = {
-                "object_id": str(instance.id),
-                "project_id": str(upload_request.project_id),
-                "key": str(key),
-                "filename": str(instance.keyname),
-            }
 
-            # Mark upload as complete
-            objects_services.postflight_object_update(
-                object_data,
-                uploaded=True,
-                file_data=file_data,  # Add file metadata if needed
-            )
+@proxy_task
+def purge_and_delete_r2_bucket_task(bucket_name):
+    """
+    Deletes every object in an R2 bucket, then the bucket itself
+    """
+    return buckets_services.purge_and_delete_r2_bucket(bucket_name)
 
-            # Update upload request
-            upload_request.completed = True
-            upload_request.object = instance
-            URLUploadRequest.objects.filter(id=upload_request_id).update(
-                completed=True,
-                object=instance,
-            )
 
-            return f"Successfully uploaded file from {upload_request.url}"
+@proxy_task
+def verify_uploaded_objects_task(object_ids):
+    """
+    HEADs completed uploads and records what the bucket reports
+    """
+    stats = objects_verify.verify_objects(object_ids)
+    return stats.as_dict()
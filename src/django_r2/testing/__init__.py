@@ -0,0 +1,10 @@
+from .cloudflare import AsyncFakeCloudflare, FakeCloudflare
+from .credentials import issue_temporary_credentials
+from .server import S3StandIn
+
+__all__ = [
+    "AsyncFakeCloudflare",
+    "FakeCloudflare",
+    "S3StandIn",
+    "issue_temporary_credentials",
+]
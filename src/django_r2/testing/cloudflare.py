@@ -0,0 +1,158 @@
+"""
+Fakes for the parts of the Cloudflare SDK django_r2 calls, backed by
+the S3 stand-in:
+
+- `r2.temporary_credentials.create` issues credentials scoped to one
+  bucket (`credentials.issue_temporary_credentials`);
+- `r2.buckets.create`/`delete` create and delete the bucket on the
+  stand-in at `AWS_S3_ENDPOINT_URL` with the root key pair;
+- `r2.buckets.cors.update` does nothing (the stand-in allows any origin).
+
+Enable them with
+
+    DJANGO_R2_CLOUDFLARE_CLIENT = "django_r2.testing.cloudflare.FakeCloudflare"
+    DJANGO_R2_ASYNC_CLOUDFLARE_CLIENT = (
+        "django_r2.testing.cloudflare.AsyncFakeCloudflare"
+    )
+"""
+
+import asyncio
+import datetime
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+
+from django_r2.testing.credentials import (
+    DJANGO_R2_STANDIN_ACCESS_KEY_ID,
+    DJANGO_R2_STANDIN_SECRET_ACCESS_KEY,
+    issue_temporary_credentials,
+)
+
+
+@dataclass
+class TemporaryCredentials:
+    access_key_id: str
+    secret_access_key: str
+    session_token: str
+
+
+@dataclass
+class FakeBucket:
+    name: str
+    location: Optional[str] = None
+    creation_date: Optional[str] = None
+
+
+def get_standin_s3_client():
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "s3",
+        endpoint_url=getattr(settings, "AWS_S3_ENDPOINT_URL", None),
+        aws_access_key_id=DJANGO_R2_STANDIN_ACCESS_KEY_ID,
+        aws_secret_access_key=DJANGO_R2_STANDIN_SECRET_ACCESS_KEY,
+        region_name="auto",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+
+
+class FakeTemporaryCredentials:
+    def create(
+        self,
+        *,
+        bucket: str,
+        account_id: Optional[str] = None,
+        parent_access_key_id: Optional[str] = None,
+        ttl_seconds: int = 60 * 60,
+        permission: Optional[str] = None,
+        **kwargs,
+    ) -> TemporaryCredentials:
+        credentials = issue_temporary_credentials(bucket, ttl_seconds=ttl_seconds)
+        return TemporaryCredentials(
+            access_key_id=credentials.access_key_id,
+            secret_access_key=credentials.secret_access_key,
+            session_token=credentials.session_token,
+        )
+
+
+class FakeCors:
+    def update(self, *, bucket_name: str, account_id: Optional[str] = None, **kwargs):
+        return None
+
+
+class FakeBuckets:
+    def __init__(self):
+        self.cors = FakeCors()
+
+    def create(
+        self,
+        *,
+        name: str,
+        account_id: Optional[str] = None,
+        location_hint: Optional[str] = None,
+        **kwargs,
+    ) -> FakeBucket:
+        get_standin_s3_client().create_bucket(Bucket=name)
+        return FakeBucket(
+            name=name,
+            location=location_hint,
+            creation_date=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        )
+
+    def delete(self, *, bucket_name: str, account_id: Optional[str] = None, **kwargs):
+        get_standin_s3_client().delete_bucket(Bucket=bucket_name)
+
+
+class FakeR2:
+    def __init__(self):
+        self.buckets = FakeBuckets()
+        self.temporary_credentials = FakeTemporaryCredentials()
+
+
+class FakeCloudflare:
+    """
+    Takes (and ignores) the `Cloudflare` client's keyword arguments.
+    """
+
+    def __init__(self, **kwargs):
+        self.r2 = FakeR2()
+
+
+class AsyncFakeTemporaryCredentials(FakeTemporaryCredentials):
+    async def create(self, **kwargs) -> TemporaryCredentials:
+        return super().create(**kwargs)
+
+
+class AsyncFakeCors(FakeCors):
+    async def update(self, **kwargs):
+        return super().update(**kwargs)
+
+
+class AsyncFakeBuckets(FakeBuckets):
+    def __init__(self):
+        self.cors = AsyncFakeCors()
+
+    async def create(self, **kwargs) -> FakeBucket:
+        return await asyncio.to_thread(super().create, **kwargs)
+
+    async def delete(self, **kwargs):
+        return await asyncio.to_thread(super().delete, **kwargs)
+
+
+class AsyncFakeR2:
+    def __init__(self):
+        self.buckets = AsyncFakeBuckets()
+        self.temporary_credentials = AsyncFakeTemporaryCredentials()
+
+
+class AsyncFakeCloudflare:
+    def __init__(self, **kwargs):
+        self.r2 = AsyncFakeR2()
+
+    async def __aenter__(self) -> "AsyncFakeCloudflare":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
@@ -0,0 +1,99 @@
+"""
+Credentials for the S3 stand-in.
+
+The stand-in accepts one root key pair plus temporary credentials
+derived from the root secret: the access key id carries the expiry
+and the bucket it is scoped to, and the secret and session token are
+HMACs of it. The fake Cloudflare API and the stand-in server only
+need to share the root secret, so they can run in separate processes.
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from django_r2 import settings
+
+DJANGO_R2_STANDIN_ACCESS_KEY_ID = getattr(
+    settings, "DJANGO_R2_STANDIN_ACCESS_KEY_ID", "standin"
+)
+DJANGO_R2_STANDIN_SECRET_ACCESS_KEY = getattr(
+    settings, "DJANGO_R2_STANDIN_SECRET_ACCESS_KEY", "standin-secret"
+)
+
+TEMPORARY_PREFIX = "tmp"
+
+
+@dataclass(frozen=True)
+class Credentials:
+    access_key_id: str
+    secret_access_key: str
+    session_token: Optional[str] = None
+    # Bucket the credentials are limited to (None: any bucket)
+    bucket: Optional[str] = None
+    expires: Optional[float] = None
+
+
+def derive(root_secret: str, message: str) -> str:
+    return hmac.new(
+        root_secret.encode("utf-8"), message.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def encode_bucket(bucket: str) -> str:
+    return base64.urlsafe_b64encode(bucket.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_bucket(value: str) -> str:
+    padded = value + "=" * (-len(value) % 4)
+    return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+
+
+def issue_temporary_credentials(
+    bucket: str,
+    ttl_seconds: int = 60 * 60,
+    root_secret: str = DJANGO_R2_STANDIN_SECRET_ACCESS_KEY,
+) -> Credentials:
+    expires = int(time.time()) + int(ttl_seconds)
+    access_key_id = (
+        f"{TEMPORARY_PREFIX}.{expires}.{encode_bucket(bucket)}.{secrets.token_hex(8)}"
+    )
+    return Credentials(
+        access_key_id=access_key_id,
+        secret_access_key=derive(root_secret, access_key_id),
+        session_token=derive(root_secret, f"session:{access_key_id}"),
+        bucket=bucket,
+        expires=expires,
+    )
+
+
+def resolve_credentials(
+    access_key_id: str,
+    root_access_key_id: str = DJANGO_R2_STANDIN_ACCESS_KEY_ID,
+    root_secret: str = DJANGO_R2_STANDIN_SECRET_ACCESS_KEY,
+) -> Optional[Credentials]:
+    """
+    The credentials `access_key_id` names, or None if it is neither
+    the root key nor a well-formed temporary key.
+    """
+    if access_key_id == root_access_key_id:
+        return Credentials(root_access_key_id, root_secret)
+    parts = access_key_id.split(".")
+    if len(parts) != 4 or parts[0] != TEMPORARY_PREFIX:
+        return None
+    try:
+        expires = int(parts[1])
+        bucket = decode_bucket(parts[2])
+    except (ValueError, UnicodeError):
+        return None
+    return Credentials(
+        access_key_id=access_key_id,
+        secret_access_key=derive(root_secret, access_key_id),
+        session_token=derive(root_secret, f"session:{access_key_id}"),
+        bucket=bucket,
+        expires=expires,
+    )
@@ -0,0 +1,753 @@
+"""
+A local S3-compatible server that `AWS_S3_ENDPOINT_URL` can point at,
+for end-to-end and load tests that can't talk to R2.
+
+It serves path-style requests (`/<bucket>/<key>`) for the subset of
+the S3 API django_r2 uses: bucket create/delete, PUT/GET/HEAD/DELETE
+object (ranged and conditional GETs, `response-*` overrides),
+multipart uploads, ListObjects (v1 and v2) and batch delete. Every
+request is SigV4-checked, both `Authorization` headers and presigned
+URLs, against the root key pair or temporary credentials issued by
+`testing.cloudflare.FakeCloudflare`; temporary credentials only work
+on their own bucket. Objects are kept in a `storage.DiskStore`.
+
+    with S3StandIn() as standin:
+        settings.AWS_S3_ENDPOINT_URL = standin.endpoint_url
+        ...
+
+or `manage.py r2_standin` to run it in its own process.
+"""
+
+import base64
+import datetime
+import hashlib
+import logging
+import shutil
+import tempfile
+import threading
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+from urllib.parse import quote, unquote
+from xml.etree import ElementTree
+
+from django_r2.testing.credentials import (
+    DJANGO_R2_STANDIN_ACCESS_KEY_ID,
+    DJANGO_R2_STANDIN_SECRET_ACCESS_KEY,
+    resolve_credentials,
+)
+from django_r2.testing.sigv4 import SignatureError, parse_query, verify_request
+from django_r2.testing.storage import COPY_BUFFER_SIZE, DiskStore, StoreError
+
+S3_NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+MAX_LIST_KEYS = 1000
+# Request headers kept with an object and returned on GET/HEAD
+STORED_HEADERS = (
+    "cache-control",
+    "content-disposition",
+    "content-encoding",
+    "content-language",
+    "expires",
+)
+RESPONSE_OVERRIDES = {
+    "response-cache-control": "Cache-Control",
+    "response-content-disposition": "Content-Disposition",
+    "response-content-encoding": "Content-Encoding",
+    "response-content-language": "Content-Language",
+    "response-content-type": "Content-Type",
+    "response-expires": "Expires",
+}
+
+log = logging.getLogger(__name__)
+
+
+def iso_timestamp(timestamp: float) -> str:
+    value = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def local_name(element) -> str:
+    return element.tag.rpartition("}")[2]
+
+
+def find_children(element, name: str) -> list:
+    # Clients may or may not send the S3 namespace
+    return [child for child in element if local_name(child) == name]
+
+
+def find_text(element, name: str, default: str = "") -> str:
+    children = find_children(element, name)
+    return (children[0].text or "") if children else default
+
+
+def build_xml(name: str, fields: list, namespace: bool = True) -> bytes:
+    """
+    `fields` is a list of `(tag, text)` or `(tag, [fields])` pairs.
+    """
+
+    def add(parent, fields):
+        for tag, value in fields:
+            child = ElementTree.SubElement(parent, tag)
+            if isinstance(value, list):
+                add(child, value)
+            else:
+                child.text = str(value)
+
+    attributes = {"xmlns": S3_NAMESPACE} if namespace else {}
+    root = ElementTree.Element(name, **attributes)
+    add(root, fields)
+    return b'<?xml version="1.0" encoding="UTF-8"?>\n' + ElementTree.tostring(root)
+
+
+def parse_range(value: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    `(first, last)` byte offsets for a single `bytes=` range, None to
+    send the whole object. Raises `StoreError` when unsatisfiable.
+    """
+    if not value or not value.startswith("bytes=") or "," in value:
+        return None
+    first, _, last = value[len("bytes=") :].strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise StoreError("InvalidRange", "Range is not satisfiable", 416)
+            return max(size - length, 0), size - 1
+        first = int(first)
+        last = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if first >= size:
+        raise StoreError("InvalidRange", "Range is not satisfiable", 416)
+    if last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "django-r2-standin"
+
+    @property
+    def store(self) -> DiskStore:
+        return self.server.store
+
+    def log_message(self, format, *args):
+        log.debug("%s - %s", self.address_string(), format % args)
+
+    # Request parsing
+
+    def parse(self):
+        raw_path, _, raw_query = self.path.partition("?")
+        self.raw_path = raw_path
+        self.query = dict(parse_query(raw_query))
+        self.lower_headers = {}
+        for name, value in self.headers.items():
+            name = name.lower()
+            if name in self.lower_headers:
+                value = f"{self.lower_headers[name]},{value}"
+            self.lower_headers[name] = value
+        bucket, _, key = raw_path.lstrip("/").partition("/")
+        self.bucket = unquote(bucket) or None
+        self.key = unquote(key) or None
+        self.body_read = not (
+            self.lower_headers.get("content-length", "0") != "0"
+            or "transfer-encoding" in self.lower_headers
+        )
+        self.request_id = uuid.uuid4().hex[:16].upper()
+
+    def authorize(self):
+        if not self.server.verify_signatures:
+            return
+        signed = verify_request(
+            self.command,
+            self.raw_path,
+            self.path.partition("?")[2],
+            self.lower_headers,
+            lambda access_key_id: resolve_credentials(
+                access_key_id,
+                root_access_key_id=self.server.access_key_id,
+                root_secret=self.server.secret_access_key,
+            ),
+        )
+        scope = signed.credentials.bucket
+        # Temporary credentials can't create or delete their bucket
+        bucket_admin = self.key is None and self.command in ("PUT", "DELETE")
+        if scope is not None and (self.bucket != scope or bucket_admin):
+            raise SignatureError(
+                "AccessDenied", "The credentials are not valid for this resource"
+            )
+
+    def iter_http_body(self) -> Iterator[bytes]:
+        """
+        The raw request body, from `Content-Length` or HTTP chunked
+        transfer encoding.
+        """
+        self.body_read = True
+        if "chunked" in self.lower_headers.get("transfer-encoding", "").lower():
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Trailers, up to the blank line
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                remaining = size
+                while remaining:
+                    chunk = self.rfile.read(min(remaining, COPY_BUFFER_SIZE))
+                    if not chunk:
+                        raise StoreError("IncompleteBody", "Body ended early", 400)
+                    remaining -= len(chunk)
+                    yield chunk
+                self.rfile.readline()
+        remaining = int(self.lower_headers.get("content-length") or 0)
+        while remaining:
+            chunk = self.rfile.read(min(remaining, COPY_BUFFER_SIZE))
+            if not chunk:
+                raise StoreError("IncompleteBody", "Body ended early", 400)
+            remaining -= len(chunk)
+            yield chunk
+
+    def iter_body(self) -> Iterator[bytes]:
+        """
+        The decoded object bytes: `aws-chunked` framing (streaming
+        uploads with checksum trailers) is removed, and a hex
+        `x-amz-content-sha256` or a `Content-MD5` is checked once
+        the body has been read.
+        """
+        chunks = self.iter_http_body()
+        if "aws-chunked" in self.lower_headers.get("content-encoding", ""):
+            chunks = decode_aws_chunked(chunks)
+        expected_sha256 = self.lower_headers.get("x-amz-content-sha256", "")
+        if len(expected_sha256) != 64:
+            expected_sha256 = None
+        expected_md5 = self.lower_headers.get("content-md5")
+        sha256 = hashlib.sha256() if expected_sha256 else None
+        md5 = hashlib.md5() if expected_md5 else None
+        for chunk in chunks:
+            if sha256 is not None:
+                sha256.update(chunk)
+            if md5 is not None:
+                md5.update(chunk)
+            yield chunk
+        if sha256 is not None and sha256.hexdigest() != expected_sha256:
+            raise StoreError(
+                "XAmzContentSHA256Mismatch",
+                "The provided 'x-amz-content-sha256' header does not match what "
+                "was computed.",
+                400,
+            )
+        if md5 is not None and base64.b64encode(md5.digest()).decode() != expected_md5:
+            raise StoreError(
+                "BadDigest", "The Content-MD5 you specified did not match", 400
+            )
+
+    def read_body(self) -> bytes:
+        return b"".join(self.iter_body())
+
+    def stored_headers(self) -> dict:
+        headers = {}
+        for name, value in self.lower_headers.items():
+            if name in STORED_HEADERS or name.startswith("x-amz-meta-"):
+                if name == "content-encoding":
+                    value = ",".join(
+                        part
+                        for part in value.split(",")
+                        if part.strip() and part.strip() != "aws-chunked"
+                    )
+                    if not value:
+                        continue
+                headers[name] = value
+        return headers
+
+    # Responses
+
+    def send(self, status: int, body: bytes = b"", headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("x-amz-request-id", self.request_id)
+        origin = self.lower_headers.get("origin")
+        if origin:
+            self.send_header("Access-Control-Allow-Origin", origin)
+            self.send_header("Access-Control-Expose-Headers", "ETag")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if "Content-Length" not in (headers or {}):
+            self.send_header("Content-Length", str(len(body)))
+        if not self.body_read:
+            # The unread request body would be parsed as the next request
+            self.close_connection = True
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_xml(self, status: int, name: str, fields: list):
+        self.send(status, build_xml(name, fields), {"Content-Type": "application/xml"})
+
+    def send_error_response(
+        self, code: str, message: str, status: int, headers: Optional[dict] = None
+    ):
+        resource = self.raw_path
+        body = b""
+        if self.command != "HEAD":
+            body = build_xml(
+                "Error",
+                [
+                    ("Code", code),
+                    ("Message", message),
+                    ("Resource", resource),
+                    ("RequestId", self.request_id),
+                ],
+                # S3 sends errors without the namespace
+                namespace=False,
+            )
+        self.send(status, body, {"Content-Type": "application/xml", **(headers or {})})
+
+    # Dispatch
+
+    def handle_request(self):
+        self.parse()
+        try:
+            if self.command != "OPTIONS":
+                self.authorize()
+            handler = getattr(self, f"{self.command.lower()}_request")
+            handler()
+        except (SignatureError, StoreError) as e:
+            self.send_error_response(e.code, e.message, e.status)
+        except (ConnectionError, TimeoutError):
+            self.close_connection = True
+        except Exception as e:
+            log.exception("S3 stand-in request failed")
+            self.send_error_response("InternalError", str(e), 500)
+
+    do_GET = do_HEAD = do_PUT = do_POST = do_DELETE = do_OPTIONS = handle_request
+
+    def options_request(self):
+        # CORS preflight for browser uploads
+        requested = self.lower_headers.get("access-control-request-headers")
+        headers = {
+            "Access-Control-Allow-Methods": "GET, HEAD, PUT, POST, DELETE",
+            "Access-Control-Max-Age": "3600",
+        }
+        if requested:
+            headers["Access-Control-Allow-Headers"] = requested
+        self.body_read = True
+        self.send(200, headers=headers)
+
+    def get_request(self):
+        if self.bucket is None:
+            return self.list_buckets()
+        if self.key is None:
+            if not self.store.has_bucket(self.bucket):
+                raise StoreError("NoSuchBucket", "The bucket does not exist", 404)
+            return self.list_objects()
+        return self.get_object()
+
+    def head_request(self):
+        if self.key is None:
+            if not self.store.has_bucket(self.bucket or ""):
+                raise StoreError("NoSuchBucket", "The bucket does not exist", 404)
+            self.body_read = True
+            return self.send(200)
+        return self.get_object()
+
+    def put_request(self):
+        if self.bucket is None:
+            raise StoreError("MethodNotAllowed", "Method not allowed", 405)
+        if self.key is None:
+            self.read_body()
+            self.store.create_bucket(self.bucket)
+            return self.send(200, headers={"Location": f"/{self.bucket}"})
+        if "uploadId" in self.query:
+            try:
+                part_number = int(self.query.get("partNumber", ""))
+            except ValueError:
+                raise StoreError("InvalidArgument", "Invalid part number", 400)
+            etag = self.store.upload_part(
+                self.bucket,
+                self.key,
+                self.query["uploadId"],
+                part_number,
+                self.iter_body(),
+            )
+            return self.send(200, headers={"ETag": etag})
+        meta = self.store.put_object(
+            self.bucket,
+            self.key,
+            self.iter_body(),
+            content_type=self.lower_headers.get("content-type"),
+            headers=self.stored_headers(),
+        )
+        self.send(200, headers={"ETag": meta.etag})
+
+    def post_request(self):
+        if self.bucket is None:
+            raise StoreError("MethodNotAllowed", "Method not allowed", 405)
+        if self.key is None:
+            if "delete" in self.query:
+                return self.delete_objects()
+            raise StoreError("NotImplemented", "Not implemented", 501)
+        if "uploads" in self.query:
+            self.read_body()
+            upload_id = self.store.create_multipart_upload(
+                self.bucket,
+                self.key,
+                content_type=self.lower_headers.get("content-type"),
+                headers=self.stored_headers(),
+            )
+            return self.send_xml(
+                200,
+                "InitiateMultipartUploadResult",
+                [("Bucket", self.bucket), ("Key", self.key), ("UploadId", upload_id)],
+            )
+        if "uploadId" in self.query:
+            return self.complete_multipart_upload()
+        raise StoreError("NotImplemented", "Not implemented", 501)
+
+    def delete_request(self):
+        self.read_body()
+        if self.bucket is None:
+            raise StoreError("MethodNotAllowed", "Method not allowed", 405)
+        if self.key is None:
+            self.store.delete_bucket(self.bucket)
+        elif "uploadId" in self.query:
+            self.store.abort_multipart_upload(
+                self.bucket, self.key, self.query["uploadId"]
+            )
+        else:
+            self.store.delete_object(self.bucket, self.key)
+        self.send(204)
+
+    # Operations
+
+    def list_buckets(self):
+        self.body_read = True
+        self.send_xml(
+            200,
+            "ListAllMyBucketsResult",
+            [
+                ("Owner", [("ID", "standin"), ("DisplayName", "standin")]),
+                (
+                    "Buckets",
+                    [
+                        ("Bucket", [("Name", name), ("CreationDate", iso_timestamp(0))])
+                        for name in self.store.list_buckets()
+                    ],
+                ),
+            ],
+        )
+
+    def list_objects(self):
+        self.body_read = True
+        v2 = self.query.get("list-type") == "2"
+        prefix = self.query.get("prefix", "")
+        delimiter = self.query.get("delimiter", "")
+        encode = self.query.get("encoding-type") == "url"
+        try:
+            max_keys = int(self.query.get("max-keys", MAX_LIST_KEYS))
+        except ValueError:
+            raise StoreError("InvalidArgument", "Invalid max-keys", 400)
+        max_keys = min(max(max_keys, 0), MAX_LIST_KEYS)
+        token = self.query.get("continuation-token")
+        if v2:
+            start_after = self.query.get("start-after", "")
+            if token:
+                try:
+                    start_after = base64.urlsafe_b64decode(token.encode()).decode()
+                except ValueError:
+                    raise StoreError("InvalidArgument", "Invalid token", 400)
+        else:
+            start_after = self.query.get("marker", "")
+        contents, prefixes, next_start = self.store.list_objects(
+            self.bucket, prefix, delimiter, start_after, max_keys
+        )
+
+        def text(value):
+            return quote(value, safe="/") if encode else value
+
+        fields = [
+            ("Name", self.bucket),
+            ("Prefix", text(prefix)),
+            ("MaxKeys", max_keys),
+            ("IsTruncated", "true" if next_start is not None else "false"),
+        ]
+        if delimiter:
+            fields.append(("Delimiter", text(delimiter)))
+        if encode:
+            fields.append(("EncodingType", "url"))
+        if v2:
+            fields.append(("KeyCount", len(contents) + len(prefixes)))
+            if token:
+                fields.append(("ContinuationToken", token))
+            if self.query.get("start-after"):
+                fields.append(("StartAfter", text(self.query["start-after"])))
+            if next_start is not None:
+                next_token = base64.urlsafe_b64encode(next_start.encode()).decode()
+                fields.append(("NextContinuationToken", next_token))
+        else:
+            fields.append(("Marker", text(start_after)))
+            if next_start is not None:
+                fields.append(("NextMarker", text(next_start)))
+        for meta in contents:
+            fields.append(
+                (
+                    "Contents",
+                    [
+                        ("Key", text(meta.key)),
+                        ("LastModified", iso_timestamp(meta.last_modified)),
+                        ("ETag", meta.etag),
+                        ("Size", meta.size),
+                        ("StorageClass", "STANDARD"),
+                    ],
+                )
+            )
+        for common in prefixes:
+            fields.append(("CommonPrefixes", [("Prefix", text(common))]))
+        self.send_xml(200, "ListBucketResult", fields)
+
+    def get_object(self):
+        self.body_read = True
+        meta, f = self.store.open_object(self.bucket, self.key)
+        with f:
+            headers = {
+                "ETag": meta.etag,
+                "Last-Modified": formatdate(meta.last_modified, usegmt=True),
+                "Content-Type": meta.content_type,
+                "Accept-Ranges": "bytes",
+            }
+            for name, value in meta.headers.items():
+                headers[name.title() if name in STORED_HEADERS else name] = value
+            status = self.check_conditions(meta)
+            if status is not None:
+                if status == 304:
+                    return self.send(304, headers={"ETag": meta.etag})
+                raise StoreError(
+                    "PreconditionFailed",
+                    "At least one of the pre-conditions you specified did not hold",
+                    412,
+                )
+            for parameter, name in RESPONSE_OVERRIDES.items():
+                if parameter in self.query:
+                    headers[name] = self.query[parameter]
+            status = 200
+            first, last = 0, meta.size - 1
+            try:
+                byte_range = parse_range(self.lower_headers.get("range"), meta.size)
+            except StoreError as e:
+                return self.send_error_response(
+                    e.code,
+                    e.message,
+                    e.status,
+                    {"Content-Range": f"bytes */{meta.size}"},
+                )
+            if byte_range is not None:
+                status = 206
+                first, last = byte_range
+                headers["Content-Range"] = f"bytes {first}-{last}/{meta.size}"
+            length = max(last - first + 1, 0)
+            headers["Content-Length"] = str(length)
+            self.send(status, headers=headers)
+            if self.command == "HEAD":
+                return
+            f.seek(first)
+            while length:
+                chunk = f.read(min(length, COPY_BUFFER_SIZE))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                length -= len(chunk)
+
+    def check_conditions(self, meta) -> Optional[int]:
+        """
+        304 or 412 when a conditional header says not to send the
+        object, else None.
+        """
+        last_modified = int(meta.last_modified)
+
+        def parse_date(value):
+            try:
+                return parsedate_to_datetime(value).timestamp()
+            except (TypeError, ValueError):
+                return None
+
+        def etag_matches(value):
+            tags = [tag.strip() for tag in value.split(",")]
+            return "*" in tags or meta.etag in tags or meta.etag.strip('"') in tags
+
+        if_match = self.lower_headers.get("if-match")
+        if if_match and not etag_matches(if_match):
+            return 412
+        since = parse_date(self.lower_headers.get("if-unmodified-since"))
+        if not if_match and since is not None and last_modified > since:
+            return 412
+        if_none_match = self.lower_headers.get("if-none-match")
+        if if_none_match:
+            return 304 if etag_matches(if_none_match) else None
+        since = parse_date(self.lower_headers.get("if-modified-since"))
+        if since is not None and last_modified <= since:
+            return 304
+        return None
+
+    def parse_xml_body(self):
+        body = self.read_body()
+        try:
+            return ElementTree.fromstring(body)
+        except ElementTree.ParseError:
+            raise StoreError(
+                "MalformedXML", "The XML you provided was not well-formed", 400
+            )
+
+    def delete_objects(self):
+        root = self.parse_xml_body()
+        quiet = find_text(root, "Quiet").lower() == "true"
+        deleted = []
+        for element in find_children(root, "Object"):
+            key = find_text(element, "Key")
+            try:
+                self.store.delete_object(self.bucket, key)
+            except StoreError as e:
+                deleted.append(
+                    ("Error", [("Key", key), ("Code", e.code), ("Message", e.message)])
+                )
+                continue
+            if not quiet:
+                deleted.append(("Deleted", [("Key", key)]))
+        self.send_xml(200, "DeleteResult", deleted)
+
+    def complete_multipart_upload(self):
+        root = self.parse_xml_body()
+        parts = []
+        for element in find_children(root, "Part"):
+            try:
+                part_number = int(find_text(element, "PartNumber"))
+            except ValueError:
+                raise StoreError("MalformedXML", "Invalid part number", 400)
+            parts.append((part_number, find_text(element, "ETag")))
+        meta = self.store.complete_multipart_upload(
+            self.bucket, self.key, self.query["uploadId"], parts
+        )
+        self.send_xml(
+            200,
+            "CompleteMultipartUploadResult",
+            [
+                ("Location", f"/{self.bucket}/{quote(self.key)}"),
+                ("Bucket", self.bucket),
+                ("Key", self.key),
+                ("ETag", meta.etag),
+            ],
+        )
+
+
+def decode_aws_chunked(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    Strip `aws-chunked` framing: `<hex size>[;chunk-signature=...]\\r\\n`
+    `<data>\\r\\n` repeated, ending with a 0-size chunk and trailers.
+    Chunk signatures and trailing checksums aren't verified.
+    """
+    buffer = b""
+    source = iter(chunks)
+
+    def fill(size):
+        nonlocal buffer
+        while len(buffer) < size:
+            chunk = next(source, None)
+            if chunk is None:
+                raise StoreError("IncompleteBody", "Body ended early", 400)
+            buffer += chunk
+
+    while True:
+        while b"\r\n" not in buffer:
+            fill(len(buffer) + 1)
+        line, buffer = buffer.split(b"\r\n", 1)
+        size = int(line.split(b";")[0].strip() or b"0", 16)
+        if size == 0:
+            # Drain the trailers
+            for _ in source:
+                pass
+            return
+        fill(size + 2)
+        yield buffer[:size]
+        buffer = buffer[size + 2 :]
+
+
+class StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        store: DiskStore,
+        verify_signatures: bool = True,
+        access_key_id: str = DJANGO_R2_STANDIN_ACCESS_KEY_ID,
+        secret_access_key: str = DJANGO_R2_STANDIN_SECRET_ACCESS_KEY,
+    ):
+        super().__init__(address, RequestHandler)
+        self.store = store
+        self.verify_signatures = verify_signatures
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+
+
+class S3StandIn:
+    """
+    The stand-in server on a background thread. Without `root`, data
+    goes to a temporary directory that is removed on `stop()`; port 0
+    picks a free port (see `endpoint_url`).
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        verify_signatures: bool = True,
+        access_key_id: str = DJANGO_R2_STANDIN_ACCESS_KEY_ID,
+        secret_access_key: str = DJANGO_R2_STANDIN_SECRET_ACCESS_KEY,
+    ):
+        self.temporary_root = root is None
+        self.root = root or tempfile.mkdtemp(prefix="django-r2-standin-")
+        self.store = DiskStore(self.root)
+        self.httpd = StandInHTTPServer(
+            (host, port),
+            self.store,
+            verify_signatures=verify_signatures,
+            access_key_id=access_key_id,
+            secret_access_key=secret_access_key,
+        )
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self._thread = None
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def create_bucket(self, bucket: str):
+        self.store.create_bucket(bucket)
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self) -> "S3StandIn":
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="django-r2-standin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+        if self.temporary_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self) -> "S3StandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,179 @@
+"""
+SigV4 request verification for the S3 stand-in, for both the
+`Authorization` header (SDK requests) and presigned query strings
+(browser PUTs and download links).
+"""
+
+import datetime
+import hashlib
+import hmac
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import quote, unquote
+
+from django_r2.helpers.myboto.presign import ALGORITHM, SIGV4_TIMESTAMP, get_signing_key
+from django_r2.testing.credentials import Credentials
+
+AUTHORIZATION_PATTERN = re.compile(
+    r"AWS4-HMAC-SHA256\s+Credential=(?P<credential>[^,\s]+),\s*"
+    r"SignedHeaders=(?P<signed_headers>[^,\s]+),\s*Signature=(?P<signature>[0-9a-f]+)"
+)
+# Presigned URLs may be at most 7 days long
+MAX_EXPIRES = 7 * 24 * 60 * 60
+# Header-signed requests must be signed within this of the server time
+MAX_SKEW = datetime.timedelta(minutes=15)
+
+
+class SignatureError(Exception):
+    def __init__(self, code: str, message: str, status: int = 403):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+@dataclass
+class SignedRequest:
+    credentials: Credentials
+    presigned: bool
+
+
+def parse_query(raw_query: str) -> list[tuple[str, str]]:
+    pairs = []
+    for part in raw_query.split("&") if raw_query else []:
+        name, _, value = part.partition("=")
+        pairs.append((unquote(name), unquote(value)))
+    return pairs
+
+
+def canonical_query(pairs) -> str:
+    encoded = sorted(
+        (quote(name, safe="-_.~"), quote(value, safe="-_.~")) for name, value in pairs
+    )
+    return "&".join(f"{name}={value}" for name, value in encoded)
+
+
+def canonical_headers(headers, signed_headers: list[str]) -> str:
+    lines = []
+    for name in signed_headers:
+        value = headers.get(name)
+        if value is None:
+            raise SignatureError(
+                "SignatureDoesNotMatch", f"Signed header {name} is missing"
+            )
+        lines.append(f"{name}:{' '.join(value.split())}\n")
+    return "".join(lines)
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+    try:
+        return datetime.datetime.strptime(value, SIGV4_TIMESTAMP).replace(
+            tzinfo=datetime.timezone.utc
+        )
+    except (TypeError, ValueError):
+        raise SignatureError("AccessDenied", "Invalid X-Amz-Date", 403)
+
+
+def verify_request(
+    method: str,
+    raw_path: str,
+    raw_query: str,
+    headers,
+    lookup: Callable[[str], Optional[Credentials]],
+    now: Optional[datetime.datetime] = None,
+) -> SignedRequest:
+    """
+    Check the request's SigV4 signature and return the credentials
+    that signed it. `headers` must be a case-insensitive mapping and
+    `lookup` maps an access key id to its credentials.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    pairs = parse_query(raw_query)
+    query = dict(pairs)
+    authorization = headers.get("authorization")
+    if authorization:
+        match = AUTHORIZATION_PATTERN.match(authorization)
+        if match is None:
+            raise SignatureError("AuthorizationHeaderMalformed", "Bad Authorization")
+        credential = match["credential"]
+        signed_headers = match["signed_headers"].split(";")
+        signature = match["signature"]
+        timestamp = headers.get("x-amz-date", "")
+        payload_hash = (
+            headers.get("x-amz-content-sha256") or hashlib.sha256(b"").hexdigest()
+        )
+        session_token = headers.get("x-amz-security-token")
+        presigned = False
+    elif query.get("X-Amz-Algorithm") == ALGORITHM:
+        credential = query.get("X-Amz-Credential", "")
+        signed_headers = query.get("X-Amz-SignedHeaders", "host").split(";")
+        signature = query.get("X-Amz-Signature", "")
+        timestamp = query.get("X-Amz-Date", "")
+        payload_hash = "UNSIGNED-PAYLOAD"
+        session_token = query.get("X-Amz-Security-Token")
+        pairs = [(name, value) for name, value in pairs if name != "X-Amz-Signature"]
+        presigned = True
+    else:
+        raise SignatureError("AccessDenied", "Anonymous access is not allowed")
+
+    access_key_id, _, scope = credential.partition("/")
+    credentials = lookup(access_key_id)
+    if credentials is None:
+        raise SignatureError("InvalidAccessKeyId", "Unknown access key id")
+    signed_at = parse_timestamp(timestamp)
+    if presigned:
+        try:
+            expires = int(query.get("X-Amz-Expires", ""))
+        except ValueError:
+            raise SignatureError("AuthorizationQueryParametersError", "Bad expiry")
+        if not 0 < expires <= MAX_EXPIRES:
+            raise SignatureError("AuthorizationQueryParametersError", "Bad expiry")
+        if now > signed_at + datetime.timedelta(seconds=expires):
+            raise SignatureError("AccessDenied", "Request has expired")
+    elif abs(now - signed_at) > MAX_SKEW:
+        raise SignatureError(
+            "RequestTimeTooSkewed",
+            "The difference between the request time and the server's time is "
+            "too large.",
+        )
+    if credentials.expires is not None and now.timestamp() > credentials.expires:
+        raise SignatureError("ExpiredToken", "The provided token has expired")
+    if credentials.session_token and session_token != credentials.session_token:
+        raise SignatureError("InvalidToken", "The session token is invalid")
+
+    scope_parts = scope.split("/")
+    if len(scope_parts) != 4 or scope_parts[0] != timestamp[:8]:
+        raise SignatureError("AuthorizationHeaderMalformed", "Bad credential scope")
+    _, region_name, service, _ = scope_parts
+    canonical_request = "\n".join(
+        [
+            method,
+            raw_path,
+            canonical_query(pairs),
+            canonical_headers(headers, signed_headers),
+            ";".join(signed_headers),
+            payload_hash,
+        ]
+    )
+    string_to_sign = "\n".join(
+        [
+            ALGORITHM,
+            timestamp,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ]
+    )
+    signing_key = get_signing_key(
+        credentials.secret_access_key, timestamp[:8], region_name, service
+    )
+    expected = hmac.new(
+        signing_key, string_to_sign.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    if not hmac.compare_digest(expected, signature):
+        raise SignatureError(
+            "SignatureDoesNotMatch",
+            "The request signature we calculated does not match the signature "
+            "you provided",
+        )
+    return SignedRequest(credentials=credentials, presigned=presigned)
@@ -0,0 +1,330 @@
+"""
+On-disk object store for the S3 stand-in.
+
+Each bucket is a directory under `root`. Object bodies live in
+`objects/<sha256 of key>` next to a JSON metadata file, so any key
+works as a file name; multipart parts are kept under
+`uploads/<upload id>/` until the upload is completed or aborted.
+Keys are also indexed in memory (sorted, for listings); the index
+is rebuilt from the metadata files when the store is opened.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import BinaryIO, Iterator, Optional
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class StoreError(Exception):
+    def __init__(self, code: str, message: str, status: int):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+def no_such_bucket(bucket: str) -> StoreError:
+    return StoreError("NoSuchBucket", f"The bucket {bucket} does not exist", 404)
+
+
+@dataclass
+class ObjectMeta:
+    key: str
+    size: int
+    etag: str
+    last_modified: float
+    content_type: str = "binary/octet-stream"
+    # Other stored response headers (Content-Disposition, x-amz-meta-*, ...)
+    headers: dict = field(default_factory=dict)
+
+
+def key_digest(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class DiskStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        # bucket -> (sorted keys, {key: ObjectMeta})
+        self._buckets = {}
+        for bucket in sorted(os.listdir(root)):
+            if os.path.isdir(os.path.join(root, bucket)):
+                self._buckets[bucket] = self._load_bucket(bucket)
+
+    def _load_bucket(self, bucket: str):
+        objects = {}
+        directory = os.path.join(self.root, bucket, "objects")
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                with open(os.path.join(directory, name)) as f:
+                    meta = ObjectMeta(**json.load(f))
+                objects[meta.key] = meta
+        return sorted(objects), objects
+
+    def _get_bucket(self, bucket: str):
+        state = self._buckets.get(bucket)
+        if state is None:
+            raise no_such_bucket(bucket)
+        return state
+
+    def _object_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, "objects", key_digest(key))
+
+    def _upload_dir(self, bucket: str, upload_id: str) -> str:
+        return os.path.join(self.root, bucket, "uploads", upload_id)
+
+    # Buckets
+
+    def list_buckets(self) -> list[str]:
+        with self._lock:
+            return sorted(self._buckets)
+
+    def create_bucket(self, bucket: str):
+        with self._lock:
+            if bucket in self._buckets:
+                return
+            os.makedirs(os.path.join(self.root, bucket, "objects"), exist_ok=True)
+            os.makedirs(os.path.join(self.root, bucket, "uploads"), exist_ok=True)
+            self._buckets[bucket] = ([], {})
+
+    def delete_bucket(self, bucket: str):
+        with self._lock:
+            keys, _ = self._get_bucket(bucket)
+            if keys:
+                raise StoreError("BucketNotEmpty", "The bucket is not empty", 409)
+            del self._buckets[bucket]
+            shutil.rmtree(os.path.join(self.root, bucket), ignore_errors=True)
+
+    def has_bucket(self, bucket: str) -> bool:
+        with self._lock:
+            return bucket in self._buckets
+
+    # Objects
+
+    def _write_temp(self, bucket: str, chunks: Iterator[bytes]):
+        """
+        Stream `chunks` into a temp file in the bucket directory.
+        Returns `(path, size, md5)`.
+        """
+        directory = os.path.join(self.root, bucket)
+        md5 = hashlib.md5()
+        size = 0
+        fd, path = tempfile.mkstemp(dir=directory, prefix=".incoming-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    md5.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path, size, md5
+
+    def _commit(self, bucket: str, key: str, temp_path: str, meta: ObjectMeta):
+        path = self._object_path(bucket, key)
+        with self._lock:
+            keys, objects = self._get_bucket(bucket)
+            os.replace(temp_path, path)
+            with open(f"{path}.json", "w") as f:
+                json.dump(asdict(meta), f)
+            if key not in objects:
+                bisect.insort(keys, key)
+            objects[key] = meta
+        return meta
+
+    def put_object(
+        self,
+        bucket: str,
+        key: str,
+        chunks: Iterator[bytes],
+        content_type: Optional[str] = None,
+        headers: Optional[dict] = None,
+    ) -> ObjectMeta:
+        self._get_bucket(bucket)
+        temp_path, size, md5 = self._write_temp(bucket, chunks)
+        meta = ObjectMeta(
+            key=key,
+            size=size,
+            etag=f'"{md5.hexdigest()}"',
+            last_modified=time.time(),
+            content_type=content_type or "binary/octet-stream",
+            headers=headers or {},
+        )
+        return self._commit(bucket, key, temp_path, meta)
+
+    def head_object(self, bucket: str, key: str) -> ObjectMeta:
+        with self._lock:
+            _, objects = self._get_bucket(bucket)
+            meta = objects.get(key)
+        if meta is None:
+            raise StoreError("NoSuchKey", "The specified key does not exist.", 404)
+        return meta
+
+    def open_object(self, bucket: str, key: str) -> tuple[ObjectMeta, BinaryIO]:
+        meta = self.head_object(bucket, key)
+        return meta, open(self._object_path(bucket, key), "rb")
+
+    def delete_object(self, bucket: str, key: str):
+        path = self._object_path(bucket, key)
+        with self._lock:
+            keys, objects = self._get_bucket(bucket)
+            if objects.pop(key, None) is None:
+                return
+            del keys[bisect.bisect_left(keys, key)]
+            for name in (path, f"{path}.json"):
+                try:
+                    os.unlink(name)
+                except FileNotFoundError:
+                    pass
+
+    def list_objects(
+        self,
+        bucket: str,
+        prefix: str = "",
+        delimiter: str = "",
+        start_after: str = "",
+        max_keys: int = 1000,
+    ) -> tuple[list[ObjectMeta], list[str], Optional[str]]:
+        """
+        `(objects, common prefixes, next start_after or None)`, in
+        key order, at most `max_keys` entries in all.
+        """
+        with self._lock:
+            keys, objects = self._get_bucket(bucket)
+            index = bisect.bisect_right(keys, start_after) if start_after else 0
+            index = max(index, bisect.bisect_left(keys, prefix))
+            contents, prefixes = [], []
+            last = None
+            while index < len(keys):
+                key = keys[index]
+                if not key.startswith(prefix):
+                    break
+                if len(contents) + len(prefixes) >= max_keys:
+                    return contents, prefixes, last
+                if delimiter:
+                    position = key.find(delimiter, len(prefix))
+                    if position != -1:
+                        common = key[: position + len(delimiter)]
+                        # Skip every key under this common prefix
+                        index = bisect.bisect_left(keys, common + "\U0010ffff")
+                        # (already listed when resuming right after it)
+                        if common != start_after:
+                            prefixes.append(common)
+                            last = common
+                        continue
+                contents.append(objects[key])
+                last = key
+                index += 1
+            return contents, prefixes, None
+
+    # Multipart uploads
+
+    def create_multipart_upload(
+        self,
+        bucket: str,
+        key: str,
+        content_type: Optional[str] = None,
+        headers: Optional[dict] = None,
+    ) -> str:
+        self._get_bucket(bucket)
+        upload_id = uuid.uuid4().hex
+        directory = self._upload_dir(bucket, upload_id)
+        os.makedirs(directory)
+        with open(os.path.join(directory, "upload.json"), "w") as f:
+            json.dump(
+                {"key": key, "content_type": content_type, "headers": headers or {}}, f
+            )
+        return upload_id
+
+    def _get_upload(self, bucket: str, key: str, upload_id: str) -> dict:
+        self._get_bucket(bucket)
+        path = os.path.join(self._upload_dir(bucket, upload_id), "upload.json")
+        try:
+            with open(path) as f:
+                upload = json.load(f)
+        except (FileNotFoundError, ValueError):
+            upload = None
+        if upload is None or upload["key"] != key:
+            raise StoreError(
+                "NoSuchUpload", "The specified upload does not exist.", 404
+            )
+        return upload
+
+    def upload_part(
+        self,
+        bucket: str,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        chunks: Iterator[bytes],
+    ) -> str:
+        self._get_upload(bucket, key, upload_id)
+        if not 1 <= part_number <= 10000:
+            raise StoreError("InvalidArgument", "Part number must be 1-10000", 400)
+        temp_path, _, md5 = self._write_temp(bucket, chunks)
+        etag = f'"{md5.hexdigest()}"'
+        part_path = os.path.join(self._upload_dir(bucket, upload_id), str(part_number))
+        os.replace(temp_path, part_path)
+        with open(f"{part_path}.etag", "w") as f:
+            f.write(etag)
+        return etag
+
+    def complete_multipart_upload(
+        self, bucket: str, key: str, upload_id: str, parts: list[tuple[int, str]]
+    ) -> ObjectMeta:
+        upload = self._get_upload(bucket, key, upload_id)
+        directory = self._upload_dir(bucket, upload_id)
+        if not parts or [n for n, _ in parts] != sorted({n for n, _ in parts}):
+            raise StoreError(
+                "InvalidPartOrder", "The parts must be in ascending order", 400
+            )
+        digests = []
+        paths = []
+        for part_number, etag in parts:
+            part_path = os.path.join(directory, str(part_number))
+            try:
+                with open(f"{part_path}.etag") as f:
+                    stored = f.read()
+            except FileNotFoundError:
+                stored = None
+            if stored is None or stored.strip('"') != etag.strip('"'):
+                raise StoreError("InvalidPart", "One or more parts were not found", 400)
+            digests.append(bytes.fromhex(stored.strip('"')))
+            paths.append(part_path)
+
+        def read_parts():
+            for part_path in paths:
+                with open(part_path, "rb") as f:
+                    while chunk := f.read(COPY_BUFFER_SIZE):
+                        yield chunk
+
+        temp_path, size, _ = self._write_temp(bucket, read_parts())
+        combined = hashlib.md5(b"".join(digests)).hexdigest()
+        meta = ObjectMeta(
+            key=key,
+            size=size,
+            etag=f'"{combined}-{len(parts)}"',
+            last_modified=time.time(),
+            content_type=upload["content_type"] or "binary/octet-stream",
+            headers=upload["headers"],
+        )
+        self._commit(bucket, key, temp_path, meta)
+        shutil.rmtree(directory, ignore_errors=True)
+        return meta
+
+    def abort_multipart_upload(self, bucket: str, key: str, upload_id: str):
+        self._get_upload(bucket, key, upload_id)
+        shutil.rmtree(self._upload_dir(bucket, upload_id), ignore_errors=True)
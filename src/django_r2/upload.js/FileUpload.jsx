@@ -11,8 +11,8 @@ import { getMediaMetadata } from './media';
 import { CloudIcon } from './icons/cloud';
 
 
-export function FileUpload({ callbackUrl, targetUrl }) {
-  const { uploadToS3, cancelUpload, activeXHRs } = useS3Upload();
+export function FileUpload({ callbackUrl, callbackBatchUrl, targetUrl, multipartUrl, multipartThreshold }) {
+  const { uploadToS3, uploadMultipartToS3, cancelUpload, activeXHRs } = useS3Upload();
   const [uploadProgress, setUploadProgress] = useState({});
   const [isLoading, setIsLoading] = useState(false);
   const [selectedFiles, setSelectedFiles] = useState([]);
@@ -22,6 +22,15 @@ export function FileUpload({ callbackUrl, targetUrl }) {
   const [timeEstimates, setTimeEstimates] = useState({});
   const [uploadStartTimes, setUploadStartTimes] = useState({});
   const MAX_CONCURRENT_UPLOADS = 10;
+  const MULTIPART_THRESHOLD = parseInt(multipartThreshold, 10) || 64 * 1024 * 1024;
+  // Files are presigned in chunks ahead of their upload
+  const PRESIGN_CHUNK_SIZE = 100;
+  const presignRequests = useRef(new Map());
+  // Completions are reported in batches to callbackBatchUrl
+  const COMPLETE_FLUSH_DELAY = 1000;
+  const COMPLETE_BATCH_SIZE = 500;
+  const pendingCompletions = useRef([]);
+  const completionTimer = useRef(null);
   const [activeUploads, setActiveUploads] = useState(0);
   const uploadQueue = useRef([]);
   const [isDragging, setIsDragging] = useState(false);
@@ -56,9 +65,15 @@ export function FileUpload({ callbackUrl, targetUrl }) {
     setActiveUploads(prev => prev + 1);
 
     try {
-      const data = await presignFileForUpload(file);
-      const objectData = await uploadToS3(file, data, handleUploadProgress);
-      await handleUploadComplete(objectData, file);
+      if (multipartUrl && file.size >= MULTIPART_THRESHOLD) {
+        await processMultipartUpload(file);
+      } else {
+        const presignRequest = presignRequests.current.get(file);
+        presignRequests.current.delete(file);
+        const data = await (presignRequest || presignFileForUpload(file));
+        const objectData = await uploadToS3(file, data, handleUploadProgress);
+        await handleUploadComplete(objectData, file);
+      }
     } catch (err) {
       console.error('Upload error:', err);
       setUploadStatus(prev => ({ ...prev, [file.name]: 'error' }));
@@ -90,6 +105,7 @@ export function FileUpload({ callbackUrl, targetUrl }) {
     event.target.value = '';
 
     // Add files to queue
+    requestPresigns(files);
     uploadQueue.current.push(...files);
     // Start processing queue
     processQueue();
@@ -114,25 +130,121 @@ export function FileUpload({ callbackUrl, targetUrl }) {
     return response.json();
   };
 
+  const presignFilesForUpload = async (files) => {
+    const response = await fetch(targetUrl, {
+      method: "POST",
+      body: JSON.stringify({ filenames: files.map(file => file.name) }),
+      headers: {
+        "Content-Type": "application/json",
+        "X-CSRFTOKEN": getCsrfToken(),
+      }
+    });
+    const data = await response.json();
+    if (!response.ok) {
+      throw new Error(data.error || "Error with your request, please try again.");
+    }
+    return data.objects;
+  };
+
+  const requestPresigns = (files) => {
+    // One presign request per chunk instead of one per file
+    const singlePartFiles = files.filter(
+      file => !(multipartUrl && file.size >= MULTIPART_THRESHOLD)
+    );
+    for (let i = 0; i < singlePartFiles.length; i += PRESIGN_CHUNK_SIZE) {
+      const chunk = singlePartFiles.slice(i, i + PRESIGN_CHUNK_SIZE);
+      const request = presignFilesForUpload(chunk);
+      chunk.forEach((file, index) => {
+        const fileRequest = request.then(objects => {
+          const data = objects[index];
+          if (!data || data.error) {
+            throw new Error(data?.error || "Error with your request, please try again.");
+          }
+          return data;
+        });
+        // Errors surface when the queue awaits this file
+        fileRequest.catch(() => {});
+        presignRequests.current.set(file, fileRequest);
+      });
+    }
+  };
+
+  const processMultipartUpload = async (file) => {
+    const csrfToken = getCsrfToken();
+    const formData = new FormData();
+    formData.append("filename", file.name);
+    formData.append("size", file.size);
+    formData.append("type", file.type);
+
+    const response = await fetch(multipartUrl, {
+      method: "POST",
+      body: formData,
+      headers: {
+        "X-CSRFTOKEN": csrfToken,
+      }
+    });
+    const data = await response.json();
+    if (!response.ok) {
+      throw new Error(data.error || "Error with your request, please try again.");
+    }
+
+    let parts;
+    try {
+      parts = await uploadMultipartToS3(file, data, handleUploadProgress);
+    } catch (err) {
+      fetch(data.abort_url, {
+        method: "POST",
+        body: JSON.stringify({ object_data: data.object_data }),
+        headers: {
+          "X-CSRFTOKEN": getCsrfToken(),
+        }
+      });
+      throw err;
+    }
 
-  const handleUploadComplete = async (object_data, file) => {
     setCompletedFiles(prev => new Set([...prev, file.name]));
+    const completeResponse = await fetch(data.complete_url, {
+      method: "POST",
+      body: JSON.stringify({
+        object_data: data.object_data,
+        parts: parts,
+        file_data: await getFileData(file),
+      }),
+      headers: {
+        "X-CSRFTOKEN": getCsrfToken(),
+      }
+    });
+    if (!completeResponse.ok) {
+      throw new Error("Unable to complete the upload.");
+    }
+  };
+
+  const getFileData = async (file) => {
     const mediaMetadata = await getMediaMetadata(file);
+    return {
+      size: file.size,
+      name: file.name,
+      type: file.type,
+      duration: mediaMetadata?.duration || null,
+      width: mediaMetadata?.width || null,
+      height: mediaMetadata?.height || null,
+      lastModified: file.lastModified,
+      lastModifiedDate: file.lastModifiedDate,
+    };
+  };
+
+  const handleUploadComplete = async (object_data, file) => {
+    setCompletedFiles(prev => new Set([...prev, file.name]));
     const data = {
       object_data: object_data,
-      file_data: {
-        size: file.size,
-        name: file.name,
-        type: file.type,
-        duration: mediaMetadata?.duration || null,
-        width: mediaMetadata?.width || null,
-        height: mediaMetadata?.height || null,
-        lastModified: file.lastModified,
-        lastModifiedDate: file.lastModifiedDate,
-      },
+      file_data: await getFileData(file),
       completed: true
     };
 
+    if (callbackBatchUrl) {
+      queueCompletion(data);
+      return;
+    }
     fetch(callbackUrl, {
       method: "POST",
       body: JSON.stringify(data),
@@ -142,6 +254,65 @@ export function FileUpload({ callbackUrl, targetUrl }) {
     });
   };
 
+  const queueCompletion = (data) => {
+    pendingCompletions.current.push(data);
+    if (pendingCompletions.current.length >= COMPLETE_BATCH_SIZE) {
+      flushCompletions();
+    } else if (!completionTimer.current) {
+      completionTimer.current = setTimeout(flushCompletions, COMPLETE_FLUSH_DELAY);
+    }
+  };
+
+  const takeCompletions = () => {
+    clearTimeout(completionTimer.current);
+    completionTimer.current = null;
+    const items = pendingCompletions.current.splice(0, COMPLETE_BATCH_SIZE);
+    if (pendingCompletions.current.length > 0) {
+      completionTimer.current = setTimeout(flushCompletions, 0);
+    }
+    return items;
+  };
+
+  const flushCompletions = () => {
+    const items = takeCompletions();
+    if (items.length === 0) {
+      return;
+    }
+    fetch(callbackBatchUrl, {
+      method: "POST",
+      body: JSON.stringify({ items }),
+      headers: {
+        "Content-Type": "application/json",
+        "X-CSRFTOKEN": getCsrfToken(),
+      },
+      keepalive: true,
+    }).catch(err => console.error('Upload complete error:', err));
+  };
+
+  // sendBeacon can't set headers, so the CSRF token rides in the form body
+  const beaconCompletions = () => {
+    while (pendingCompletions.current.length > 0) {
+      const items = takeCompletions();
+      const form = new FormData();
+      form.append('csrfmiddlewaretoken', getCsrfToken());
+      form.append('payload', JSON.stringify({ items }));
+      navigator.sendBeacon(callbackBatchUrl, form);
+    }
+    clearTimeout(completionTimer.current);
+    completionTimer.current = null;
+  };
+
+  useEffect(() => {
+    if (!callbackBatchUrl) {
+      return;
+    }
+    window.addEventListener('pagehide', beaconCompletions);
+    return () => {
+      window.removeEventListener('pagehide', beaconCompletions);
+      flushCompletions();
+    };
+  }, [callbackBatchUrl]);
+
   const toggleUpload = (fileName) => {
     if (uploadStatus[fileName] === 'uploading') {
       cancelUpload(fileName);
@@ -191,6 +362,7 @@ export function FileUpload({ callbackUrl, targetUrl }) {
       setSelectedFiles(prev => [...prev, ...files]);
       
       // Add files to queue
+      requestPresigns(files);
       uploadQueue.current.push(...files);
       // Start processing queue
       processQueue();
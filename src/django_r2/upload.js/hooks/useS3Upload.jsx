@@ -58,6 +58,127 @@ export function useS3Upload() {
     });
   };
 
+  const putPart = (url, blob, onPartProgress, register) => {
+    return new Promise((resolve, reject) => {
+      const xhr = new XMLHttpRequest();
+      xhr.open('PUT', url, true);
+      register(xhr);
+
+      xhr.upload.onprogress = (event) => {
+        onPartProgress(event.loaded);
+      };
+
+      xhr.onload = function() {
+        const etag = xhr.getResponseHeader('ETag');
+        if (xhr.status === 200 && etag) {
+          resolve(etag);
+        } else {
+          reject(new Error(xhr.statusText || `Part upload failed: ${xhr.status}`));
+        }
+      };
+
+      xhr.onerror = function() {
+        reject(new Error(`Part upload failed: ${xhr.status}`));
+      };
+
+      xhr.onabort = function() {
+        reject(new Error('Upload cancelled'));
+      };
+
+      xhr.send(blob);
+    });
+  };
+
+  const uploadMultipartToS3 = async (file, data, onProgress, {
+    concurrency = 4,
+    maxAttempts = 3,
+  } = {}) => {
+    const partSize = data.part_size;
+    const parts = data.parts || [];
+    if (!partSize || parts.length === 0) {
+      throw new Error("Error with your request, please try again.");
+    }
+
+    // One entry per part so progress and cancel cover every in-flight XHR
+    const partXHRs = {};
+    const partLoaded = {};
+    let cancelled = false;
+    setActiveXHRs(prev => ({
+      ...prev,
+      [file.name]: {
+        abort: () => {
+          cancelled = true;
+          Object.values(partXHRs).forEach(xhr => xhr.abort());
+        }
+      }
+    }));
+
+    const reportProgress = () => {
+      const loaded = Object.values(partLoaded).reduce((a, b) => a + b, 0);
+      onProgress?.(file, null, { loaded, total: file.size }, data);
+    };
+
+    const uploadPart = async ({ part_number, url }) => {
+      const start = (part_number - 1) * partSize;
+      const blob = file.slice(start, Math.min(start + partSize, file.size));
+      let lastError;
+      // Only the failed part is retried, never the whole file
+      for (let attempt = 1; attempt <= maxAttempts && !cancelled; attempt++) {
+        try {
+          const etag = await putPart(
+            url,
+            blob,
+            (loaded) => {
+              partLoaded[part_number] = loaded;
+              reportProgress();
+            },
+            (xhr) => { partXHRs[part_number] = xhr; }
+          );
+          delete partXHRs[part_number];
+          partLoaded[part_number] = blob.size;
+          reportProgress();
+          return { part_number, etag };
+        } catch (err) {
+          lastError = err;
+          partLoaded[part_number] = 0;
+        }
+      }
+      throw lastError || new Error('Upload cancelled');
+    };
+
+    const queue = [...parts];
+    const completed = [];
+    const worker = async () => {
+      while (queue.length > 0 && !cancelled) {
+        const part = queue.shift();
+        try {
+          completed.push(await uploadPart(part));
+        } catch (err) {
+          // Stop the other workers once a part has exhausted its retries
+          cancelled = true;
+          Object.values(partXHRs).forEach(xhr => xhr.abort());
+          throw err;
+        }
+      }
+    };
+
+    try {
+      await Promise.all(
+        Array.from({ length: Math.min(concurrency, parts.length) }, worker)
+      );
+    } finally {
+      setActiveXHRs(prev => {
+        const newXHRs = { ...prev };
+        delete newXHRs[file.name];
+        return newXHRs;
+      });
+    }
+    if (cancelled) {
+      throw new Error('Upload cancelled');
+    }
+    return completed.sort((a, b) => a.part_number - b.part_number);
+  };
+
   const cancelUpload = (fileName) => {
     if (activeXHRs[fileName]) {
       activeXHRs[fileName].abort();
@@ -71,6 +192,7 @@ export function useS3Upload() {
 
   return {
     uploadToS3,
+    uploadMultipartToS3,
     cancelUpload,
     activeXHRs
   };
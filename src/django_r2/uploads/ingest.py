@@ -0,0 +1,284 @@
+"""
+Bulk URL ingest.
+
+`ingest_pending_url_uploads` claims pending `URLUploadRequest` rows
+in batches and streams them on a thread pool:
+
+- concurrency is capped globally (pool size) and per host (one
+  semaphore per host), so a large import can't hammer one origin;
+- each host gets its own `requests.Session`, so connections and TLS
+  sessions are reused instead of re-handshaking per URL;
+- parts are uploaded on one thread pool shared by every download,
+  rather than a pool per download;
+- a batch is claimed with one UPDATE that bumps `tries` and leases
+  the rows (`claimed_until`), so concurrent runs skip them, and
+  results are written back in bulk (`bulk_update`) rather than row
+  by row.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import timedelta
+from itertools import chain, zip_longest
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from django.apps import apps
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from django_r2 import settings
+from django_r2.objects import services as objects_services
+from django_r2.uploads import services as uploads_services
+
+DJANGO_R2_INGEST_BATCH_SIZE = getattr(settings, "DJANGO_R2_INGEST_BATCH_SIZE", 500)
+DJANGO_R2_INGEST_MAX_WORKERS = getattr(settings, "DJANGO_R2_INGEST_MAX_WORKERS", 32)
+DJANGO_R2_INGEST_PER_HOST_LIMIT = getattr(
+    settings, "DJANGO_R2_INGEST_PER_HOST_LIMIT", 4
+)
+DJANGO_R2_INGEST_MAX_TRIES = getattr(settings, "DJANGO_R2_INGEST_MAX_TRIES", 3)
+DJANGO_R2_INGEST_LEASE_SECONDS = getattr(
+    settings, "DJANGO_R2_INGEST_LEASE_SECONDS", 60 * 60
+)
+DJANGO_R2_INGEST_UPLOAD_WORKERS = getattr(
+    settings, "DJANGO_R2_INGEST_UPLOAD_WORKERS", 16
+)
+# Per-download part buffer; many downloads run at once here
+DJANGO_R2_INGEST_STREAM_BUFFER_SIZE = getattr(
+    settings, "DJANGO_R2_INGEST_STREAM_BUFFER_SIZE", 16 * 1024 * 1024
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_host(url: str) -> str:
+    return (urlparse(url).netloc or "").lower()
+
+
+class HostPool:
+    """
+    One `requests.Session` and one concurrency slot semaphore per host.
+    """
+
+    def __init__(self, per_host_limit: int):
+        self.per_host_limit = per_host_limit
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._slots = {}
+
+    def _get(self, host: str):
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.per_host_limit
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                self._slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._sessions[host], self._slots[host]
+
+    def run(self, url: str, func, *args, **kwargs):
+        session, slots = self._get(get_host(url))
+        with slots:
+            return func(*args, session=session, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._slots.clear()
+
+
+@dataclass
+class IngestStats:
+    claimed: int = 0
+    completed: int = 0
+    failed: int = 0
+    bytes: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def as_dict(self) -> dict:
+        elapsed = self.elapsed
+        return {
+            "claimed": self.claimed,
+            "completed": self.completed,
+            "failed": self.failed,
+            "bytes": self.bytes,
+            "seconds": round(elapsed, 3),
+            "bytes_per_second": int(self.bytes / elapsed) if elapsed else 0,
+        }
+
+
+def interleave_by_host(upload_requests):
+    """
+    Round-robin across hosts so one slow origin doesn't park every
+    worker on its semaphore.
+    """
+    by_host = defaultdict(list)
+    for upload_request in upload_requests:
+        by_host[get_host(upload_request.url)].append(upload_request)
+    return [
+        upload_request
+        for upload_request in chain.from_iterable(zip_longest(*by_host.values()))
+        if upload_request is not None
+    ]
+
+
+def claim_batch(
+    batch_size: int,
+    max_tries: int,
+    after=None,
+    lease_seconds: int = DJANGO_R2_INGEST_LEASE_SECONDS,
+) -> list:
+    """
+    Next `batch_size` pending requests in `(created_at, id)` order,
+    after the `after` position so one run never revisits a row.
+    Rows locked or leased by another run are skipped.
+    """
+    URLUploadRequest = apps.get_model("django_r2", "URLUploadRequest")
+    now = timezone.now()
+    pending = URLUploadRequest.objects.filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+        completed=False,
+        tries__lt=max_tries,
+    )
+    if after is not None:
+        created_at, request_id = after
+        pending = pending.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=request_id)
+        )
+    with transaction.atomic():
+        ids = list(
+            pending.select_for_update(skip_locked=True)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        URLUploadRequest.objects.filter(id__in=ids).update(
+            tries=F("tries") + 1, claimed_until=now + timedelta(seconds=lease_seconds)
+        )
+    return list(
+        URLUploadRequest.objects.filter(id__in=ids).order_by("created_at", "id")
+    )
+
+
+def run_one(hosts: HostPool, upload_request, upload_executor=None):
+    try:
+        return hosts.run(
+            upload_request.url,
+            uploads_services.stream_url_upload_request,
+            upload_request,
+            buffer_size=DJANGO_R2_INGEST_STREAM_BUFFER_SIZE,
+            executor=upload_executor,
+        )
+    finally:
+        # Worker threads hold their own DB connections
+        close_old_connections()
+
+
+def save_results(succeeded: list, failed: list):
+    """
+    `succeeded` is a list of `(upload_request, object_data, file_data)`,
+    `failed` a list of `(upload_request, error)`.
+    """
+    URLUploadRequest = apps.get_model("django_r2", "URLUploadRequest")
+    with transaction.atomic():
+        instances = objects_services.postflight_objects_bulk_update(
+            [
+                {"object_data": object_data, "uploaded": True, "file_data": file_data}
+                for _, object_data, file_data in succeeded
+            ]
+        )
+        instances_by_id = {str(instance.id): instance for instance in instances}
+        now = timezone.now()
+        changed = []
+        for upload_request, object_data, _ in succeeded:
+            upload_request.completed = True
+            upload_request.object = instances_by_id.get(object_data["object_id"])
+            upload_request.errors = {}
+            changed.append(upload_request)
+        for upload_request, error in failed:
+            upload_request.errors = {"ingest": str(error)}
+            changed.append(upload_request)
+        for upload_request in changed:
+            upload_request.claimed_until = None
+            # bulk_update() skips auto_now
+            upload_request.updated_at = now
+        URLUploadRequest.objects.bulk_update(
+            changed, ["completed", "object", "errors", "claimed_until", "updated_at"]
+        )
+
+
+def ingest_pending_url_uploads(
+    batch_size: int = DJANGO_R2_INGEST_BATCH_SIZE,
+    max_workers: int = DJANGO_R2_INGEST_MAX_WORKERS,
+    per_host_limit: int = DJANGO_R2_INGEST_PER_HOST_LIMIT,
+    max_tries: int = DJANGO_R2_INGEST_MAX_TRIES,
+    upload_workers: int = DJANGO_R2_INGEST_UPLOAD_WORKERS,
+    limit: Optional[int] = None,
+) -> IngestStats:
+    """
+    Ingest pending `URLUploadRequest`s until none are left (or
+    `limit` have been claimed). Returns totals for the run.
+    """
+    stats = IngestStats()
+    hosts = HostPool(per_host_limit)
+    position = None
+    try:
+        with (
+            ThreadPoolExecutor(max_workers=max_workers) as executor,
+            ThreadPoolExecutor(
+                max_workers=upload_workers, thread_name_prefix="r2-ingest-upload"
+            ) as upload_executor,
+        ):
+            while limit is None or stats.claimed < limit:
+                size = batch_size
+                if limit is not None:
+                    size = min(size, limit - stats.claimed)
+                batch = claim_batch(size, max_tries, after=position)
+                if not batch:
+                    break
+                position = (batch[-1].created_at, batch[-1].id)
+                stats.claimed += len(batch)
+
+                futures = {
+                    executor.submit(
+                        run_one, hosts, upload_request, upload_executor
+                    ): upload_request
+                    for upload_request in interleave_by_host(batch)
+                }
+                succeeded, failed = [], []
+                for future in as_completed(futures):
+                    upload_request = futures[future]
+                    try:
+                        object_data, file_data = future.result()
+                    except Exception as e:
+                        logger.warning(
+                            "Ingest failed for %s: %s", upload_request.url, e
+                        )
+                        failed.append((upload_request, e))
+                        continue
+                    succeeded.append((upload_request, object_data, file_data))
+                    stats.bytes += file_data["size"]
+                save_results(succeeded, failed)
+                stats.completed += len(succeeded)
+                stats.failed += len(failed)
+                logger.info("URL ingest progress: %s", stats.as_dict())
+    finally:
+        hosts.close()
+    return stats
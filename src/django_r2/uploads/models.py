@@ -0,0 +1,37 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+from django_r2.buckets.models import Bucket
+from django_r2.objects.models import Object
+
+User = settings.AUTH_USER_MODEL
+
+
+class URLUploadRequest(models.Model):
+    """
+    A file to be fetched from `url` and stored in `bucket`
+    by `tasks.process_url_upload_task`.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    bucket = models.ForeignKey(Bucket, on_delete=models.CASCADE)
+    added_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True)
+    url = models.URLField(max_length=2048)
+    object = models.ForeignKey(Object, on_delete=models.SET_NULL, blank=True, null=True)
+    tries = models.PositiveIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    errors = models.JSONField(default=dict, blank=True, null=True)
+    claimed_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="Bulk ingest holds the request until this time",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "URL Upload Request"
+        verbose_name_plural = "URL Upload Requests"
+        ordering = ["-created_at"]
@@ -0,0 +1,119 @@
+import mimetypes
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from django.apps import apps
+from django.db import transaction
+
+from django_r2 import settings
+from django_r2.buckets import services as buckets_services
+from django_r2.helpers.formatting.filenames import create_s3_filename
+from django_r2.objects import services as objects_services
+
+DJANGO_R2_URL_INGEST_CHUNK_SIZE = getattr(
+    settings, "DJANGO_R2_URL_INGEST_CHUNK_SIZE", 1024 * 1024
+)
+DJANGO_R2_URL_INGEST_TIMEOUT = getattr(settings, "DJANGO_R2_URL_INGEST_TIMEOUT", 30)
+
+
+def get_url_filename(url: str) -> str:
+    return Path(urlparse(url).path).name or "downloaded_file"
+
+
+def get_response_content_type(response, filename: str) -> Optional[str]:
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+    return content_type or mimetypes.guess_type(filename)[0]
+
+
+def get_response_content_length(response) -> Optional[int]:
+    # iter_content() decodes gzip/deflate, so the header only
+    # matches the bytes we read for identity encodings.
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+    try:
+        return int(response.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def stream_url_upload_request(upload_request, session=None, **stream_options):
+    """
+    Stream `upload_request.url` straight into the request's bucket.
+
+    The response body is piped into S3 as it downloads (see
+    `myboto.streaming`); size and SHA-256 are computed on the way.
+    Only the `Object` row is written (created up front, and marked
+    with the error on failure); no transaction is held during I/O.
+    Returns `(object_data, file_data)` for `postflight_object_update`.
+    """
+    filename = get_url_filename(upload_request.url)
+    if create_s3_filename(filename) is None:
+        raise ValueError("Invalid filename")
+    bucket_credentials = buckets_services.get_today_bucket_credentials_by_bucket_id(
+        upload_request.bucket_id
+    )
+    if not bucket_credentials:
+        raise ValueError("No bucket credentials available")
+    my_s3_client = bucket_credentials.get_my_s3_client()
+
+    http = session or requests
+    with http.get(
+        upload_request.url, stream=True, timeout=DJANGO_R2_URL_INGEST_TIMEOUT
+    ) as response:
+        response.raise_for_status()
+        instance = objects_services.preflight_object_create(
+            upload_request.bucket_id, filename, upload_request.added_by
+        )
+        key = instance.get_s3_key()
+        object_data = {
+            "object_id": str(instance.id),
+            "bucket_id": str(upload_request.bucket_id),
+            "key": str(key),
+            "filename": str(instance.keyname),
+        }
+        content_type = get_response_content_type(response, filename)
+        try:
+            result = my_s3_client.upload_stream(
+                response.iter_content(chunk_size=DJANGO_R2_URL_INGEST_CHUNK_SIZE),
+                key,
+                content_type=content_type,
+                content_length=get_response_content_length(response),
+                **stream_options,
+            )
+        except Exception as e:
+            objects_services.postflight_object_update(
+                object_data, uploaded=False, errors={"upload": str(e)}
+            )
+            raise
+
+    file_data = {
+        "size": result.size,
+        "type": content_type,
+        "duration": None,
+        "width": None,
+        "height": None,
+        "sha256": result.sha256,
+        "etag": result.etag,
+        "source_url": upload_request.url,
+    }
+    return object_data, file_data
+
+
+def ingest_url_upload_request(upload_request, session=None):
+    """
+    Stream one URL into its bucket, then mark the `Object` uploaded
+    and the request completed in one short transaction.
+    Returns the uploaded `Object`.
+    """
+    URLUploadRequest = apps.get_model("django_r2", "URLUploadRequest")
+    object_data, file_data = stream_url_upload_request(upload_request, session)
+    with transaction.atomic():
+        instance = objects_services.postflight_object_update(
+            object_data, uploaded=True, file_data=file_data
+        )
+        URLUploadRequest.objects.filter(id=upload_request.id).update(
+            completed=True, object=instance, errors={}
+        )
+    return instance
@@ -2,90 +2,519 @@ from __future__ import annotations
 
 import json
 
+from asgiref.sync import sync_to_async
+from botocore.exceptions import ClientError
 from django.contrib.auth.decorators import login_required
 from django.core import signing
 from django.http import HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render
+from django.urls import reverse
 from django.views.decorators.http import require_POST
 
-from django_r2.helpers.packages import myboto
-from django_r2.services import buckets as buckets_services
-from django_r2.services import objects as objects_services
+from django_r2 import settings
+from django_r2.buckets import services as buckets_services
+from django_r2.helpers.formatting.filenames import create_s3_filename
+from django_r2.helpers.myboto.multipart import plan_multipart_upload
+from django_r2.objects import services as objects_services
+from django_r2.objects import verify as objects_verify
+
+DJANGO_R2_PRESIGN_BATCH_SIZE = getattr(settings, "DJANGO_R2_PRESIGN_BATCH_SIZE", 500)
+DJANGO_R2_COMPLETE_BATCH_SIZE = getattr(settings, "DJANGO_R2_COMPLETE_BATCH_SIZE", 500)
+
+
+def get_object_data(instance, bucket_id, key, **extra):
+    object_data = {
+        "object_id": str(instance.id),
+        "bucket_id": str(bucket_id),
+        "key": str(key),
+        "filename": str(instance.keyname),
+    }
+    object_data.update(extra)
+    return object_data
+
+
+def load_signed_object_data(object_data_raw):
+    try:
+        return signing.loads(object_data_raw, salt="object-upload")
+    except signing.BadSignature:
+        return None
+
+
+def get_request_filenames(request):
+    """
+    Filenames for a batch presign, sent either as a JSON body
+    (`{"filenames": [...]}`) or as repeated `filenames` form fields.
+    Returns None for a single-file request.
+    """
+    if request.content_type == "application/json":
+        try:
+            request_data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return []
+        if not isinstance(request_data, dict):
+            return []
+        return request_data.get("filenames")
+    return request.POST.getlist("filenames") or None
+
+
+def validate_presign_filenames(filenames):
+    """
+    `(error_response, is_valid)`: one validity flag per filename.
+    """
+    if not isinstance(filenames, list) or not filenames:
+        return JsonResponse({"error": "Filenames are required"}, status=400), None
+    if len(filenames) > DJANGO_R2_PRESIGN_BATCH_SIZE:
+        msg = f"At most {DJANGO_R2_PRESIGN_BATCH_SIZE} files per request"
+        return JsonResponse({"error": msg}, status=400), None
+    is_valid = [
+        isinstance(filename, str) and create_s3_filename(filename) is not None
+        for filename in filenames
+    ]
+    return None, is_valid
+
+
+def get_presign_response(bucket_id, bucket_credentials, filenames, is_valid, instances):
+    keys = [instance.get_s3_key() for instance in instances]
+    urls = bucket_credentials.presign_upload_urls(keys, expires_in=60 * 60 * 24 * 7)
+
+    signed = iter(zip(instances, keys, urls))
+    results = []
+    for filename, valid in zip(filenames, is_valid):
+        if not valid:
+            results.append({"name": filename, "error": "Invalid filename"})
+            continue
+        instance, key, url = next(signed)
+        object_data = get_object_data(instance, bucket_id, key)
+        results.append(
+            {
+                "name": filename,
+                "url": url,
+                "filename": instance.keyname,
+                "object_data": signing.dumps(object_data, salt="object-upload"),
+                "key": key,
+            }
+        )
+    return JsonResponse({"objects": results})
+
+
+def get_single_presign_response(bucket_id, bucket_credentials, instance):
+    key = instance.get_s3_key()
+    url = bucket_credentials.presign_upload_url(key=key, expires_in=60 * 60 * 24 * 7)
+    object_data = get_object_data(instance, bucket_id, key)
+    object_data_signed = signing.dumps(object_data, salt="object-upload")
+    return JsonResponse(
+        {
+            "url": url,
+            "filename": instance.keyname,
+            "object_data": object_data_signed,
+            "key": key,
+        }
+    )
+
+
+def presign_uploads(request, bucket_id, bucket_credentials, filenames):
+    error_response, is_valid = validate_presign_filenames(filenames)
+    if error_response is not None:
+        return error_response
+    instances = objects_services.preflight_objects_bulk_create(
+        bucket_id,
+        [filename for filename, valid in zip(filenames, is_valid) if valid],
+        request.user,
+    )
+    return get_presign_response(
+        bucket_id, bucket_credentials, filenames, is_valid, instances
+    )
+
+
+async def apresign_uploads(request, user, bucket_id, bucket_credentials, filenames):
+    error_response, is_valid = validate_presign_filenames(filenames)
+    if error_response is not None:
+        return error_response
+    instances = await objects_services.apreflight_objects_bulk_create(
+        bucket_id,
+        [filename for filename, valid in zip(filenames, is_valid) if valid],
+        user,
+    )
+    # Presigning may build the boto3 client (blocking) on first use
+    return await sync_to_async(get_presign_response)(
+        bucket_id, bucket_credentials, filenames, is_valid, instances
+    )
+
+
+def get_upload_template_name(request):
+    if getattr(request, "htmx", False):
+        return "upload/snippets/upload.html"
+    return "upload/upload_view.html"
 
 
 @login_required
-def upload_view(request, id=None):
+def upload_view(request, bucket_id=None):
     """
     Renders the file upload field
     Using JavaScript, user initiates upload
     View responds with s3-signed url for direct upload
     JavaScript uploads direct to s3
+
+    POSTing a list of `filenames` presigns all of them at once
+    (one bulk INSERT) and responds with `{"objects": [...]}`
+    in the same order.
     """
-    project_id = request.namespace.id
-    bucket_credentials = buckets_services.get_credentials_from_request(request)
+    bucket_credentials = buckets_services.get_today_bucket_credentials_by_bucket_id(
+        bucket_id
+    )
     if bucket_credentials is None:
         return HttpResponseBadRequest(
             "There's an error with uploading files to your account."
         )
-    template_name = "upload/upload_view.html"
-    if request.htmx:
-        template_name = "upload/snippets/upload.html"
     if request.method == "POST":
+        filenames = get_request_filenames(request)
+        if filenames is not None:
+            return presign_uploads(request, bucket_id, bucket_credentials, filenames)
         filename = request.POST.get("filename")
         if not filename:
             return JsonResponse({"error": "Filename is required"}, status=400)
-        name = myboto.formatting.create_s3_filename(filename)
+        name = create_s3_filename(filename)
         if name is None:
             return JsonResponse({"error": "Invalid filename"}, status=400)
         instance = objects_services.preflight_object_create(
-            project_id, filename, request.user
+            bucket_id, filename, request.user
         )
-        key = instance.get_s3_key()
-        url = bucket_credentials.presign_upload_url(
-            key=key, expires_in=60 * 60 * 24 * 7
+        return get_single_presign_response(bucket_id, bucket_credentials, instance)
+    return render(request, get_upload_template_name(request), {})
+
+
+@login_required
+async def async_upload_view(request, bucket_id=None):
+    """
+    `upload_view` for ASGI: the ORM, cache and credential minting
+    are awaited; presigning makes no S3 calls but may build the
+    boto3 client, so it runs in a thread.
+    """
+    bucket_credentials = (
+        await buckets_services.aget_today_bucket_credentials_by_bucket_id(bucket_id)
+    )
+    if bucket_credentials is None:
+        return HttpResponseBadRequest(
+            "There's an error with uploading files to your account."
         )
-        object_data = {
-            "object_id": str(instance.id),
-            "project_id": str(project_id),
-            "key": str(key),
-            "filename": str(instance.keyname),
-        }
-        object_data_signed = signing.dumps(object_data, salt="object-upload")
-        return JsonResponse(
-            {
-                "url": url,
-                "filename": instance.keyname,
-                "object_data": object_data_signed,
-                "key": key,
-            }
+    if request.method == "POST":
+        user = await request.auser()
+        filenames = get_request_filenames(request)
+        if filenames is not None:
+            return await apresign_uploads(
+                request, user, bucket_id, bucket_credentials, filenames
+            )
+        filename = request.POST.get("filename")
+        if not filename:
+            return JsonResponse({"error": "Filename is required"}, status=400)
+        name = create_s3_filename(filename)
+        if name is None:
+            return JsonResponse({"error": "Invalid filename"}, status=400)
+        instance = await objects_services.apreflight_object_create(
+            bucket_id, filename, user
+        )
+        return await sync_to_async(get_single_presign_response)(
+            bucket_id, bucket_credentials, instance
         )
-    return render(request, template_name, {})
+    return await sync_to_async(render)(request, get_upload_template_name(request), {})
+
+
+@login_required
+@require_POST
+def upload_complete_view(request, bucket_id=None):
+    request_data = get_request_completion(request)
+    if isinstance(request_data, JsonResponse):
+        return request_data
+    instance = objects_services.postflight_object_update(**request_data)
+    if instance.uploaded:
+        objects_verify.schedule_verification([instance.id])
+    url = instance.get_absolute_url()
+    return JsonResponse({"status": "ok", "url": url})
 
 
 @login_required
 @require_POST
-def upload_complete_view(request):
-    completed = False
-    request_data = {}
+async def async_upload_complete_view(request, bucket_id=None):
+    request_data = get_request_completion(request)
+    if isinstance(request_data, JsonResponse):
+        return request_data
+    instance = await objects_services.apostflight_object_update(**request_data)
+    if instance.uploaded:
+        await objects_verify.aschedule_verification([instance.id])
+    url = instance.get_absolute_url()
+    return JsonResponse({"status": "ok", "url": url})
+
+
+def get_request_completion(request):
+    """
+    `postflight_object_update` kwargs for a single completion,
+    or an error response.
+    """
     try:
         request_data = json.loads(request.body)
     except json.JSONDecodeError:
         return JsonResponse({"error": "Invalid JSON"}, status=400)
+    if not isinstance(request_data, dict):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    object_data = load_signed_object_data(request_data.get("object_data"))
+    if not object_data:
+        msg = "Signed object data is required"
+        return JsonResponse({"error": msg}, status=400)
+    return {
+        "object_data": object_data,
+        "uploaded": request_data.get("completed", False),
+        "file_data": request_data.get("file_data"),
+    }
 
-    completed = request_data.get("completed", False)
-    object_data_raw = request_data.get("object_data")
+
+def get_request_completions(request):
+    """
+    Completions for a batch upload-complete, sent either as a JSON
+    body (`{"items": [...]}`) or, from `navigator.sendBeacon`, as
+    a form-encoded `payload` field holding the same JSON.
+    """
+    raw = request.body
+    if request.content_type != "application/json":
+        raw = request.POST.get("payload") or ""
     try:
-        object_data = signing.loads(object_data_raw, salt="object-upload")
-    except signing.BadSignature:
-        object_data = None
+        request_data = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(request_data, dict):
+        return None
+    items = request_data.get("items")
+    if not isinstance(items, list):
+        return None
+    return items
 
-    if not object_data:
-        msg = "Signed object data is required"
+
+@login_required
+@require_POST
+def upload_complete_batch_view(request, bucket_id=None):
+    """
+    Marks many uploads as complete in one request: signatures are
+    verified per item, then every row is written with a single
+    `bulk_update`. Responds with one result per item, in order.
+    """
+    updates = parse_completions(request, bucket_id)
+    if isinstance(updates, JsonResponse):
+        return updates
+    results, updates = updates
+    instances = objects_services.postflight_objects_bulk_update(updates)
+    objects_verify.schedule_verification(
+        [instance.id for instance in instances if instance.uploaded]
+    )
+    return get_completion_results_response(results, instances)
+
+
+@login_required
+@require_POST
+async def async_upload_complete_batch_view(request, bucket_id=None):
+    updates = parse_completions(request, bucket_id)
+    if isinstance(updates, JsonResponse):
+        return updates
+    results, updates = updates
+    instances = await objects_services.apostflight_objects_bulk_update(updates)
+    await objects_verify.aschedule_verification(
+        [instance.id for instance in instances if instance.uploaded]
+    )
+    return get_completion_results_response(results, instances)
+
+
+def parse_completions(request, bucket_id):
+    """
+    `(results, updates)` for a batch completion, or an error
+    response. `results` holds one entry per item, in order.
+    """
+    items = get_request_completions(request)
+    if items is None:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    if len(items) > DJANGO_R2_COMPLETE_BATCH_SIZE:
+        msg = f"At most {DJANGO_R2_COMPLETE_BATCH_SIZE} items per request"
         return JsonResponse({"error": msg}, status=400)
+
+    results = []
+    updates = []
+    for item in items:
+        if not isinstance(item, dict):
+            results.append({"error": "Invalid item"})
+            continue
+        object_data = load_signed_object_data(item.get("object_data"))
+        if not object_data or str(object_data.get("bucket_id")) != str(bucket_id):
+            results.append({"error": "Signed object data is required"})
+            continue
+        results.append({"object_id": object_data["object_id"]})
+        updates.append(
+            {
+                "object_data": object_data,
+                "uploaded": bool(item.get("completed", False)),
+                "file_data": item.get("file_data"),
+            }
+        )
+    return results, updates
+
+
+def get_completion_results_response(results, instances):
+    urls = {str(instance.id): instance.get_absolute_url() for instance in instances}
+    for result in results:
+        object_id = result.pop("object_id", None)
+        if object_id is None:
+            continue
+        if object_id in urls:
+            result.update({"status": "ok", "url": urls[object_id]})
+        else:
+            result["error"] = "Object not found"
+    return JsonResponse({"status": "ok", "results": results})
+
+
+@login_required
+@require_POST
+def upload_multipart_create_view(request, bucket_id=None):
+    """
+    Starts an S3 multipart upload for a large file and
+    responds with one presigned `upload_part` url per part.
+    The browser PUTs the parts (in parallel) and reports each
+    part's ETag to `upload_multipart_complete_view`.
+    """
+    bucket_credentials = buckets_services.get_today_bucket_credentials_by_bucket_id(
+        bucket_id
+    )
+    if bucket_credentials is None:
+        return HttpResponseBadRequest(
+            "There's an error with uploading files to your account."
+        )
+    filename = request.POST.get("filename")
+    if not filename:
+        return JsonResponse({"error": "Filename is required"}, status=400)
+    name = create_s3_filename(filename)
+    if name is None:
+        return JsonResponse({"error": "Invalid filename"}, status=400)
+    try:
+        file_size = int(request.POST.get("size"))
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "File size is required"}, status=400)
+    if file_size < 0:
+        return JsonResponse({"error": "Invalid file size"}, status=400)
+    content_type = request.POST.get("type") or None
+
+    instance = objects_services.preflight_object_create(
+        bucket_id, filename, request.user
+    )
+    key = instance.get_s3_key()
+    # The key comes from the row, so the row goes if the upload can't start
+    try:
+        upload_id = bucket_credentials.create_multipart_upload(
+            key, content_type=content_type
+        )
+    except ClientError as e:
+        instance.delete()
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception:
+        instance.delete()
+        raise
+    part_size, part_count = plan_multipart_upload(
+        file_size, settings.DJANGO_R2_MULTIPART_PART_SIZE
+    )
+    parts = bucket_credentials.presign_upload_part_urls(
+        key, upload_id, part_count, expires_in=60 * 60 * 24 * 7
+    )
+    object_data = get_object_data(instance, bucket_id, key, upload_id=upload_id)
+    object_data_signed = signing.dumps(object_data, salt="object-upload")
+    return JsonResponse(
+        {
+            "upload_id": upload_id,
+            "part_size": part_size,
+            "parts": parts,
+            "filename": instance.keyname,
+            "object_data": object_data_signed,
+            "key": key,
+            "complete_url": reverse(
+                "django_r2:upload-multipart-complete",
+                kwargs={"bucket_id": bucket_id},
+            ),
+            "abort_url": reverse(
+                "django_r2:upload-multipart-abort",
+                kwargs={"bucket_id": bucket_id},
+            ),
+        }
+    )
+
+
+@login_required
+@require_POST
+def upload_multipart_complete_view(request, bucket_id=None):
+    multipart = get_request_multipart(request, bucket_id)
+    if isinstance(multipart, JsonResponse):
+        return multipart
+    request_data, object_data, bucket_credentials = multipart
+    try:
+        parts = [
+            {"PartNumber": int(part["part_number"]), "ETag": str(part["etag"])}
+            for part in request_data.get("parts") or []
+        ]
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({"error": "Invalid parts"}, status=400)
+    if not parts:
+        return JsonResponse({"error": "Parts are required"}, status=400)
+
+    try:
+        bucket_credentials.complete_multipart_upload(
+            object_data["key"], object_data["upload_id"], parts
+        )
+    except ClientError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
     file_data = request_data.get("file_data")
     instance = objects_services.postflight_object_update(
-        object_data, uploaded=completed, file_data=file_data
+        object_data, uploaded=True, file_data=file_data
     )
+    objects_verify.schedule_verification([instance.id])
     url = instance.get_absolute_url()
-    request.session["refresh_objects_cache"] = True
     return JsonResponse({"status": "ok", "url": url})
+
+
+@login_required
+@require_POST
+def upload_multipart_abort_view(request, bucket_id=None):
+    multipart = get_request_multipart(request, bucket_id)
+    if isinstance(multipart, JsonResponse):
+        return multipart
+    _, object_data, bucket_credentials = multipart
+    try:
+        bucket_credentials.abort_multipart_upload(
+            object_data["key"], object_data["upload_id"]
+        )
+    except ClientError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    objects_services.postflight_object_update(
+        object_data, uploaded=False, errors={"upload": "Multipart upload aborted"}
+    )
+    return JsonResponse({"status": "ok"})
+
+
+def get_request_multipart(request, bucket_id):
+    """
+    `(request_data, object_data, bucket_credentials)` for a
+    multipart complete/abort, or an error response.
+    """
+    try:
+        request_data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    if not isinstance(request_data, dict):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    object_data = load_signed_object_data(request_data.get("object_data"))
+    if (
+        not object_data
+        or not object_data.get("upload_id")
+        or str(object_data.get("bucket_id")) != str(bucket_id)
+    ):
+        msg = "Signed multipart object data is required"
+        return JsonResponse({"error": msg}, status=400)
+    bucket_credentials = buckets_services.get_today_bucket_credentials_by_bucket_id(
+        bucket_id
+    )
+    if bucket_credentials is None:
+        msg = "There's an error with uploading files to your account."
+        return JsonResponse({"error": msg}, status=400)
+    return request_data, object_data, bucket_credentials
@@ -1,16 +1,34 @@
 from django.urls import path
 
+from django_r2 import settings
 from django_r2.buckets import views as buckets_views
+from django_r2.metrics import views as metrics_views
 from django_r2.objects import views as objects_views
-from django_r2.views import upload_complete_view, upload_view
+from django_r2.uploads import views as uploads_views
 
 app_name = "django_r2"
 
+DJANGO_R2_ASYNC_VIEWS = getattr(settings, "DJANGO_R2_ASYNC_VIEWS", False)
+
+if DJANGO_R2_ASYNC_VIEWS:
+    ObjectListView = objects_views.AsyncObjectListView
+    ObjectProxyDownloadView = objects_views.AsyncObjectProxyDownloadView
+    upload_view = uploads_views.async_upload_view
+    upload_complete_view = uploads_views.async_upload_complete_view
+    upload_complete_batch_view = uploads_views.async_upload_complete_batch_view
+else:
+    ObjectListView = objects_views.ObjectListView
+    ObjectProxyDownloadView = objects_views.ObjectProxyDownloadView
+    upload_view = uploads_views.upload_view
+    upload_complete_view = uploads_views.upload_complete_view
+    upload_complete_batch_view = uploads_views.upload_complete_batch_view
+
 urlpatterns = [
     path("", buckets_views.BucketListView.as_view(), name="buckets-list"),
+    path("metrics/", metrics_views.metrics_view, name="metrics"),
     path(
         "<uuid:bucket_id>/",
-        objects_views.ObjectListView.as_view(),
+        ObjectListView.as_view(),
         name="objects-list",
     ),
     path(
@@ -20,7 +38,7 @@ urlpatterns = [
     ),
     path(
         "<uuid:bucket_id>/<uuid:pk>/download/",
-        objects_views.ObjectProxyDownloadView.as_view(),
+        ObjectProxyDownloadView.as_view(),
         name="objects-download",
     ),
     path(
@@ -34,4 +52,24 @@ urlpatterns = [
         upload_complete_view,
         name="complete",
     ),
+    path(
+        "<uuid:bucket_id>/upload/complete/batch/",
+        upload_complete_batch_view,
+        name="complete-batch",
+    ),
+    path(
+        "<uuid:bucket_id>/upload/multipart/",
+        uploads_views.upload_multipart_create_view,
+        name="upload-multipart",
+    ),
+    path(
+        "<uuid:bucket_id>/upload/multipart/complete/",
+        uploads_views.upload_multipart_complete_view,
+        name="upload-multipart-complete",
+    ),
+    path(
+        "<uuid:bucket_id>/upload/multipart/abort/",
+        uploads_views.upload_multipart_abort_view,
+        name="upload-multipart-abort",
+    ),
 ]
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from django_r2.buckets import services as buckets_services
+from django_r2.models import Bucket, BucketCredentials
+from django_r2.testing import S3StandIn, issue_temporary_credentials
+
+
+@pytest.fixture(scope="session")
+def standin_server():
+    with S3StandIn() as standin:
+        yield standin
+
+
+@pytest.fixture
+def standin(standin_server, settings):
+    settings.AWS_S3_ENDPOINT_URL = standin_server.endpoint_url
+    return standin_server
+
+
+@pytest.fixture
+def user(db):
+    return get_user_model().objects.create_user("owner", password="password")
+
+
+@pytest.fixture
+def bucket(user, standin):
+    """
+    A bucket that exists on the stand-in, with temporary credentials.
+    """
+    # active_in_cloudflare: no provisioning through Cloudflare
+    bucket = Bucket.objects.create(
+        owner=user,
+        name=f"bucket-{timezone.now():%H%M%S%f}",
+        active_in_cloudflare=True,
+    )
+    standin.create_bucket(bucket.name)
+    credentials = issue_temporary_credentials(bucket.name)
+    BucketCredentials.objects.create(
+        bucket=bucket,
+        access_key_id=credentials.access_key_id,
+        secret_access_key=credentials.secret_access_key,
+        session_token=credentials.session_token,
+        expires_at=timezone.now() + timedelta(days=1),
+    )
+    yield bucket
+    buckets_services.clear_cached_bucket_credentials(bucket.id)
@@ -0,0 +1,55 @@
+SECRET_KEY = "django-r2-tests"
+DEBUG = False
+ALLOWED_HOSTS = ["*"]
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django_r2",
+]
+MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+]
+ROOT_URLCONF = "tests.urls"
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+USE_TZ = True
+TIME_ZONE = "UTC"
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+CLOUDFLARE_ACCESS_KEY = "standin"
+CLOUDFLARE_SECRET_KEY = "standin-secret"
+CLOUDFLARE_ACCOUNT_ID = "test-account"
+# Cloudflare calls go to the fakes, S3 calls to the stand-in started by
+# the `standin` fixture (tests/conftest.py)
+DJANGO_R2_CLOUDFLARE_CLIENT = "django_r2.testing.cloudflare.FakeCloudflare"
+DJANGO_R2_ASYNC_CLOUDFLARE_CLIENT = "django_r2.testing.cloudflare.AsyncFakeCloudflare"
+AWS_S3_ENDPOINT_URL = "http://127.0.0.1:1"
+DJANGO_R2_VERIFY_UPLOADS = False
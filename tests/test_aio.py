@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("aiobotocore")
+
+from django_r2.helpers.myboto.aio import AsyncMyS3Client, registry  # noqa: E402
+
+
+def test_expired_clients_stay_open_while_leased(standin):
+    standin.create_bucket("aio")
+    client = AsyncMyS3Client(
+        bucket="aio",
+        access_key_id=standin.access_key_id,
+        secret_access_key=standin.secret_access_key,
+        endpoint_url=standin.endpoint_url,
+    )
+
+    async def run():
+        async with client.lease() as old:
+            old.expires = time.time() - 1
+            new = await client.get_client()
+            assert new is not old
+            assert old.retired
+            # Still usable: the lease keeps it open
+            await old.client.put_object(Bucket="aio", Key="a.txt", Body=b"a")
+        await asyncio.sleep(0)
+        assert not old.users
+        await registry.aclose()
+
+    asyncio.run(run())
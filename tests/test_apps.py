@@ -0,0 +1,13 @@
+import django
+import pytest
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+
+from django_r2 import settings as r2_settings
+
+
+def test_async_views_require_django_5_1(monkeypatch):
+    monkeypatch.setattr(r2_settings, "DJANGO_R2_ASYNC_VIEWS", True)
+    monkeypatch.setattr(django, "VERSION", (5, 0, 9, "final", 0))
+    with pytest.raises(ImproperlyConfigured):
+        apps.get_app_config("django_r2").ready()
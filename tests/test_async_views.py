@@ -0,0 +1,57 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+
+from django_r2.models import Object
+from django_r2.uploads.views import async_upload_complete_view, async_upload_view
+
+
+def make_request(user, path="/", data=None, json_body=None):
+    factory = AsyncRequestFactory()
+    if json_body is not None:
+        request = factory.post(path, json.dumps(json_body), "application/json")
+    else:
+        request = factory.post(path, data)
+
+    async def auser():
+        return user
+
+    request.user = user
+    request.auser = auser
+    return request
+
+
+def test_async_upload_and_complete(bucket, standin, user):
+    response = async_to_sync(async_upload_view)(
+        make_request(user, data={"filename": "photo.jpg"}), bucket_id=bucket.id
+    )
+    presigned = json.loads(response.content)
+
+    response = async_to_sync(async_upload_complete_view)(
+        make_request(
+            user,
+            json_body={
+                "object_data": presigned["object_data"],
+                "completed": True,
+                "file_data": {"size": 12, "type": "image/jpeg"},
+            },
+        ),
+        bucket_id=bucket.id,
+    )
+
+    assert json.loads(response.content)["status"] == "ok"
+    instance = Object.objects.get(keyname=presigned["filename"])
+    assert instance.uploaded and instance.uploaded_size == 12
+    assert instance.added_by == user
+
+
+def test_async_batch_presign(bucket, standin, user):
+    response = async_to_sync(async_upload_view)(
+        make_request(user, json_body={"filenames": ["a.png", "b.png"]}),
+        bucket_id=bucket.id,
+    )
+
+    objects = json.loads(response.content)["objects"]
+    assert [item["name"] for item in objects] == ["a.png", "b.png"]
+    assert Object.objects.filter(bucket=bucket).count() == 2
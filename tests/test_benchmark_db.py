@@ -0,0 +1,46 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+
+from django_r2.benchmarks import database
+from django_r2.models import Bucket, Object
+
+
+def test_generate_objects_tops_the_bucket_up(db):
+    bucket = database.get_benchmark_bucket()
+
+    assert database.generate_objects(bucket, 12, days=3, batch_size=5) == 12
+    assert database.generate_objects(bucket, 15, days=3, batch_size=5) == 3
+    assert Object.objects.filter(bucket=bucket).count() == 15
+
+
+def test_r2_benchmark_db(db, tmp_path):
+    out = StringIO()
+    baseline = tmp_path / "baseline.json"
+
+    call_command(
+        "r2_benchmark_db",
+        "--objects=30",
+        "--batch-size=7",
+        "--page-size=5",
+        "--repeat=1",
+        f"--save={baseline}",
+        stdout=out,
+    )
+
+    output = out.getvalue()
+    assert "Added 30 rows" in output
+    for label in ("first", "middle", "deep"):
+        assert f"object list, {label} page" in output
+        assert f"get_object_by_id, {label} row" in output
+    suites = json.loads(baseline.read_text())["suites"]
+    assert suites["database:sqlite"]["rows in bucket"] == {
+        "name": "rows in bucket",
+        "value": 30,
+        "unit": "rows",
+    }
+
+    call_command("r2_benchmark_db", "--delete", stdout=StringIO())
+    assert not Bucket.objects.filter(name=database.BENCHMARK_BUCKET_NAME).exists()
+    assert not Object.objects.exists()
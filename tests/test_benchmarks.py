@@ -0,0 +1,145 @@
+"""
+Micro-benchmarks for the presign, key derivation and upload view
+hot paths. Run with `pytest tests/test_benchmarks.py`; keep and
+compare JSON baselines with pytest-benchmark's own flags, e.g.
+`--benchmark-autosave` and `--benchmark-compare --benchmark-compare-fail=mean:20%`.
+"""
+
+import json
+import urllib.request
+import uuid
+
+import pytest
+from django.test import RequestFactory
+from django.utils import timezone
+
+from django_r2.helpers.formatting.filenames import create_s3_filename
+from django_r2.helpers.formatting.humanize import humanize_filesize
+from django_r2.models import Object
+from django_r2.uploads import views as uploads_views
+
+pytest.importorskip("pytest_benchmark")
+
+KEY = "2025/1/31/holiday-photo-a1b2c.jpg"
+FILENAMES = [
+    "holiday photo.jpg",
+    "Quarterly Report (final) v2.PDF",
+    "übersicht_2025 — entwurf.docx",
+    "a" * 200 + ".tar.gz",
+]
+
+
+@pytest.fixture(params=["fast", "botocore"])
+def client(request, bucket):
+    client = bucket.bucketcredentials.get_my_s3_client()
+    if request.param == "botocore":
+        # Skip the cached fast presigner so botocore signs
+        client.__dict__["presigner"] = None
+    return client
+
+
+def test_presigned_upload_url(benchmark, client):
+    url = benchmark(client.get_presigned_upload_url, KEY)
+
+    assert KEY in url
+
+
+def test_presigned_download_url(benchmark, client):
+    url = benchmark(
+        client.get_presigned_download_url,
+        KEY,
+        "holiday photo.jpg",
+        force_download=True,
+    )
+
+    assert KEY in url
+
+
+def test_presigned_upload_urls(benchmark, client):
+    keys = [f"{KEY}.{i}" for i in range(100)]
+
+    urls = benchmark(client.get_presigned_upload_urls, keys)
+
+    assert len(urls) == 100
+
+
+def test_create_s3_filename(benchmark):
+    object_id = uuid.uuid1()
+
+    names = benchmark(
+        lambda: [
+            create_s3_filename(name, object_id=object_id, id_max_length=5)
+            for name in FILENAMES
+        ]
+    )
+
+    assert all(names)
+
+
+def test_object_key_derivation(benchmark):
+    now = timezone.now()
+
+    def derive():
+        instance = Object(
+            id=uuid.uuid1(),
+            bucket_id=uuid.uuid4(),
+            filename="Quarterly Report (final) v2.PDF",
+            uploaded=True,
+            uploaded_size=48_213_577,
+            uploaded_type="application/pdf",
+        )
+        instance.populate_derived_fields()
+        instance.created_at = now
+        return instance.get_s3_key()
+
+    key = benchmark(derive)
+
+    assert key.startswith(f"{now.year}/{now.month}/{now.day}/")
+
+
+def test_humanize_filesize(benchmark):
+    sizes = [0, 1023, 48_213_577, 7 * 1024**4]
+
+    benchmark(lambda: [humanize_filesize(size) for size in sizes])
+
+
+def presign(bucket, user):
+    request = RequestFactory().post("/", {"filename": "holiday photo.jpg"})
+    request.user = user
+    return uploads_views.upload_view(request, bucket_id=bucket.id)
+
+
+def test_upload_view(benchmark, bucket, user):
+    response = benchmark(presign, bucket, user)
+
+    assert response.status_code == 200
+
+
+def test_upload_complete_view(benchmark, bucket, user):
+    presigned = json.loads(presign(bucket, user).content)
+    body = b"x" * 1024
+    upload = urllib.request.Request(presigned["url"], data=body, method="PUT")
+    with urllib.request.urlopen(upload) as response:
+        assert response.status == 200
+    completion = json.dumps(
+        {
+            "object_data": presigned["object_data"],
+            "completed": True,
+            "file_data": {
+                "name": "holiday photo.jpg",
+                "size": len(body),
+                "type": "image/jpeg",
+            },
+        }
+    )
+
+    def complete():
+        request = RequestFactory().post(
+            "/", completion, content_type="application/json"
+        )
+        request.user = user
+        return uploads_views.upload_complete_view(request, bucket_id=bucket.id)
+
+    response = benchmark(complete)
+
+    assert response.status_code == 200
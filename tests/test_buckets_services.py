@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from django_r2.buckets import services as buckets_services
+from django_r2.models import Object
+
+
+def make_uploaded_object(bucket, client, keyname, created_at):
+    instance = Object.objects.create(bucket=bucket, filename=keyname, keyname=keyname)
+    Object.objects.filter(id=instance.id).update(created_at=created_at)
+    instance.refresh_from_db()
+    client.put_object(Bucket=bucket.name, Key=instance.get_s3_key(), Body=b"x")
+    return instance
+
+
+# Rows are deleted from the purge's worker threads
+@pytest.mark.django_db(transaction=True)
+def test_purge_deletes_keys_and_rows_under_the_prefix(bucket):
+    client = bucket.bucketcredentials.get_s3_client()
+    day = datetime(2025, 1, 3, 12, tzinfo=timezone.utc)
+    next_day = datetime(2025, 1, 4, 12, tzinfo=timezone.utc)
+    purged = [
+        make_uploaded_object(bucket, client, f"file-{i}.txt", day) for i in range(3)
+    ]
+    kept = make_uploaded_object(bucket, client, "file-0.txt", next_day)
+    client.put_object(Bucket=bucket.name, Key="2025/1/3/no-row.txt", Body=b"x")
+
+    stats = buckets_services.purge_bucket_objects(
+        bucket, prefix="2025/1/3/", progress=None
+    )
+
+    assert (stats.listed, stats.deleted, stats.failed) == (4, 4, 0)
+    keys = [
+        entry["Key"]
+        for entry in client.list_objects_v2(Bucket=bucket.name).get("Contents", [])
+    ]
+    assert keys == [kept.get_s3_key()]
+    assert list(Object.objects.filter(bucket=bucket)) == [kept]
+    assert not Object.objects.filter(id__in=[o.id for o in purged]).exists()
+
+
+def test_purge_dry_run_deletes_nothing(bucket):
+    client = bucket.bucketcredentials.get_s3_client()
+    instance = make_uploaded_object(
+        bucket, client, "file.txt", datetime(2025, 1, 3, tzinfo=timezone.utc)
+    )
+
+    stats = buckets_services.purge_bucket_objects(bucket, dry_run=True, progress=None)
+
+    assert stats.listed == 1
+    assert client.list_objects_v2(Bucket=bucket.name)["KeyCount"] == 1
+    assert Object.objects.filter(id=instance.id).exists()
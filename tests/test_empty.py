@@ -0,0 +1,33 @@
+from django_r2.helpers.myboto import empty
+
+
+def test_purge_bucket_deletes_every_page(bucket, monkeypatch):
+    monkeypatch.setattr(empty, "DELETE_BATCH_SIZE", 2)
+    client = bucket.bucketcredentials.get_s3_client()
+    keys = [f"2025/1/3/file-{i}.txt" for i in range(5)]
+    for key in keys:
+        client.put_object(Bucket=bucket.name, Key=key, Body=b"x")
+    deleted = []
+
+    stats = empty.purge_bucket(
+        bucket.name, client, max_workers=2, on_batch=deleted.extend, progress=None
+    )
+
+    assert (stats.listed, stats.deleted, stats.failed, stats.batches) == (5, 5, 0, 3)
+    assert sorted(deleted) == keys
+    assert client.list_objects_v2(Bucket=bucket.name)["KeyCount"] == 0
+
+
+def test_purge_bucket_counts_failed_batches(bucket):
+    client = bucket.bucketcredentials.get_s3_client()
+    client.put_object(Bucket=bucket.name, Key="2025/1/3/file.txt", Body=b"x")
+
+    def fail(**kwargs):
+        raise ConnectionError("connection reset")
+
+    # Listing works; the delete fails
+    client.delete_objects = fail
+    stats = empty.purge_bucket(bucket.name, client, on_batch=None, progress=None)
+
+    assert (stats.listed, stats.deleted, stats.failed) == (1, 0, 1)
+    assert client.list_objects_v2(Bucket=bucket.name)["KeyCount"] == 1
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from django_r2.benchmarks.importtime import HEAVY_MODULES
+
+# The admin and signals modules are loaded by setup() itself
+CHECK_CODE = """
+import sys
+import django
+django.setup()
+import django_r2.helpers.myboto.client
+import django_r2.helpers.mycloudflare.client
+print(",".join(sorted(set(sys.modules) & set(sys.argv[1:]))))
+"""
+
+
+def test_setup_does_not_import_the_sdks():
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "tests.settings"}
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_CODE, *HEAVY_MODULES],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=Path(__file__).resolve().parents[1],
+        check=True,
+    )
+
+    assert result.stdout.strip() == ""
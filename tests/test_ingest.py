@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from django_r2.helpers.myboto import streaming
+from django_r2.helpers.myboto.streaming import stream_to_s3
+from django_r2.models import URLUploadRequest
+from django_r2.uploads import ingest
+
+
+def test_claim_batch_skips_leased_requests(bucket, user):
+    for i in range(3):
+        URLUploadRequest.objects.create(
+            bucket=bucket, added_by=user, url=f"https://example.com/{i}.png"
+        )
+
+    first = ingest.claim_batch(2, max_tries=3)
+    # Another run, starting from scratch, only sees the unclaimed row
+    second = ingest.claim_batch(2, max_tries=3)
+
+    assert len(first) == 2
+    assert [r.id for r in second] == [
+        r.id for r in URLUploadRequest.objects.exclude(id__in=[r.id for r in first])
+    ]
+    assert all(r.claimed_until > timezone.now() for r in first + second)
+    assert ingest.claim_batch(2, max_tries=3) == []
+
+    URLUploadRequest.objects.filter(id=first[0].id).update(
+        claimed_until=timezone.now() - timedelta(seconds=1)
+    )
+    assert [r.id for r in ingest.claim_batch(2, max_tries=3)] == [first[0].id]
+
+
+def test_stream_to_s3_on_a_shared_executor(bucket):
+    client = bucket.bucketcredentials.get_s3_client()
+    part_size = 5 * 1024 * 1024
+    bodies = [bytes([i]) * (part_size * 2 + 10) for i in range(3)]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(
+            ThreadPoolExecutor(max_workers=3).map(
+                lambda i: stream_to_s3(
+                    client,
+                    bucket.name,
+                    f"stream-{i}.bin",
+                    [bodies[i]],
+                    part_size=part_size,
+                    buffer_size=part_size * 3,
+                    executor=executor,
+                ),
+                range(3),
+            )
+        )
+
+    for i, result in enumerate(results):
+        assert result.part_count == 3
+        body = client.get_object(Bucket=bucket.name, Key=f"stream-{i}.bin")["Body"]
+        assert body.read() == bodies[i]
+
+
+def test_stream_to_s3_plans_parts_for_max_size(bucket):
+    client = bucket.bucketcredentials.get_s3_client()
+    body = b"x" * (12 * 1024 * 1024)
+
+    result = stream_to_s3(
+        client,
+        bucket.name,
+        "planned.bin",
+        [body],
+        part_size=5 * 1024 * 1024,
+        max_size=10_000 * 6 * 1024 * 1024,
+    )
+
+    assert result.part_count == 2
+
+
+def test_stream_to_s3_fails_past_the_part_limit(bucket, monkeypatch):
+    monkeypatch.setattr(streaming, "MAX_PART_COUNT", 2)
+    client = bucket.bucketcredentials.get_s3_client()
+    part_size = 5 * 1024 * 1024
+
+    with pytest.raises(ValueError, match="DJANGO_R2_STREAM_MAX_SIZE"):
+        stream_to_s3(
+            client,
+            bucket.name,
+            "long.bin",
+            [b"x" * (part_size * 3)],
+            part_size=part_size,
+        )
+
+    assert "Contents" not in client.list_objects_v2(Bucket=bucket.name)
+    assert "Uploads" not in client.list_multipart_uploads(Bucket=bucket.name)
@@ -0,0 +1,21 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from django_r2.benchmarks import loadtest
+
+
+def test_bucket_and_standin_are_exclusive(bucket):
+    with pytest.raises(CommandError):
+        call_command("r2_loadtest", "--standin", "--bucket", str(bucket.id))
+
+
+def test_standin_credentials_only_replace_the_loadtest_bucket(bucket, standin):
+    access_key_id = bucket.bucketcredentials.access_key_id
+    with pytest.raises(ValueError):
+        loadtest.issue_standin_credentials(bucket, standin)
+
+    loadtest_bucket = loadtest.get_loadtest_bucket(standin)
+
+    assert loadtest_bucket.name == loadtest.LOADTEST_BUCKET_NAME
+    bucket.bucketcredentials.refresh_from_db()
+    assert bucket.bucketcredentials.access_key_id == access_key_id
@@ -0,0 +1,47 @@
+import pytest
+
+from django_r2 import metrics
+from django_r2.buckets import services as buckets_services
+
+
+class RecordingExporter:
+    content_type = None
+
+    def __init__(self):
+        self.samples = []
+
+    def increment(self, name, value, labels):
+        self.samples.append((name, dict(labels)))
+
+    def observe(self, name, seconds, labels):
+        self.samples.append((name, dict(labels)))
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = RecordingExporter()
+    monkeypatch.setattr(metrics, "DJANGO_R2_METRICS", True)
+    monkeypatch.setattr(metrics, "_exporters", [exporter])
+    return exporter
+
+
+def get_bucket_labels(exporter, name):
+    return [
+        labels.get("bucket") for sample, labels in exporter.samples if sample == name
+    ]
+
+
+def test_no_bucket_label_by_default(bucket, exporter):
+    buckets_services.get_today_bucket_credentials_by_bucket_id(bucket.id)
+    assert get_bucket_labels(exporter, "credentials_lookup") == [None]
+
+
+def test_bucket_labels_use_the_r2_bucket_name(bucket, exporter, monkeypatch):
+    monkeypatch.setattr(metrics, "DJANGO_R2_METRICS_BUCKET_LABEL", True)
+    cred_obj = buckets_services.get_today_bucket_credentials_by_bucket_id(bucket.id)
+    # Built (and instrumented) by the client registry with metrics on
+    client = cred_obj.get_s3_client()
+    client.list_objects_v2(Bucket=bucket.name)
+
+    assert get_bucket_labels(exporter, "credentials_lookup") == [bucket.name]
+    assert get_bucket_labels(exporter, "s3_request") == [bucket.name]
@@ -0,0 +1,150 @@
+import urllib.request
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+from django_r2.buckets import services as buckets_services
+from django_r2.helpers.myboto.presign import get_signing_window
+from django_r2.models import Object
+from django_r2.objects import services as objects_services
+
+
+def make_object(bucket, keyname, created_at):
+    instance = Object.objects.create(
+        bucket=bucket, filename="image.png", keyname=keyname, uploaded=True
+    )
+    Object.objects.filter(id=instance.id).update(created_at=created_at)
+    instance.refresh_from_db()
+    return instance
+
+
+def test_parse_s3_key():
+    assert objects_services.parse_s3_key("2025/1/3/image-abcde.png") == (
+        datetime(2025, 1, 3).date(),
+        "image-abcde.png",
+    )
+    assert objects_services.parse_s3_key("backups/2025/1/image.png") is None
+    assert objects_services.parse_s3_key("2025/1/3/") is None
+
+
+def test_delete_objects_for_keys_matches_the_full_key(bucket):
+    # Keynames only carry 5 hex chars of the id, so days can share one
+    first = make_object(
+        bucket, "image-abcde.png", datetime(2025, 1, 3, 23, 59, tzinfo=timezone.utc)
+    )
+    second = make_object(
+        bucket, "image-abcde.png", datetime(2025, 1, 4, 0, 1, tzinfo=timezone.utc)
+    )
+    assert first.get_s3_key() == "2025/1/3/image-abcde.png"
+
+    deleted, _ = objects_services.delete_objects_for_keys(
+        bucket.id, [first.get_s3_key(), "not/a/date/key.png"]
+    )
+
+    assert deleted == 1
+    assert list(Object.objects.filter(bucket=bucket)) == [second]
+
+
+def test_get_download_urls_for_objects_skips_objects_without_a_keyname(bucket):
+    with_key = make_object(
+        bucket, "image-abcde.png", datetime(2025, 1, 3, tzinfo=timezone.utc)
+    )
+    without_key = Object(bucket=bucket, keyname=None)
+
+    urls = objects_services.get_download_urls_for_objects([with_key, without_key])
+
+    assert list(urls) == [str(with_key.id)]
+
+
+def test_get_download_urls_for_objects_without_credentials(bucket, monkeypatch):
+    instance = make_object(
+        bucket, "image-abcde.png", datetime(2025, 1, 3, tzinfo=timezone.utc)
+    )
+    monkeypatch.setattr(
+        buckets_services,
+        "get_today_bucket_credentials_by_bucket_id",
+        lambda bucket_id: None,
+    )
+
+    urls = objects_services.get_download_urls_for_objects([instance])
+
+    assert urls == {str(instance.id): None}
+
+
+def test_cached_listing_pages_round_trip_cursors(bucket, django_assert_num_queries):
+    for i in range(5):
+        make_object(
+            bucket, f"file-{i}.txt", datetime(2025, 1, 3, i, tzinfo=timezone.utc)
+        )
+    first = objects_services.get_paginated_objects_for_bucket(bucket.id, page_size=2)
+    second = objects_services.get_paginated_objects_for_bucket(
+        bucket.id, cursor=first.next_cursor, page_size=2
+    )
+
+    back = objects_services.get_paginated_objects_for_bucket(
+        bucket.id, cursor=second.previous_cursor, page_size=2
+    )
+    # Its cursors lead back to the cached second page
+    with django_assert_num_queries(0):
+        again = objects_services.get_paginated_objects_for_bucket(
+            bucket.id, cursor=back.next_cursor, page_size=2
+        )
+
+    assert [row.keyname for row in back] == ["file-4.txt", "file-3.txt"]
+    assert list(again) == list(second)
+    assert again.next_cursor == second.next_cursor
+
+
+def test_saving_an_object_invalidates_cached_listing_pages(bucket):
+    make_object(bucket, "old.txt", datetime(2025, 1, 3, tzinfo=timezone.utc))
+    before = objects_services.get_paginated_objects_for_bucket(bucket.id)
+
+    Object.objects.create(bucket=bucket, filename="new.txt", keyname="new.txt")
+    after = objects_services.get_paginated_objects_for_bucket(bucket.id)
+
+    assert [row.keyname for row in before] == ["old.txt"]
+    assert [row.keyname for row in after] == ["new.txt", "old.txt"]
+
+
+def test_page_cache_key_varies_with_the_python_version(monkeypatch):
+    key = objects_services.get_page_cache_key("b", 1, None, 25)
+    monkeypatch.setattr(objects_services.sys, "version_info", (3, 99, 0))
+
+    other = objects_services.get_page_cache_key("b", 1, None, 25)
+
+    assert ":py3.99:" in other
+    assert key != other
+
+
+def test_get_signing_window():
+    now = datetime(2025, 1, 3, 10, 59, 30, 123, tzinfo=timezone.utc)
+
+    start, end = get_signing_window(3600, now=now)
+    assert (start, end) == (
+        datetime(2025, 1, 3, 10, tzinfo=timezone.utc),
+        datetime(2025, 1, 3, 11, tzinfo=timezone.utc),
+    )
+    issued = datetime(2025, 1, 3, 10, 15, 5, 999, tzinfo=timezone.utc)
+    start, _ = get_signing_window(3600, now=now, not_before=issued)
+    assert start == issued.replace(microsecond=0)
+
+
+def test_windowed_download_urls_are_stable_and_valid(bucket, monkeypatch):
+    monkeypatch.setattr(objects_services, "DJANGO_R2_PRESIGN_WINDOW_SECONDS", 3600)
+    credentials = bucket.bucketcredentials
+    client = credentials.get_s3_client()
+    client.put_object(Bucket=bucket.name, Key="2025/1/3/a.txt", Body=b"hello")
+    items = [("2025/1/3/a.txt", "a.txt")]
+
+    first = objects_services.get_download_urls(credentials, items)
+    # Signed again rather than read from the cache
+    cache.clear()
+    again = objects_services.get_download_urls(credentials, items)
+    attachment = objects_services.get_download_urls(
+        credentials, items, force_download=True
+    )
+
+    assert first == again
+    assert attachment != first
+    with urllib.request.urlopen(first[0]) as response:
+        assert response.read() == b"hello"
@@ -0,0 +1,63 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django_r2.models import Object
+from django_r2.objects import pagination
+
+START = datetime(2025, 1, 3, 12, tzinfo=timezone.utc)
+
+
+def make_objects(bucket, count):
+    # Pairs of rows share a created_at, so ties are broken by id
+    ids = []
+    for i in range(count):
+        instance = Object.objects.create(bucket=bucket, filename=f"file-{i}.txt")
+        Object.objects.filter(id=instance.id).update(
+            created_at=START + timedelta(seconds=i // 2)
+        )
+        ids.append(instance.id)
+    return ids
+
+
+def newest_first(bucket):
+    return list(
+        Object.objects.filter(bucket=bucket)
+        .order_by("-created_at", "-id")
+        .values_list("id", flat=True)
+    )
+
+
+def page_ids(page):
+    return [row.id for row in page]
+
+
+def test_cursor_round_trip():
+    object_id = uuid.uuid4()
+    cursor = pagination.encode_cursor(START, object_id, pagination.PREVIOUS)
+
+    assert pagination.decode_cursor(cursor) == (pagination.PREVIOUS, START, object_id)
+
+
+def test_malformed_cursors_mean_the_first_page():
+    assert pagination.decode_cursor(None) is None
+    assert pagination.decode_cursor("not a cursor") is None
+    bad_direction = pagination.encode_cursor(START, uuid.uuid4(), "x")
+    assert pagination.decode_cursor(bad_direction) is None
+
+
+def test_pages_forward_and_back(bucket):
+    make_objects(bucket, 7)
+    expected = newest_first(bucket)
+    queryset = Object.objects.filter(bucket=bucket)
+
+    first = pagination.paginate_by_cursor(queryset, page_size=3)
+    second = pagination.paginate_by_cursor(queryset, first.next_cursor, page_size=3)
+    third = pagination.paginate_by_cursor(queryset, second.next_cursor, page_size=3)
+
+    assert page_ids(first) + page_ids(second) + page_ids(third) == expected
+    assert not first.has_previous()
+    assert not third.has_next()
+    back = pagination.paginate_by_cursor(queryset, second.previous_cursor, page_size=3)
+    assert page_ids(back) == page_ids(first)
+    assert not back.has_previous()
+    assert back.next_cursor == first.next_cursor
@@ -0,0 +1,111 @@
+import datetime
+
+import boto3
+import botocore.auth
+import pytest
+from botocore.config import Config
+
+from django_r2.helpers.myboto.presign import SigV4Presigner
+
+ENDPOINT_URL = "https://test-account.r2.cloudflarestorage.com"
+SIGNING_TIME = datetime.datetime(2025, 1, 3, 23, 59, 30, tzinfo=datetime.timezone.utc)
+KEYS = [
+    "2025/1/3/image-abcde.png",
+    "2025/1/3/two words + plus & ampersand.png",
+    "2025/1/3/ünïcödé-文件.txt",
+    "2025/1/3/odd~chars=;:@$,'()!*.bin",
+    "2025/1/3/percent%20and?question#hash.txt",
+]
+
+
+@pytest.fixture(params=[None, "session/token+with=specials"])
+def session_token(request):
+    return request.param
+
+
+@pytest.fixture
+def botocore_client(monkeypatch, session_token):
+    # botocore signs with the current time (naive UTC)
+    monkeypatch.setattr(
+        botocore.auth,
+        "get_current_datetime",
+        lambda *args, **kwargs: SIGNING_TIME.replace(tzinfo=None),
+    )
+    return boto3.client(
+        "s3",
+        endpoint_url=ENDPOINT_URL,
+        aws_access_key_id="access-key",
+        aws_secret_access_key="secret/key+",
+        aws_session_token=session_token,
+        region_name="auto",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+
+
+@pytest.fixture
+def presigner(session_token):
+    return SigV4Presigner(
+        ENDPOINT_URL,
+        "access-key",
+        "secret/key+",
+        session_token=session_token,
+    )
+
+
+@pytest.mark.parametrize("key", KEYS)
+def test_put_urls_match_botocore(presigner, botocore_client, key):
+    expected = botocore_client.generate_presigned_url(
+        "put_object", Params={"Bucket": "bucket", "Key": key}, ExpiresIn=3600
+    )
+    assert presigner.presign("PUT", "bucket", key, signing_time=SIGNING_TIME) == (
+        expected
+    )
+
+
+@pytest.mark.parametrize("key", KEYS)
+def test_get_urls_with_disposition_match_botocore(presigner, botocore_client, key):
+    disposition = "attachment; filename=\"my file.png\"; filename*=UTF-8''my%20file.png"
+    expected = botocore_client.generate_presigned_url(
+        "get_object",
+        Params={
+            "Bucket": "bucket",
+            "Key": key,
+            "ResponseContentDisposition": disposition,
+        },
+        ExpiresIn=600,
+    )
+    assert presigner.presign(
+        "GET",
+        "bucket",
+        key,
+        expires_in=600,
+        params=[("response-content-disposition", disposition)],
+        signing_time=SIGNING_TIME,
+    ) == (expected)
+
+
+def test_upload_part_urls_match_botocore(presigner, botocore_client):
+    key = KEYS[1]
+    expected = [
+        botocore_client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": "bucket",
+                "Key": key,
+                "UploadId": "upload/id+1",
+                "PartNumber": part_number,
+            },
+            ExpiresIn=3600,
+        )
+        for part_number in (1, 2, 3)
+    ]
+    urls = presigner.presign_each(
+        "PUT",
+        "bucket",
+        [
+            (key, [("uploadId", "upload/id+1"), ("partNumber", part_number)])
+            for part_number in (1, 2, 3)
+        ],
+        signing_time=SIGNING_TIME,
+    )
+    assert urls == expected
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from django_r2.buckets import services as buckets_services
+from django_r2.models import Object
+from django_r2.objects import reconcile
+
+
+@pytest.fixture
+def client(bucket):
+    return bucket.bucketcredentials.get_s3_client()
+
+
+def make_object(bucket, keyname, created_at, uploaded=True, size=5):
+    instance = Object.objects.create(
+        bucket=bucket,
+        filename=keyname,
+        keyname=keyname,
+        uploaded=uploaded,
+        uploaded_size=size,
+    )
+    Object.objects.filter(id=instance.id).update(created_at=created_at)
+    instance.refresh_from_db()
+    return instance
+
+
+def test_parse_date_prefix():
+    assert reconcile.parse_date_prefix("2024/1/3/") == datetime(2024, 1, 3).date()
+    assert reconcile.parse_date_prefix("2024/01/03/") is None
+    assert reconcile.parse_date_prefix("2024/1/3") is None
+    assert reconcile.parse_date_prefix("backups/2024/x/") is None
+
+
+# The worker thread needs to see the rows outside the test's transaction
+@pytest.mark.django_db(transaction=True)
+def test_reconcile_fix_leaves_non_date_folders_alone(bucket, client):
+    matched = make_object(
+        bucket, "kept-abcde.txt", datetime(2024, 1, 3, 12, tzinfo=timezone.utc)
+    )
+    missing = make_object(
+        bucket, "gone-abcde.txt", datetime(2024, 1, 3, 13, tzinfo=timezone.utc)
+    )
+    client.put_object(Bucket=bucket.name, Key=matched.get_s3_key(), Body=b"hello")
+    client.put_object(Bucket=bucket.name, Key="2024/1/3/orphan.txt", Body=b"x")
+    client.put_object(Bucket=bucket.name, Key="backups/2024/x/dump.sql", Body=b"x")
+
+    prefixes = reconcile.all_date_prefixes(client, bucket.name, bucket.id)
+    assert prefixes == ["2024/1/3/"]
+
+    report = reconcile.reconcile_bucket(
+        bucket, client, fix=True, orphan_grace=timedelta(0), max_workers=1
+    )
+
+    assert report.matched == 1
+    assert report.counts[reconcile.ORPHAN] == 1
+    assert report.counts[reconcile.MISSING] == 1
+    keys = [
+        entry["Key"] for entry in client.list_objects_v2(Bucket=bucket.name)["Contents"]
+    ]
+    assert keys == ["2024/1/3/kept-abcde.txt", "backups/2024/x/dump.sql"]
+    missing.refresh_from_db()
+    assert not missing.uploaded
+
+
+def test_reconcile_prefix_refuses_to_fix_other_prefixes(bucket, client):
+    with pytest.raises(ValueError):
+        reconcile.reconcile_prefix(
+            client, bucket.name, bucket.id, "backups/2024/x/", fix=True
+        )
+
+
+def test_fix_leaves_keys_uploaded_during_the_run(bucket, client, monkeypatch):
+    client.put_object(Bucket=bucket.name, Key="2024/1/3/old-orphan.txt", Body=b"x")
+    iter_db_keys = reconcile.iter_db_keys
+
+    def upload_after_the_rows_are_read(bucket_id, prefix):
+        rows = list(iter_db_keys(bucket_id, prefix))
+        # Preflighted and PUT before the listing gets to it
+        client.put_object(Bucket=bucket.name, Key="2024/1/3/live.txt", Body=b"x")
+        yield from rows
+
+    monkeypatch.setattr(reconcile, "iter_db_keys", upload_after_the_rows_are_read)
+
+    report = reconcile.reconcile_prefix(
+        client,
+        bucket.name,
+        bucket.id,
+        "2024/1/3/",
+        fix=True,
+        orphan_grace=timedelta(0),
+    )
+
+    assert report.samples == {
+        reconcile.ORPHAN: ["2024/1/3/old-orphan.txt"],
+        reconcile.RECENT_ORPHAN: ["2024/1/3/live.txt"],
+    }
+    keys = [
+        entry["Key"] for entry in client.list_objects_v2(Bucket=bucket.name)["Contents"]
+    ]
+    assert keys == ["2024/1/3/live.txt"]
+
+
+def test_command_fails_cleanly_without_credentials(bucket, monkeypatch):
+    monkeypatch.setattr(
+        buckets_services,
+        "get_today_bucket_credentials_by_bucket_id",
+        lambda bucket_id: None,
+    )
+    with pytest.raises(CommandError, match="No credentials"):
+        call_command("r2_reconcile", str(bucket.id))
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from django_r2.helpers.myboto.registry import S3ClientRegistry
+
+ENDPOINT_URL = "http://127.0.0.1:9000"
+
+
+def get_client(registry, access_key_id="key", session_token=None, expires_at=None):
+    return registry.get_client(
+        access_key_id,
+        "secret",
+        session_token=session_token,
+        endpoint_url=ENDPOINT_URL,
+        expires_at=expires_at,
+    )
+
+
+def test_clients_are_reused_per_credential():
+    registry = S3ClientRegistry()
+
+    client = get_client(registry)
+
+    assert get_client(registry) is client
+    assert get_client(registry, access_key_id="other") is not client
+    assert get_client(registry, session_token="token") is not client
+
+
+def test_concurrent_lookups_build_one_client():
+    registry = S3ClientRegistry()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: get_client(registry), range(32)))
+
+    assert all(client is clients[0] for client in clients)
+
+
+def test_clients_are_dropped_when_their_credentials_expire():
+    registry = S3ClientRegistry()
+    expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+    client = get_client(registry, expires_at=expired)
+
+    assert get_client(registry, expires_at=expired) is not client
+
+
+def test_least_recently_used_clients_are_evicted():
+    registry = S3ClientRegistry(maxsize=2)
+    first = get_client(registry, access_key_id="first")
+    get_client(registry, access_key_id="second")
+    get_client(registry, access_key_id="first")
+
+    get_client(registry, access_key_id="third")
+
+    # "second" went, the recently used "first" stayed
+    assert get_client(registry, access_key_id="first") is first
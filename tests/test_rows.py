@@ -0,0 +1,62 @@
+import datetime
+import uuid
+
+import pytest
+
+from django_r2.objects.rows import ObjectRow, dump_rows, load_rows
+
+UTC = datetime.timezone.utc
+
+
+def make_row(created_at, **fields):
+    values = {
+        "id": uuid.uuid4(),
+        "bucket_id": uuid.uuid4(),
+        "keyname": "image-abcde.png",
+        "filename": "image.png",
+        "file_extension": "png",
+        "downloadable_filename": "image.png",
+        "uploaded_size": 48_213_577,
+        "display_size": "46.0 MB",
+        "uploaded_type": "image/png",
+        "is_image_file": True,
+        "is_video_file": False,
+        "is_audio_file": False,
+        "uploaded": True,
+        "uploaded_at": created_at + datetime.timedelta(seconds=1, microseconds=7),
+        "created_at": created_at,
+    }
+    values.update(fields)
+    return ObjectRow(**values)
+
+
+@pytest.mark.parametrize(
+    "created_at",
+    [
+        datetime.datetime(2025, 1, 3, 23, 59, 59, 999_999, tzinfo=UTC),
+        datetime.datetime(1969, 12, 31, 23, 59, 59, 1),
+    ],
+    ids=["aware", "naive"],
+)
+def test_rows_round_trip(created_at):
+    rows = [
+        make_row(created_at),
+        make_row(
+            created_at,
+            keyname=None,
+            uploaded_size=None,
+            uploaded_type=None,
+            uploaded=False,
+            uploaded_at=None,
+        ),
+    ]
+
+    loaded, extra = load_rows(dump_rows(rows, "next-cursor", None))
+
+    assert loaded == rows
+    assert loaded[0].created_at.tzinfo == created_at.tzinfo
+    assert extra == ("next-cursor", None)
+
+
+def test_empty_page_round_trip():
+    assert load_rows(dump_rows([], None, None)) == ([], (None, None))
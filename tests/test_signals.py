@@ -0,0 +1,41 @@
+import pytest
+
+from django_r2 import signals
+from django_r2.models import Bucket
+
+
+@pytest.fixture
+def lifecycle_receivers():
+    signals.connect_bucket_lifecycle_receivers()
+    yield
+    signals.disconnect_bucket_lifecycle_receivers()
+
+
+def test_buckets_are_not_provisioned_by_default(user, standin):
+    bucket = Bucket.objects.create(owner=user)
+    bucket.refresh_from_db()
+    assert not bucket.active_in_cloudflare
+    assert not bucket.name
+
+
+def test_provisioning_updates_the_saved_instance(user, standin, lifecycle_receivers):
+    bucket = Bucket.objects.create(owner=user)
+
+    assert bucket.active_in_cloudflare
+    assert bucket.name.startswith("django_r2")
+    assert standin.store.has_bucket(bucket.name)
+    bucket.refresh_from_db()
+    assert bucket.active_in_cloudflare
+
+
+def test_deleting_a_bucket_purges_it_synchronously(
+    bucket, standin, lifecycle_receivers, django_capture_on_commit_callbacks
+):
+    client = bucket.bucketcredentials.get_s3_client()
+    client.put_object(Bucket=bucket.name, Key="2025/1/3/file.txt", Body=b"x")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        bucket.delete()
+
+    # No task queue: the purge and delete ran on commit, not on a thread
+    assert not standin.store.has_bucket(bucket.name)
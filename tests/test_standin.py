@@ -0,0 +1,221 @@
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+
+import boto3
+import pytest
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from django_r2.testing import issue_temporary_credentials
+
+
+def make_client(standin, access_key_id, secret_access_key, session_token=None):
+    return boto3.client(
+        "s3",
+        endpoint_url=standin.endpoint_url,
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_access_key,
+        aws_session_token=session_token,
+        region_name="auto",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+
+
+@pytest.fixture
+def client(standin_server):
+    return make_client(
+        standin_server, standin_server.access_key_id, standin_server.secret_access_key
+    )
+
+
+@pytest.fixture
+def bucket_name(standin_server):
+    name = f"standin-{uuid.uuid4().hex[:12]}"
+    standin_server.create_bucket(name)
+    return name
+
+
+def error_code(excinfo):
+    return excinfo.value.response["Error"]["Code"]
+
+
+def http_status(excinfo):
+    return excinfo.value.response["ResponseMetadata"]["HTTPStatusCode"]
+
+
+# Signatures
+
+
+def test_rejects_a_wrong_secret(standin_server, bucket_name):
+    client = make_client(standin_server, standin_server.access_key_id, "wrong")
+
+    with pytest.raises(ClientError) as excinfo:
+        client.put_object(Bucket=bucket_name, Key="a.txt", Body=b"a")
+
+    assert error_code(excinfo) == "SignatureDoesNotMatch"
+    assert not standin_server.store.list_objects(bucket_name)[0]
+
+
+def test_rejects_a_tampered_presigned_url(standin_server, client, bucket_name):
+    url = client.generate_presigned_url(
+        "put_object", Params={"Bucket": bucket_name, "Key": "a.txt"}
+    )
+    request = urllib.request.Request(
+        url.replace("/a.txt?", "/b.txt?"), data=b"b", method="PUT"
+    )
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(request)
+
+    assert excinfo.value.code == 403
+
+
+def test_temporary_credentials_only_work_on_their_bucket(standin_server, bucket_name):
+    credentials = issue_temporary_credentials("another-bucket")
+    client = make_client(
+        standin_server,
+        credentials.access_key_id,
+        credentials.secret_access_key,
+        credentials.session_token,
+    )
+
+    with pytest.raises(ClientError) as excinfo:
+        client.put_object(Bucket=bucket_name, Key="a.txt", Body=b"a")
+
+    assert error_code(excinfo) == "AccessDenied"
+
+
+# Multipart uploads
+
+
+def upload_parts(client, bucket_name, key, parts):
+    upload_id = client.create_multipart_upload(Bucket=bucket_name, Key=key)["UploadId"]
+    etags = [
+        client.upload_part(
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=body,
+        )["ETag"]
+        for number, body in enumerate(parts, start=1)
+    ]
+    return upload_id, [
+        {"PartNumber": number, "ETag": etag}
+        for number, etag in enumerate(etags, start=1)
+    ]
+
+
+def test_multipart_upload_assembles_parts_in_order(client, bucket_name):
+    upload_id, parts = upload_parts(client, bucket_name, "big.bin", [b"one-", b"two"])
+
+    response = client.complete_multipart_upload(
+        Bucket=bucket_name,
+        Key="big.bin",
+        UploadId=upload_id,
+        MultipartUpload={"Parts": parts},
+    )
+
+    assert response["ETag"].endswith('-2"')
+    body = client.get_object(Bucket=bucket_name, Key="big.bin")["Body"].read()
+    assert body == b"one-two"
+
+
+def test_multipart_upload_rejects_unknown_parts(client, bucket_name):
+    upload_id, parts = upload_parts(client, bucket_name, "big.bin", [b"one"])
+    parts[0]["ETag"] = '"0123456789abcdef0123456789abcdef"'
+
+    with pytest.raises(ClientError) as excinfo:
+        client.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key="big.bin",
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    assert error_code(excinfo) == "InvalidPart"
+
+
+def test_aborted_multipart_upload_is_gone(client, bucket_name):
+    upload_id, parts = upload_parts(client, bucket_name, "big.bin", [b"one"])
+
+    client.abort_multipart_upload(Bucket=bucket_name, Key="big.bin", UploadId=upload_id)
+
+    with pytest.raises(ClientError) as excinfo:
+        client.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key="big.bin",
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    assert error_code(excinfo) == "NoSuchUpload"
+    with pytest.raises(ClientError) as excinfo:
+        client.head_object(Bucket=bucket_name, Key="big.bin")
+    assert http_status(excinfo) == 404
+
+
+# Ranges and conditional GETs
+
+
+@pytest.fixture
+def stored(client, bucket_name):
+    response = client.put_object(Bucket=bucket_name, Key="a.txt", Body=b"0123456789")
+    return response["ETag"]
+
+
+def test_range_request(client, bucket_name, stored):
+    response = client.get_object(Bucket=bucket_name, Key="a.txt", Range="bytes=2-4")
+
+    assert response["ResponseMetadata"]["HTTPStatusCode"] == 206
+    assert response["ContentRange"] == "bytes 2-4/10"
+    assert response["Body"].read() == b"234"
+
+
+def test_suffix_range_request(client, bucket_name, stored):
+    response = client.get_object(Bucket=bucket_name, Key="a.txt", Range="bytes=-3")
+
+    assert response["ContentRange"] == "bytes 7-9/10"
+    assert response["Body"].read() == b"789"
+
+
+def test_unsatisfiable_range(client, bucket_name, stored):
+    with pytest.raises(ClientError) as excinfo:
+        client.get_object(Bucket=bucket_name, Key="a.txt", Range="bytes=20-30")
+
+    assert http_status(excinfo) == 416
+
+
+def test_if_none_match_gives_304(client, bucket_name, stored):
+    with pytest.raises(ClientError) as excinfo:
+        client.get_object(Bucket=bucket_name, Key="a.txt", IfNoneMatch=stored)
+
+    assert http_status(excinfo) == 304
+
+
+def test_if_modified_since_gives_304(client, bucket_name, stored):
+    modified = client.head_object(Bucket=bucket_name, Key="a.txt")["LastModified"]
+
+    with pytest.raises(ClientError) as excinfo:
+        client.get_object(Bucket=bucket_name, Key="a.txt", IfModifiedSince=modified)
+
+    assert http_status(excinfo) == 304
+
+
+def test_if_match_mismatch_gives_412(client, bucket_name, stored):
+    with pytest.raises(ClientError) as excinfo:
+        client.get_object(Bucket=bucket_name, Key="a.txt", IfMatch='"other"')
+
+    assert http_status(excinfo) == 412
+
+
+def test_if_unmodified_since_in_the_past_gives_412(client, bucket_name, stored):
+    with pytest.raises(ClientError) as excinfo:
+        client.get_object(
+            Bucket=bucket_name,
+            Key="a.txt",
+            IfUnmodifiedSince=datetime(2000, 1, 1, tzinfo=timezone.utc),
+        )
+
+    assert http_status(excinfo) == 412
@@ -0,0 +1,39 @@
+import pytest
+from django.test import RequestFactory
+
+from django_r2.objects.streaming import stream_object
+
+
+@pytest.fixture
+def my_s3_client(bucket):
+    client = bucket.bucketcredentials.get_my_s3_client()
+    client.client.put_object(Bucket=bucket.name, Key="a.txt", Body=b"0123456789")
+    return client
+
+
+def get(my_s3_client, **headers):
+    request = RequestFactory().get("/", headers=headers)
+    response = stream_object(request, my_s3_client, "a.txt")
+    return response.status_code, b"".join(response.streaming_content)
+
+
+def test_if_range_matching_etag_sends_the_range(my_s3_client):
+    etag = my_s3_client.client.head_object(Bucket=my_s3_client.bucket, Key="a.txt")[
+        "ETag"
+    ]
+    assert get(my_s3_client, range="bytes=2-4", if_range=etag) == (206, b"234")
+
+
+def test_if_range_stale_etag_sends_the_whole_object(my_s3_client):
+    assert get(my_s3_client, range="bytes=2-4", if_range='"stale"') == (
+        200,
+        b"0123456789",
+    )
+
+
+def test_if_range_stale_date_sends_the_whole_object(my_s3_client):
+    stale = "Mon, 01 Jan 2001 00:00:00 GMT"
+    assert get(my_s3_client, range="bytes=2-4", if_range=stale) == (
+        200,
+        b"0123456789",
+    )
@@ -0,0 +1,88 @@
+import hashlib
+
+import pytest
+
+from django_r2.models import Object, URLUploadRequest
+from django_r2.uploads import services as uploads_services
+
+
+class FakeResponse:
+    def __init__(self, chunks, headers):
+        self.chunks = chunks
+        self.headers = headers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=None):
+        for chunk in self.chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return self.response
+
+
+@pytest.fixture
+def upload_request(bucket, user):
+    return URLUploadRequest.objects.create(
+        bucket=bucket, added_by=user, url="https://example.com/files/report.pdf"
+    )
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {"Content-Type": "application/pdf", "Content-Length": "9"},
+        # Decoded by iter_content(), so the length is unknown
+        {"Content-Encoding": "gzip", "Content-Length": "4"},
+    ],
+)
+def test_stream_url_upload_request(bucket, upload_request, headers):
+    session = FakeSession(FakeResponse([b"abc", b"def", b"ghi"], headers))
+
+    object_data, file_data = uploads_services.stream_url_upload_request(
+        upload_request, session=session
+    )
+
+    assert session.urls == [upload_request.url]
+    assert file_data["size"] == 9
+    assert file_data["type"] == "application/pdf"
+    assert file_data["sha256"] == hashlib.sha256(b"abcdefghi").hexdigest()
+    assert file_data["source_url"] == upload_request.url
+    client = bucket.bucketcredentials.get_s3_client()
+    body = client.get_object(Bucket=bucket.name, Key=object_data["key"])["Body"]
+    assert body.read() == b"abcdefghi"
+    instance = Object.objects.get(id=object_data["object_id"])
+    assert instance.filename == "report.pdf"
+
+
+def test_stream_url_upload_request_records_failures(upload_request):
+    response = FakeResponse(
+        [b"abc", ConnectionError("connection reset")],
+        {"Content-Type": "application/pdf"},
+    )
+
+    with pytest.raises(ConnectionError):
+        uploads_services.stream_url_upload_request(
+            upload_request, session=FakeSession(response)
+        )
+
+    instance = Object.objects.get(bucket=upload_request.bucket)
+    assert not instance.uploaded
+    assert instance.errors == {"upload": "connection reset"}
+
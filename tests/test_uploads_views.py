@@ -0,0 +1,151 @@
+import json
+import urllib.request
+import uuid
+
+import pytest
+from django.test import RequestFactory
+
+from django_r2.buckets import services as buckets_services
+from django_r2.models import Object
+from django_r2.objects import services as objects_services
+from django_r2.uploads import views as uploads_views
+from django_r2.uploads.views import (
+    upload_complete_batch_view,
+    upload_multipart_abort_view,
+    upload_multipart_complete_view,
+    upload_multipart_create_view,
+    upload_view,
+)
+
+
+def test_multipart_create_failure_leaves_no_object(bucket, standin, user):
+    # create_multipart_upload fails: the bucket is gone from R2
+    standin.store.delete_bucket(bucket.name)
+    request = RequestFactory().post(
+        "/", {"filename": "video.mp4", "size": 100 * 1024 * 1024}
+    )
+    request.user = user
+
+    response = upload_multipart_create_view(request, bucket_id=bucket.id)
+
+    assert response.status_code == 400
+    assert not Object.objects.filter(bucket=bucket).exists()
+
+
+def start_multipart(bucket, user):
+    request = RequestFactory().post("/", {"filename": "video.mp4", "size": 1024})
+    request.user = user
+    return json.loads(
+        upload_multipart_create_view(request, bucket_id=bucket.id).content
+    )
+
+
+def post_json(view, user, body, bucket_id):
+    request = RequestFactory().post(
+        "/", json.dumps(body), content_type="application/json"
+    )
+    request.user = user
+    return view(request, bucket_id=bucket_id)
+
+
+@pytest.mark.parametrize(
+    "view", [upload_multipart_complete_view, upload_multipart_abort_view]
+)
+def test_multipart_finish_rejects_non_object_body(bucket, standin, user, view):
+    response = post_json(view, user, ["object_data"], bucket.id)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "view", [upload_multipart_complete_view, upload_multipart_abort_view]
+)
+def test_multipart_finish_rejects_other_bucket(bucket, standin, user, view):
+    started = start_multipart(bucket, user)
+    body = {
+        "object_data": started["object_data"],
+        "parts": [{"part_number": 1, "etag": '"x"'}],
+    }
+
+    response = post_json(view, user, body, uuid.uuid4())
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "view", [upload_multipart_complete_view, upload_multipart_abort_view]
+)
+def test_multipart_finish_without_credentials(bucket, standin, user, view, monkeypatch):
+    started = start_multipart(bucket, user)
+    monkeypatch.setattr(
+        buckets_services,
+        "get_today_bucket_credentials_by_bucket_id",
+        lambda bucket_id: None,
+    )
+    body = {
+        "object_data": started["object_data"],
+        "parts": [{"part_number": 1, "etag": '"x"'}],
+    }
+
+    response = post_json(view, user, body, bucket.id)
+
+    assert response.status_code == 400
+
+
+def test_batch_presign_keeps_the_request_order(bucket, standin, user):
+    response = post_json(
+        upload_view, user, {"filenames": ["a.png", 5, "b.txt"]}, bucket.id
+    )
+
+    objects = json.loads(response.content)["objects"]
+    assert [item["name"] for item in objects] == ["a.png", 5, "b.txt"]
+    assert objects[1] == {"name": 5, "error": "Invalid filename"}
+    assert Object.objects.filter(bucket=bucket).count() == 2
+    for item in objects[::2]:
+        upload = urllib.request.Request(item["url"], data=b"x", method="PUT")
+        with urllib.request.urlopen(upload) as response:
+            assert response.status == 200
+
+
+def test_batch_presign_limit(bucket, standin, user, monkeypatch):
+    monkeypatch.setattr(uploads_views, "DJANGO_R2_PRESIGN_BATCH_SIZE", 2)
+
+    response = post_json(
+        upload_view, user, {"filenames": ["a.png", "b.png", "c.png"]}, bucket.id
+    )
+
+    assert response.status_code == 400
+    assert not Object.objects.filter(bucket=bucket).exists()
+
+
+def test_batch_complete(bucket, standin, user):
+    presigned = json.loads(
+        post_json(
+            upload_view, user, {"filenames": ["a.png", "b.png"]}, bucket.id
+        ).content
+    )["objects"]
+    first, second = presigned
+    listing = objects_services.get_paginated_objects_for_bucket(bucket.id)
+    items = [
+        {
+            "object_data": first["object_data"],
+            "completed": True,
+            "file_data": {"size": 1234, "type": "image/png"},
+        },
+        "not an item",
+        {"object_data": "tampered"},
+        {"object_data": second["object_data"], "completed": False},
+    ]
+
+    response = post_json(upload_complete_batch_view, user, {"items": items}, bucket.id)
+
+    results = json.loads(response.content)["results"]
+    assert [result.get("status") for result in results] == ["ok", None, None, "ok"]
+    assert "error" in results[1] and "error" in results[2]
+    uploaded = Object.objects.get(keyname=first["filename"])
+    assert uploaded.uploaded and uploaded.uploaded_size == 1234
+    assert not Object.objects.get(keyname=second["filename"]).uploaded
+    # bulk_update() sends no post_save; the listing cache is still cleared
+    refreshed = objects_services.get_paginated_objects_for_bucket(bucket.id)
+    assert [row.uploaded for row in listing] == [False, False]
+    assert sorted(row.uploaded for row in refreshed) == [False, True]
@@ -0,0 +1,25 @@
+from django_r2.models import Object
+from django_r2.objects.verify import verify_objects
+
+
+def test_verify_recomputes_the_file_type_flags(bucket):
+    instance = Object.objects.create(
+        bucket=bucket,
+        filename="photo.png",
+        uploaded=True,
+        uploaded_type="application/octet-stream",
+    )
+    client = bucket.bucketcredentials.get_s3_client()
+    client.put_object(
+        Bucket=bucket.name,
+        Key=instance.get_s3_key(),
+        Body=b"png",
+        ContentType="image/png",
+    )
+
+    stats = verify_objects([instance.id])
+
+    assert stats.verified == 1
+    instance.refresh_from_db()
+    assert instance.uploaded_type == "image/png"
+    assert instance.is_image_file